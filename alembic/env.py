@@ -9,10 +9,15 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app.db.base import Base
 from app.db.models import (  # noqa
+    corpus_version,
     domain_metric,
+    embedding_cache,
     http_cache,
+    job_watermark,
     opportunity,
     paper,
+    paper_embedding,
+    paper_neighbor,
     paper_repo_link,
     repository,
 )
@@ -0,0 +1,43 @@
+"""Add incremental scoring watermark
+
+Revision ID: 005_add_scoring_watermark
+Revises: 004_add_recommendation_tier
+Create Date: 2025-11-20 09:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "005_add_scoring_watermark"
+down_revision = "004_add_recommendation_tier"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Content hash and timestamp of the last scoring pass for each paper
+    op.add_column("papers", sa.Column("scored_content_hash", sa.String(64), nullable=True))
+    op.add_column("papers", sa.Column("scored_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Per-job progress watermarks
+    op.create_table(
+        "job_watermarks",
+        sa.Column("job", sa.String(64), primary_key=True),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("state", sa.JSON, nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_watermarks")
+    op.drop_column("papers", "scored_at")
+    op.drop_column("papers", "scored_content_hash")
@@ -0,0 +1,37 @@
+"""Add content-addressed embedding cache
+
+Revision ID: 007_add_embedding_cache
+Revises: 005_add_scoring_watermark
+Create Date: 2025-11-27 09:00:00
+
+"""
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "007_add_embedding_cache"
+down_revision = "005_add_scoring_watermark"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("model", sa.String(255), primary_key=True),
+        sa.Column("text_hash", sa.String(64), primary_key=True),
+        # Any dimension, so model versions of other sizes can be cached too
+        sa.Column("embedding", Vector(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_cache")
@@ -0,0 +1,35 @@
+"""Add corpus version counter for query result caches
+
+Revision ID: 008_add_corpus_version
+Revises: 007_add_embedding_cache
+Create Date: 2025-11-28 09:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "008_add_corpus_version"
+down_revision = "007_add_embedding_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "corpus_versions",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.execute("INSERT INTO corpus_versions (name, version) VALUES ('papers', 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("corpus_versions")
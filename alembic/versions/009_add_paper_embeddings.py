@@ -0,0 +1,45 @@
+"""Add per-model paper embeddings side table
+
+Revision ID: 009_add_paper_embeddings
+Revises: 008_add_corpus_version
+Create Date: 2025-11-29 09:00:00
+
+"""
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "009_add_paper_embeddings"
+down_revision = "008_add_corpus_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # papers.embedding keeps serving EMBEDDING_COLUMN_MODEL; other model versions are
+    # backfilled here and get a partial HNSW index from app.workers.reembed_backfill
+    op.create_table(
+        "paper_embeddings",
+        sa.Column(
+            "paper_id",
+            sa.BigInteger(),
+            sa.ForeignKey("papers.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("model", sa.String(255), primary_key=True),
+        sa.Column("embedding", Vector(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index("ix_paper_embeddings_model", "paper_embeddings", ["model"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_paper_embeddings_model")
+    op.drop_table("paper_embeddings")
@@ -0,0 +1,53 @@
+"""Add precomputed paper nearest-neighbor graph
+
+Revision ID: 011_add_paper_neighbors
+Revises: 009_add_paper_embeddings
+Create Date: 2025-12-10 09:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "011_add_paper_neighbors"
+down_revision = "009_add_paper_embeddings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by app.workers.paper_neighbors; (paper_id, model, rank) serves a
+    # paper's neighbor list in order, the neighbor_id index its reverse neighbors
+    op.create_table(
+        "paper_neighbors",
+        sa.Column(
+            "paper_id",
+            sa.BigInteger(),
+            sa.ForeignKey("papers.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("model", sa.String(255), primary_key=True),
+        sa.Column("rank", sa.SmallInteger(), primary_key=True),
+        sa.Column(
+            "neighbor_id",
+            sa.BigInteger(),
+            sa.ForeignKey("papers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("similarity", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_paper_neighbors_neighbor_id", "paper_neighbors", ["neighbor_id", "model"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_paper_neighbors_neighbor_id")
+    op.drop_table("paper_neighbors")
@@ -0,0 +1,78 @@
+"""Rebuild the papers HNSW index with the cosine operator class and explicit build parameters
+
+Revision ID: 012_rebuild_papers_hnsw_cosine
+Revises: 011_add_paper_neighbors
+Create Date: 2025-12-12 09:00:00
+
+"""
+import sys
+import threading
+
+import sqlalchemy as sa
+
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = "012_rebuild_papers_hnsw_cosine"
+down_revision = "011_add_paper_neighbors"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_papers_embedding_hnsw"
+REBUILD = "ix_papers_embedding_hnsw_rebuild"
+# Build parameters, overridable with `alembic -x hnsw_m=24 -x hnsw_ef_construction=200 ...`
+# to match VECTOR_HNSW_M and VECTOR_HNSW_EF_CONSTRUCTION
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 128
+PROGRESS_INTERVAL = 15.0
+PROGRESS_SQL = """
+    SELECT p.phase, p.tuples_done, p.tuples_total
+    FROM pg_stat_progress_create_index p
+    WHERE p.relid = to_regclass('papers')
+"""
+
+
+def _build_options() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    m = int(x_args.get("hnsw_m", HNSW_M))
+    ef_construction = int(x_args.get("hnsw_ef_construction", HNSW_EF_CONSTRUCTION))
+    return f"WITH (m = {m}, ef_construction = {ef_construction})"
+
+
+def _report_progress(engine: sa.engine.Engine, done: threading.Event) -> None:
+    # The build blocks the migration's connection, so poll from another one
+    with engine.connect() as connection:
+        while not done.wait(PROGRESS_INTERVAL):
+            for phase, tuples_done, tuples_total in connection.execute(sa.text(PROGRESS_SQL)):
+                progress = f": {tuples_done}/{tuples_total} tuples" if tuples_total else ""
+                print(f"Building {REBUILD}, {phase}{progress}", file=sys.stderr, flush=True)
+            connection.rollback()
+
+
+def _swap(definition: str) -> None:
+    # Build the replacement next to the live index, then swap names, so reads
+    # keep an index throughout and writes are never blocked. A build that
+    # failed halfway leaves an invalid index, dropped by the rerun.
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {REBUILD}")
+        done = threading.Event()
+        progress = threading.Thread(target=_report_progress, args=(bind.engine, done), daemon=True)
+        progress.start()
+        try:
+            op.execute(f"CREATE INDEX CONCURRENTLY {REBUILD} ON papers USING hnsw {definition}")
+        finally:
+            done.set()
+            progress.join()
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}")
+        op.execute(f"ALTER INDEX {REBUILD} RENAME TO {INDEX}")
+
+
+def upgrade() -> None:
+    # 001 built the index with the default vector_l2_ops, which cosine (<=>)
+    # searches cannot use.
+    _swap(f"(embedding vector_cosine_ops) {_build_options()}")
+
+
+def downgrade() -> None:
+    _swap("(embedding)")
@@ -0,0 +1,29 @@
+"""Add papers.embedded_at to track embedding writes
+
+Revision ID: 013_add_paper_embedded_at
+Revises: 012_rebuild_papers_hnsw_cosine
+Create Date: 2025-12-15 09:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "013_add_paper_embedded_at"
+down_revision = "012_rebuild_papers_hnsw_cosine"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # updated_at moves on every score write, so the neighbor graph job reads
+    # this instead to find papers whose vector changed
+    op.add_column("papers", sa.Column("embedded_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE papers SET embedded_at = updated_at WHERE embedding IS NOT NULL")
+    op.create_index("ix_papers_embedded_at", "papers", ["embedded_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_papers_embedded_at", table_name="papers")
+    op.drop_column("papers", "embedded_at")
@@ -1,14 +1,45 @@
+import json
+from collections.abc import Iterator
+from dataclasses import replace
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import and_, text
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.db.models.paper import Paper
-from app.db.schemas.paper import PaperOut
+from app.db.schemas.paper import NearBatchRequest, PaperOut
 from app.db.session import get_db
+from app.services.embedding_executor import EmbeddingExecutor, EmbeddingQueueFullError
+from app.services.embedding_store import embedding_expr, load_embeddings
 from app.services.embeddings import EmbeddingService
+from app.services.hybrid_search import hybrid_search
+from app.services.paper_neighbors import related_papers
+from app.services.query_cache import QueryCache
+from app.services.search_backends import get_search_backend
+from app.services.vector_search import VectorFilters
 
 router = APIRouter(prefix="/papers", tags=["papers"])
 _get_db_dependency = Depends(get_db)
+_published_after_query = Query(None, description="Published at or after")
+_published_before_query = Query(None, description="Published before")
+_exclude_ids_query = Query(None, description="Paper ids to leave out")
+
+
+def _embed_query(cache: QueryCache, text_query: str) -> list[float]:
+    try:
+        return cache.embedding(text_query, EmbeddingExecutor.get().embed)
+    except (EmbeddingQueueFullError, TimeoutError) as exc:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "embedding_unavailable",
+                "message": "Embedding capacity exhausted, retry shortly",
+            },
+            headers={"Retry-After": "1"},
+        ) from exc
 
 
 @router.get("", response_model=list[PaperOut])
@@ -18,7 +49,7 @@ def list_papers(
     min_composite_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum composite score"),
     min_moat_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum moat score"),
     min_scalability_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum scalability score"),
-    sort_by: str = Query("id", description="Sort by: id, composite_score, published_at"),
+    sort_by: str = Query("id", description="Sort by: id, composite_score, published_at, relevance"),
     limit: int = Query(20, ge=1, le=100, description="Number of results"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
     db: Session = _get_db_dependency,
@@ -31,7 +62,7 @@ def list_papers(
     - **min_composite_score**: Minimum composite score threshold
     - **min_moat_score**: Minimum moat score threshold
     - **min_scalability_score**: Minimum scalability score threshold
-    - **sort_by**: Sort field (id, composite_score, published_at)
+    - **sort_by**: Sort field (id, composite_score, published_at, or relevance: ts_rank_cd of q)
     - **limit**: Results per page (1-100)
     - **offset**: Pagination offset
     """
@@ -58,7 +89,11 @@ def list_papers(
         query = query.params(q=q)
     
     # Apply sorting
-    if sort_by == "composite_score":
+    if sort_by == "relevance" and q:
+        query = query.order_by(
+            text("ts_rank_cd(tsv, plainto_tsquery('english', :q)) DESC"), Paper.id.desc()
+        )
+    elif sort_by == "composite_score":
         query = query.order_by(Paper.composite_score.desc().nullslast())
     elif sort_by == "published_at":
         query = query.order_by(Paper.published_at.desc().nullslast())
@@ -73,6 +108,18 @@ def similar_papers(
     text_query: str | None = Query(None, description="Raw text to embed"),
     paper_id: int | None = Query(None, description="Use embedding from paper_id"),
     k: int = Query(10, ge=1, le=50, description="Number of similar papers to return"),
+    domain: str | None = Query(None, description="Filter by domain"),
+    published_after: datetime | None = _published_after_query,
+    published_before: datetime | None = _published_before_query,
+    min_composite_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum composite score"),
+    min_moat_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum moat score"),
+    min_scalability_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum scalability score"),
+    min_attention_gap_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum attention gap score"),
+    min_network_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum network score"),
+    exclude_ids: list[int] | None = _exclude_ids_query,
+    ef_search: int | None = Query(
+        None, ge=1, le=1000, description="HNSW candidate list size, capped by VECTOR_EF_SEARCH_MAX"
+    ),
     db: Session = _get_db_dependency,
 ):
     """
@@ -82,21 +129,40 @@ def similar_papers(
     - **text_query**: Raw text to embed and search
     - **paper_id**: Use embedding from existing paper
     - **k**: Number of results (1-50)
+
+    Filters are applied during the index scan, so up to k matching papers are
+    returned rather than the matching subset of the global top k:
+    - **domain**: Only papers in this domain
+    - **published_after** / **published_before**: Publication date range
+    - **min_*_score**: Minimum composite or component scores
+    - **exclude_ids**: Paper ids to leave out (repeat the parameter)
+
+    **ef_search** trades latency for recall: the HNSW scan keeps that many
+    candidates (pgvector default 40) for this request only.
+
+    An unfiltered paper_id query is served from the precomputed neighbor graph
+    when it holds k neighbors for the paper; the paper itself is never returned.
     """
-    if not text_query and not paper_id:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "error": "missing_parameter",
-                "message": "Provide either text_query or paper_id",
-                "fields": ["text_query", "paper_id"]
-            }
-        )
-    
+    filters = VectorFilters(
+        domain=domain,
+        published_after=published_after,
+        published_before=published_before,
+        min_composite_score=min_composite_score,
+        min_moat_score=min_moat_score,
+        min_scalability_score=min_scalability_score,
+        min_attention_gap_score=min_attention_gap_score,
+        min_network_score=min_network_score,
+        exclude_ids=tuple(sorted(set(exclude_ids or ()))),
+    )
+    cache = QueryCache.get()
     if text_query:
-        vec = EmbeddingService.get().embed(text_query)
-    else:
-        row = db.query(Paper.embedding).filter(Paper.id == paper_id).first()
+        vec = _embed_query(cache, text_query)
+    elif paper_id:
+        if not filters:
+            related = related_papers(db, paper_id, k)
+            if related is not None:
+                return related
+        row = db.query(embedding_expr()).filter(Paper.id == paper_id).first()
         if not row or not row[0]:
             raise HTTPException(
                 status_code=404,
@@ -107,18 +173,146 @@ def similar_papers(
                 }
             )
         vec = row[0]
+        # Match the graph, which never lists a paper as its own neighbor
+        filters = replace(filters, exclude_ids=tuple(sorted({*filters.exclude_ids, paper_id})))
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "missing_parameter",
+                "message": "Provide either text_query or paper_id",
+                "fields": ["text_query", "paper_id"]
+            }
+        )
+
+    backend = get_search_backend()
+    return cache.search(
+        db,
+        vec,
+        k,
+        {**filters.cache_key(), "ef_search": ef_search},
+        lambda: backend.search(db, vec, k, filters, ef_search),
+    )
+
+
+@router.post("/near/batch")
+def similar_papers_batch(request: NearBatchRequest, db: Session = _get_db_dependency):
+    """
+    Similar papers for many paper ids and texts in one request, streamed as NDJSON.
+
+    - **paper_ids**: Search with each paper's stored embedding
+    - **texts**: Texts to embed (in one batch) and search
+    - **k**: Results per query (1-50)
 
-    sql = text(
-        """
-        SELECT id, title, 1 - (embedding <=> :vec) AS similarity
-        FROM papers
-        WHERE embedding IS NOT NULL
-        ORDER BY embedding <=> :vec
-        LIMIT :k
+    Each output line is ``{"paper_id": ..., "results": [...]}`` or
+    ``{"text": ..., "results": [...]}``, in request order (paper ids first);
+    a paper without an embedding gets ``{"paper_id": ..., "error": "not_found"}``.
+    As with ``/near?paper_id=``, a paper is never returned as its own neighbor.
+    Queries run ``NEAR_BATCH_CHUNK_SIZE`` at a time, one SQL statement each.
     """
+    total = len(request.paper_ids) + len(request.texts)
+    if not total:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "missing_parameter",
+                "message": "Provide paper_ids or texts",
+                "fields": ["paper_ids", "texts"],
+            },
+        )
+    if total > settings.near_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "batch_too_large",
+                "message": f"At most {settings.near_batch_max_items} paper ids and texts per request",
+                "limit": settings.near_batch_max_items,
+            },
+        )
+
+    stored = {
+        paper_id: vec.tolist() for paper_id, vec in load_embeddings(db, request.paper_ids).items()
+    }
+    text_vectors = (
+        QueryCache.get().embeddings_for(request.texts, EmbeddingService.get().embed_many)
+        if request.texts
+        else []
     )
-    res = db.execute(sql, {"vec": vec, "k": k}).mappings().all()
-    return [
-        {"id": r["id"], "title": r["title"], "similarity": float(r["similarity"])}
-        for r in res
+    queries: list[tuple[dict, list[float] | None]] = [
+        ({"paper_id": paper_id}, stored.get(paper_id)) for paper_id in request.paper_ids
     ]
+    queries += [({"text": t}, vec) for t, vec in zip(request.texts, text_vectors, strict=True)]
+    backend = get_search_backend()
+
+    def lines() -> Iterator[str]:
+        try:
+            chunk_size = max(1, settings.near_batch_chunk_size)
+            for start in range(0, len(queries), chunk_size):
+                chunk = queries[start : start + chunk_size]
+                found = [(query, vec) for query, vec in chunk if vec is not None]
+                results = iter(
+                    backend.search_many(
+                        db,
+                        [vec for _, vec in found],
+                        request.k,
+                        exclude_ids=[query.get("paper_id") for query, _ in found],
+                    )
+                )
+                for query, vec in chunk:
+                    if vec is None:
+                        yield json.dumps({**query, "error": "not_found"}) + "\n"
+                    else:
+                        yield json.dumps({**query, "results": next(results)}) + "\n"
+        finally:
+            # The request's session outlives the dependency while the response streams
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/search")
+def hybrid_search_papers(
+    q: str = Query(..., min_length=1, description="Search text, matched as keywords and embedded"),
+    domain: str | None = Query(None, description="Filter by domain"),
+    min_composite_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum composite score"),
+    min_moat_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum moat score"),
+    min_scalability_score: float | None = Query(None, ge=0.0, le=1.0, description="Minimum scalability score"),
+    k: int = Query(10, ge=1, le=50, description="Number of results"),
+    db: Session = _get_db_dependency,
+):
+    """
+    Hybrid search: full-text and vector similarity fused by reciprocal rank.
+
+    - **q**: Matched against title and abstract, and embedded for similarity
+    - **domain**, **min_composite_score**, **min_moat_score**,
+      **min_scalability_score**: Same filters as listing papers
+    - **k**: Number of results (1-50)
+
+    Each result has its fused ``score`` and, for debugging, ``text_rank`` and
+    ``vector_rank`` (null when that search did not return the paper) with
+    the raw ``text_score`` (ts_rank_cd) and cosine ``similarity``.
+    """
+    cache = QueryCache.get()
+    vec = _embed_query(cache, q)
+    filters = VectorFilters(
+        domain=domain,
+        min_composite_score=min_composite_score,
+        min_moat_score=min_moat_score,
+        min_scalability_score=min_scalability_score,
+    )
+
+    def search() -> list[dict]:
+        return [
+            {
+                "id": r["id"],
+                "title": r["title"],
+                "score": float(r["score"]),
+                "text_rank": r["text_rank"],
+                "vector_rank": r["vector_rank"],
+                "text_score": None if r["text_score"] is None else float(r["text_score"]),
+                "similarity": None if r["similarity"] is None else float(r["similarity"]),
+            }
+            for r in hybrid_search(db, q, vec, k, filters)
+        ]
+
+    return cache.search(db, vec, k, {"hybrid": q, **filters.cache_key()}, search)
@@ -16,6 +16,49 @@ class Settings(BaseSettings):
         default="sentence-transformers/all-MiniLM-L6-v2", alias="EMBEDDING_MODEL"
     )
     embedding_dim: int = Field(default=384, alias="EMBEDDING_DIM")
+    embedding_column_model: str = Field(
+        default="sentence-transformers/all-MiniLM-L6-v2", alias="EMBEDDING_COLUMN_MODEL"
+    )
+    embedding_read_model: str = Field(default="", alias="EMBEDDING_READ_MODEL")
+    vector_index_precision: str = Field(default="full", alias="VECTOR_INDEX_PRECISION")
+    vector_rerank_factor: int = Field(default=4, alias="VECTOR_RERANK_FACTOR")
+    vector_iterative_scan: str = Field(default="relaxed_order", alias="VECTOR_ITERATIVE_SCAN")
+    vector_max_scan_tuples: int = Field(default=20000, alias="VECTOR_MAX_SCAN_TUPLES")
+    vector_hnsw_m: int = Field(default=16, alias="VECTOR_HNSW_M")
+    vector_hnsw_ef_construction: int = Field(default=128, alias="VECTOR_HNSW_EF_CONSTRUCTION")
+    vector_ef_search_max: int = Field(default=400, alias="VECTOR_EF_SEARCH_MAX")
+    hybrid_candidates: int = Field(default=50, alias="HYBRID_CANDIDATES")
+    hybrid_rrf_k: int = Field(default=60, alias="HYBRID_RRF_K")
+    near_batch_max_items: int = Field(default=1000, alias="NEAR_BATCH_MAX_ITEMS")
+    near_batch_chunk_size: int = Field(default=100, alias="NEAR_BATCH_CHUNK_SIZE")
+    neighbors_k: int = Field(default=50, alias="NEIGHBORS_K")
+    neighbors_chunk_size: int = Field(default=200, alias="NEIGHBORS_CHUNK_SIZE")
+    vector_search_backend: str = Field(default="pgvector", alias="VECTOR_SEARCH_BACKEND")
+    ann_snapshot_path: str = Field(default="data/ann_index", alias="ANN_SNAPSHOT_PATH")
+    ann_lists: int = Field(default=0, alias="ANN_LISTS")
+    ann_probes: int = Field(default=8, alias="ANN_PROBES")
+    ann_refresh_interval_s: float = Field(default=60.0, alias="ANN_REFRESH_INTERVAL_S")
+    embedding_batch_size: int = Field(default=32, alias="EMBEDDING_BATCH_SIZE")
+    embedding_cache_size: int = Field(default=10000, alias="EMBEDDING_CACHE_SIZE")
+    embedding_backend: str = Field(default="torch", alias="EMBEDDING_BACKEND")
+    embedding_onnx_dir: str = Field(
+        default="models/all-MiniLM-L6-v2-onnx", alias="EMBEDDING_ONNX_DIR"
+    )
+    embedding_onnx_quantized: bool = Field(default=True, alias="EMBEDDING_ONNX_QUANTIZED")
+    embedding_onnx_threads: int = Field(default=0, alias="EMBEDDING_ONNX_THREADS")
+    embedding_executor_batch_size: int = Field(default=32, alias="EMBEDDING_EXECUTOR_BATCH_SIZE")
+    embedding_executor_max_wait_ms: float = Field(
+        default=5.0, alias="EMBEDDING_EXECUTOR_MAX_WAIT_MS"
+    )
+    embedding_executor_queue_size: int = Field(default=256, alias="EMBEDDING_EXECUTOR_QUEUE_SIZE")
+    embedding_executor_timeout_s: float = Field(default=10.0, alias="EMBEDDING_EXECUTOR_TIMEOUT_S")
+    reembed_chunk_size: int = Field(default=1000, alias="REEMBED_CHUNK_SIZE")
+    reembed_workers: int = Field(default=1, alias="REEMBED_WORKERS")
+    reembed_max_rows_per_second: float = Field(default=200.0, alias="REEMBED_MAX_ROWS_PER_SECOND")
+    query_cache_size: int = Field(default=10000, alias="QUERY_CACHE_SIZE")
+    query_result_cache_size: int = Field(default=5000, alias="QUERY_RESULT_CACHE_SIZE")
+    query_result_cache_ttl_s: float = Field(default=300.0, alias="QUERY_RESULT_CACHE_TTL_S")
+    query_cache_version_poll_s: float = Field(default=5.0, alias="QUERY_CACHE_VERSION_POLL_S")
     cors_origins: list[str] = Field(default=["*"], alias="CORS_ORIGINS")
     arxiv_categories: list[str] = Field(
         default_factory=lambda: ["cs.AI", "cs.LG"], alias="ARXIV_CATEGORIES"
@@ -24,6 +67,13 @@ class Settings(BaseSettings):
     arxiv_lookback_days: int = Field(default=30, alias="ARXIV_LOOKBACK_DAYS")
     github_token: str = Field(default="", alias="GITHUB_TOKEN")
     github_search_days: int = Field(default=30, alias="GITHUB_SEARCH_DAYS")
+    scoring_batch_size: int = Field(default=1000, alias="SCORING_BATCH_SIZE")
+    scoring_workers: int = Field(default=1, alias="SCORING_WORKERS")
+    scoring_shard_size: int = Field(default=20000, alias="SCORING_SHARD_SIZE")
+    scoring_stats_tolerance: float = Field(default=0.05, alias="SCORING_STATS_TOLERANCE")
+    scoring_max_staleness_days: int = Field(default=7, alias="SCORING_MAX_STALENESS_DAYS")
+    metrics_pushgateway_url: str = Field(default="", alias="METRICS_PUSHGATEWAY_URL")
+    metrics_textfile_dir: str = Field(default="", alias="METRICS_TEXTFILE_DIR")
     prometheus_multiproc_dir: str = Field(
         default="/tmp/metrics", alias="PROMETHEUS_MULTIPROC_DIR"
     )
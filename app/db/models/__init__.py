@@ -1,15 +1,25 @@
+from .corpus_version import CorpusVersion
 from .domain_metric import DomainMetric
+from .embedding_cache import EmbeddingCacheEntry
 from .http_cache import HttpCache
+from .job_watermark import JobWatermark
 from .opportunity import Opportunity
 from .paper import Paper
+from .paper_embedding import PaperEmbedding
+from .paper_neighbor import PaperNeighbor
 from .paper_repo_link import PaperRepoLink
 from .repository import Repository
 
 __all__ = [
+    "CorpusVersion",
     "DomainMetric",
+    "EmbeddingCacheEntry",
     "HttpCache",
+    "JobWatermark",
     "Opportunity",
     "Paper",
+    "PaperEmbedding",
+    "PaperNeighbor",
     "PaperRepoLink",
     "Repository",
 ]
@@ -0,0 +1,17 @@
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class EmbeddingCacheEntry(Base):
+    # Embedding of a normalized text under one model, keyed by the text's SHA-256
+    __tablename__ = "embedding_cache"
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Dimensionless, like paper_embeddings, so any model version can be cached
+    embedding: Mapped[list[float]] = mapped_column(Vector())
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -1,7 +1,9 @@
+from datetime import datetime
+
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import BigInteger, DateTime, Float, String, Text, func
 from sqlalchemy.dialects.postgresql import ARRAY, JSON, TSVECTOR
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, query_expression
 
 from app.db.base import Base
 
@@ -23,6 +25,10 @@ class Paper(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
     embedding: Mapped[list[float] | None] = mapped_column(Vector(384), nullable=True)
+    # When ``embedding`` was last written; unlike updated_at, score writes leave it alone
+    embedded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Vector of the model version being read, loaded with with_expression(embedding_expr())
+    read_embedding: Mapped[list[float] | None] = query_expression()
     tsv: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True)
     
     # Scoring fields
@@ -36,3 +42,7 @@ class Paper(Base):
     network_evidence: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     composite_score: Mapped[float | None] = mapped_column(Float, nullable=True)
     scoring_metadata: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    scored_content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    scored_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
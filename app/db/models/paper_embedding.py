@@ -0,0 +1,19 @@
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PaperEmbedding(Base):
+    # Embedding of a paper under one model version; each model has its own partial HNSW index
+    __tablename__ = "paper_embeddings"
+    paper_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("papers.id", ondelete="CASCADE"), primary_key=True
+    )
+    model: Mapped[str] = mapped_column(String(255), primary_key=True, index=True)
+    # Dimensionless: models differ in size, indexes cast to the model's dimension
+    embedding: Mapped[list[float]] = mapped_column(Vector())
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, Index, SmallInteger, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PaperNeighbor(Base):
+    # One of a paper's top-K most similar papers under a model version, kept by
+    # app.workers.paper_neighbors; the primary key serves a paper's list in rank order
+    __tablename__ = "paper_neighbors"
+    __table_args__ = (Index("ix_paper_neighbors_neighbor_id", "neighbor_id", "model"),)
+    paper_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("papers.id", ondelete="CASCADE"), primary_key=True
+    )
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+    rank: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    neighbor_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("papers.id", ondelete="CASCADE")
+    )
+    similarity: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
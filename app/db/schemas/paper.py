@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PaperOut(BaseModel):
@@ -11,3 +11,9 @@ class PaperOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class NearBatchRequest(BaseModel):
+    paper_ids: list[int] = Field(default_factory=list)
+    texts: list[str] = Field(default_factory=list)
+    k: int = Field(default=10, ge=1, le=50)
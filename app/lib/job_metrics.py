@@ -0,0 +1,159 @@
+"""Stage timing and run metrics for batch jobs, pushed when the process exits."""
+from __future__ import annotations
+
+import logging
+import os
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from prometheus_client import REGISTRY, CollectorRegistry, push_to_gateway, write_to_textfile
+
+from app.config import settings
+from app.metrics import (
+    WORKER_LAST_RUN,
+    WORKER_PEAK_RSS,
+    WORKER_REGISTRY,
+    WORKER_ROWS_PER_SECOND,
+    WORKER_RUN_DURATION,
+    WORKER_STAGE_DURATION,
+    WORKER_STAGE_ROWS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stage names shared by all jobs
+FETCH = "fetch"
+PARSE = "parse"
+EMBED = "embed"
+DB_READ = "db_read"
+COMPUTE = "compute"
+DB_WRITE = "db_write"
+
+
+@dataclass
+class StageTiming:
+    """Handle yielded by ``StageRecorder.stage``; set ``rows`` inside the block."""
+
+    rows: int = 0
+
+
+@dataclass
+class StageRecorder:
+    """
+    Collect ``(stage, seconds, rows)`` observations.
+
+    Worker processes record into a plain recorder and return its
+    ``observations`` to the parent, which replays them into its ``JobRun``.
+    """
+
+    observations: list[tuple[str, float, int]] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[StageTiming]:
+        timing = StageTiming(rows)
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.observe(name, time.perf_counter() - start, timing.rows)
+
+    def observe(self, name: str, seconds: float, rows: int = 0) -> None:
+        self.observations.append((name, seconds, rows))
+
+    def replay(self, observations: list[tuple[str, float, int]]) -> None:
+        for name, seconds, rows in observations:
+            self.observe(name, seconds, rows)
+
+
+class JobRun(StageRecorder):
+    """Stage recorder of a whole job run that reports straight into the job metrics."""
+
+    def __init__(self, job: str):
+        super().__init__()
+        self.job = job
+        # Rows the job as a whole processed, for the rows/second gauge
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def observe(self, name: str, seconds: float, rows: int = 0) -> None:
+        WORKER_STAGE_DURATION.labels(job=self.job, stage=name).observe(seconds)
+        if rows:
+            WORKER_STAGE_ROWS.labels(job=self.job, stage=name).inc(rows)
+
+    def finish(self, status: str) -> float:
+        duration = time.perf_counter() - self.started
+        WORKER_RUN_DURATION.labels(job=self.job).set(duration)
+        WORKER_ROWS_PER_SECOND.labels(job=self.job).set(self.rows / duration if duration else 0.0)
+        WORKER_PEAK_RSS.labels(job=self.job).set(peak_rss_bytes())
+        WORKER_LAST_RUN.labels(job=self.job, status=status).set(time.time())
+        return duration
+
+
+def peak_rss_bytes() -> int:
+    """Peak RSS of this process or its largest finished child process."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return scale * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+class _JobExport(CollectorRegistry):
+    """Job metrics plus the process-wide registry (ingestion counters, caches)."""
+
+    def collect(self):
+        yield from WORKER_REGISTRY.collect()
+        yield from REGISTRY.collect()
+
+
+def push_job_metrics(job: str) -> None:
+    """
+    Export the metrics of a short-lived process.
+
+    Exports the job registry together with the default registry, so counters
+    such as the ingestion and embedding cache metrics are included. Pushes to
+    ``METRICS_PUSHGATEWAY_URL`` and/or writes ``<job>.prom`` into
+    ``METRICS_TEXTFILE_DIR`` for the node exporter textfile collector. Export
+    failures are logged; they never fail the job.
+    """
+    if settings.metrics_pushgateway_url:
+        try:
+            push_to_gateway(settings.metrics_pushgateway_url, job=job, registry=_JobExport())
+        except Exception as e:
+            logger.warning("Failed to push metrics for %s: %s", job, str(e))
+    if settings.metrics_textfile_dir:
+        try:
+            os.makedirs(settings.metrics_textfile_dir, exist_ok=True)
+            write_to_textfile(
+                os.path.join(settings.metrics_textfile_dir, f"{job}.prom"), _JobExport()
+            )
+        except Exception as e:
+            logger.warning("Failed to write metrics textfile for %s: %s", job, str(e))
+
+
+@contextmanager
+def job_run(job: str) -> Iterator[JobRun]:
+    """Time a job run, record its outcome and export the job metrics on exit."""
+    run = JobRun(job)
+    status = "success"
+    try:
+        yield run
+    except BaseException:
+        status = "failure"
+        raise
+    finally:
+        duration = run.finish(status)
+        logger.info(
+            "%s %s in %.1fs (rows=%d, peak_rss=%dMB)",
+            job,
+            status,
+            duration,
+            run.rows,
+            peak_rss_bytes() // (1024 * 1024),
+        )
+        push_job_metrics(job)
@@ -11,6 +11,8 @@ from app.config import settings
 from app.logging_config import configure_logging
 from app.middleware.prometheus import PrometheusMiddleware
 from app.middleware.request_id import RequestIdMiddleware
+from app.services.embedding_executor import EmbeddingExecutor
+from app.services.search_backends import get_search_backend
 
 app = FastAPI(
     title="DeepTech Radar API",
@@ -47,6 +49,12 @@ app.include_router(opp_router, prefix="/v1")
 # Keep health check at root for load balancers
 app.include_router(health_router)
 
+# Map the ANN snapshot before the first request when VECTOR_SEARCH_BACKEND=local
+app.add_event_handler("startup", get_search_backend)
+
+# Let queued query embeddings finish before the process exits
+app.add_event_handler("shutdown", EmbeddingExecutor.shutdown_instance)
+
 
 @app.get("/metrics")
 def metrics():
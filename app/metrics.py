@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
 
 # API Metrics
 REQUEST_COUNT = Counter(
@@ -45,3 +45,84 @@ GITHUB_ERRORS = Counter(
     "Total errors during GitHub ingestion",
     ["error_type"]
 )
+
+# Embedding Cache Metrics
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total",
+    "Embedding cache lookups by the tier that answered them (miss: the model ran)",
+    ["tier", "result"],
+)
+
+# Query Cache Metrics
+QUERY_CACHE_LOOKUPS = Counter(
+    "query_cache_lookups_total",
+    "/papers/near cache lookups by level (embedding, results)",
+    ["level", "result"],
+)
+
+# Embedding Executor Metrics
+EMBEDDING_EXECUTOR_QUEUE_DEPTH = Histogram(
+    "embedding_executor_queue_depth",
+    "Texts waiting in the embedding executor queue, sampled at each submit",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+EMBEDDING_EXECUTOR_BATCH_SIZE = Histogram(
+    "embedding_executor_batch_size",
+    "Texts embedded together per executor micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBEDDING_EXECUTOR_REJECTED = Counter(
+    "embedding_executor_rejected_total",
+    "Query texts rejected because the embedding executor queue was full",
+)
+
+# Local ANN Index Metrics
+ANN_INDEX_ROWS = Gauge(
+    "ann_index_rows",
+    "Papers searchable in the in-process ANN index",
+    ["source"],
+)
+
+# Batch Job Metrics
+# Cron jobs exit before they can be scraped, so job metrics live in their own
+# registry that is pushed (pushgateway) or written (node exporter textfile) on exit.
+# Each push replaces the job's previous one, so they describe the last run only:
+# counters would restart from zero every run and never accumulate.
+WORKER_REGISTRY = CollectorRegistry()
+WORKER_STAGE_DURATION = Histogram(
+    "worker_stage_duration_seconds",
+    "Time spent in one stage of a batch job",
+    ["job", "stage"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+    registry=WORKER_REGISTRY,
+)
+WORKER_STAGE_ROWS = Gauge(
+    "worker_stage_rows",
+    "Rows handled by one stage of the last batch job run",
+    ["job", "stage"],
+    registry=WORKER_REGISTRY,
+)
+WORKER_RUN_DURATION = Gauge(
+    "worker_run_duration_seconds",
+    "Wall-clock duration of the last batch job run",
+    ["job"],
+    registry=WORKER_REGISTRY,
+)
+WORKER_ROWS_PER_SECOND = Gauge(
+    "worker_rows_per_second",
+    "Rows processed per second during the last batch job run",
+    ["job"],
+    registry=WORKER_REGISTRY,
+)
+WORKER_PEAK_RSS = Gauge(
+    "worker_peak_rss_bytes",
+    "Peak resident set size of the last batch job run, including worker processes",
+    ["job"],
+    registry=WORKER_REGISTRY,
+)
+WORKER_LAST_RUN = Gauge(
+    "worker_last_run_timestamp_seconds",
+    "Unix time the last batch job run finished",
+    ["job", "status"],
+    registry=WORKER_REGISTRY,
+)
@@ -0,0 +1,239 @@
+"""
+In-process IVF index over paper embeddings, saved as a memory-mapped snapshot.
+
+Vectors are L2-normalized and clustered with spherical k-means into ``lists``
+inverted lists. A snapshot stores them sorted by list, so each list is one
+contiguous slice of ``vectors.npy``; loading it with ``mmap_mode="r"`` is
+zero-copy and the OS page cache is shared by every API worker on the host.
+Papers ingested after the snapshot are appended to a small in-memory delta
+that is searched exhaustively.
+
+A snapshot directory holds one subdirectory per saved version and a
+``CURRENT`` file naming the live one, so a save is published by a single
+``os.replace`` and readers never find the snapshot missing.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+ARRAYS = ("ids", "vectors", "offsets", "centroids")
+
+
+@dataclass
+class SnapshotMeta:
+    model: str
+    dim: int
+    watermark: int
+    rows: int
+    lists: int
+    created_at: str
+
+
+def current_version(path: str | Path) -> Path:
+    """
+    Directory of the live version of the snapshot at ``path``.
+
+    Snapshots written before versioning keep their files in ``path`` itself.
+    """
+    path = Path(path)
+    try:
+        return path / (path / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return path
+
+
+def read_meta(path: str | Path) -> SnapshotMeta:
+    """Metadata of the snapshot in directory ``path``; raises ``FileNotFoundError`` if none."""
+    return SnapshotMeta(**json.loads((current_version(path) / META_FILE).read_text()))
+
+
+def normalize(vectors: Sequence[float] | np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch: int = 65536) -> np.ndarray:
+    parts = [
+        np.argmax(vectors[i : i + batch] @ centroids.T, axis=1)
+        for i in range(0, len(vectors), batch)
+    ]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def kmeans(
+    vectors: np.ndarray, lists: int, iterations: int = 10, sample: int = 256, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means centroids trained on at most ``sample`` vectors per list."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > lists * sample:
+        vectors = vectors[np.sort(rng.choice(len(vectors), lists * sample, replace=False))]
+    centroids = vectors[rng.choice(len(vectors), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        # An emptied list keeps its previous centroid
+        filled = np.bincount(assignment, minlength=lists) > 0
+        centroids[filled] = normalize(sums[filled])
+    return centroids
+
+
+class IvfIndex:
+    """
+    Inverted-file index answering cosine top-k queries.
+
+    ``search`` scores the ``probes`` lists whose centroids are nearest to the
+    query, plus the delta. More probes raise recall at the cost of latency.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        offsets: np.ndarray,
+        centroids: np.ndarray,
+        meta: SnapshotMeta,
+    ):
+        self.ids = ids
+        self.vectors = vectors
+        self.offsets = offsets
+        self.centroids = centroids
+        self.meta = meta
+        # Replaced as a whole by ``add`` so concurrent searches see a consistent pair
+        self._delta: tuple[np.ndarray, np.ndarray] = (
+            np.empty(0, dtype=np.int64),
+            np.empty((0, meta.dim), dtype=np.float32),
+        )
+        self._delta_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._delta[0])
+
+    @property
+    def watermark(self) -> int:
+        """Highest paper id in the index; newer papers are picked up by ``add``."""
+        delta_ids = self._delta[0]
+        if not len(delta_ids):
+            return self.meta.watermark
+        return max(self.meta.watermark, int(delta_ids.max()))
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[int] | np.ndarray,
+        vectors: np.ndarray,
+        model: str,
+        lists: int | None = None,
+        seed: int = 0,
+    ) -> IvfIndex:
+        """Cluster ``vectors`` (one row per paper id) into ``lists`` lists, sqrt(n) by default."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = normalize(vectors)
+        rows, dim = vectors.shape
+        n_lists = max(1, min(rows, lists or int(np.sqrt(rows))))
+        if rows:
+            centroids = kmeans(vectors, n_lists, seed=seed)
+            assignment = _assign(vectors, centroids)
+        else:
+            centroids = np.zeros((0, dim), dtype=np.float32)
+            assignment = np.empty(0, dtype=np.int64)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))]
+        ).astype(np.int64)
+        meta = SnapshotMeta(
+            model=model,
+            dim=dim,
+            watermark=int(ids.max()) if rows else 0,
+            rows=rows,
+            lists=len(centroids),
+            created_at=datetime.now(UTC).isoformat(),
+        )
+        return cls(ids[order], vectors[order], offsets, centroids, meta)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Write the snapshot as a new version in the directory ``path`` and make it current.
+
+        Papers added since the index was built are not included; rebuild to
+        fold them in. The version being replaced is kept until the next save,
+        so a process that just read ``CURRENT`` can still load it; older ones
+        are unlinked, and processes that mapped them keep reading their pages.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        previous = current_version(path)
+        version = f"{datetime.now(UTC):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+        directory = path / version
+        directory.mkdir()
+        arrays = (self.ids, self.vectors, self.offsets, self.centroids)
+        for name, array in zip(ARRAYS, arrays, strict=True):
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+        (directory / META_FILE).write_text(json.dumps(asdict(self.meta)))
+        pointer = path / f"{CURRENT_FILE}.tmp-{os.getpid()}"
+        pointer.write_text(version)
+        os.replace(pointer, path / CURRENT_FILE)
+        keep = {version, previous.name, CURRENT_FILE}
+        for entry in path.iterdir():
+            if entry.name in keep:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                # Files of a snapshot saved before versioning
+                entry.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> IvfIndex:
+        # Resolved once, so every array comes from the same version
+        path = current_version(path)
+        meta = read_meta(path)
+        ids, vectors, offsets, centroids = (
+            np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAYS
+        )
+        return cls(ids, vectors, offsets, centroids, meta)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Make papers newer than the snapshot searchable until the next rebuild."""
+        if not len(ids):
+            return
+        with self._delta_lock:
+            delta_ids, delta_vectors = self._delta
+            self._delta = (
+                np.concatenate([delta_ids, np.asarray(ids, dtype=np.int64)]),
+                np.concatenate([delta_vectors, normalize(vectors)]),
+            )
+
+    def search(
+        self, vec: Sequence[float] | np.ndarray, k: int, probes: int
+    ) -> list[tuple[int, float]]:
+        """Top ``k`` (paper id, cosine similarity) pairs, most similar first."""
+        query = normalize(vec)
+        delta_ids, delta_vectors = self._delta
+        id_parts = [delta_ids]
+        score_parts = [delta_vectors @ query]
+        if len(self.centroids):
+            nearest = np.argsort(-(self.centroids @ query))[: max(1, probes)]
+            for lst in nearest:
+                start, end = int(self.offsets[lst]), int(self.offsets[lst + 1])
+                id_parts.append(np.asarray(self.ids[start:end]))
+                score_parts.append(self.vectors[start:end] @ query)
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
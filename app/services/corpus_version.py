@@ -0,0 +1,26 @@
+"""Corpus version counter shared by ingestion, scoring and the API's result cache."""
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import CorpusVersion
+
+PAPERS = "papers"
+
+
+def current_corpus_version(session: Session, name: str = PAPERS) -> int:
+    version = session.execute(
+        select(CorpusVersion.version).where(CorpusVersion.name == name)
+    ).scalar_one_or_none()
+    return int(version or 0)
+
+
+def bump_corpus_version(session: Session, name: str = PAPERS) -> None:
+    """Advance the counter in the caller's transaction, so it commits with the change."""
+    statement = insert(CorpusVersion).values(name=name, version=1)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CorpusVersion.name],
+            set_={"version": CorpusVersion.version + 1, "updated_at": func.now()},
+        )
+    )
@@ -0,0 +1,128 @@
+"""Mergeable running statistics for per-domain score normalization."""
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Components tracked per domain, named as the DomainMetric ``<name>_mu`` columns
+STAT_COMPONENTS = ("novelty", "momentum", "moat", "scalability", "attention", "network")
+
+
+@dataclass
+class RunningStats:
+    """
+    Count, mean and sum of squared deviations (M2) of a set of values.
+
+    Two aggregates are combined with Chan's parallel formula, so statistics
+    of shards computed independently merge into those of the whole domain.
+    ``std`` is the population standard deviation, as ``statistics.pstdev``.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @classmethod
+    def from_values(cls, values: ArrayLike) -> RunningStats:
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return cls()
+        mu = float(values.mean())
+        return cls(int(values.size), mu, float(np.square(values - mu).sum()))
+
+    @classmethod
+    def constant(cls, value: float, count: int) -> RunningStats:
+        """Statistics of ``count`` copies of ``value``."""
+        return cls(count, float(value), 0.0) if count > 0 else cls()
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def merge(self, other: RunningStats) -> RunningStats:
+        if not other.count:
+            return RunningStats(self.count, self.mean, self.m2)
+        if not self.count:
+            return RunningStats(other.count, other.mean, other.m2)
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return RunningStats(
+            count,
+            self.mean + delta * other.count / count,
+            self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+        )
+
+    def subtract(self, other: RunningStats) -> RunningStats:
+        """Inverse of ``merge``: statistics with the values of ``other`` taken out."""
+        if not other.count:
+            return RunningStats(self.count, self.mean, self.m2)
+        count = self.count - other.count
+        if count <= 0:
+            return RunningStats()
+        mu = (self.mean * self.count - other.mean * other.count) / count
+        delta = other.mean - mu
+        m2 = self.m2 - other.m2 - delta * delta * count * other.count / self.count
+        return RunningStats(count, mu, max(0.0, m2))
+
+
+@dataclass
+class DomainStats:
+    """Running statistics of every scoring component of one domain."""
+
+    components: dict[str, RunningStats] = field(
+        default_factory=lambda: {name: RunningStats() for name in STAT_COMPONENTS}
+    )
+
+    def __getitem__(self, name: str) -> RunningStats:
+        return self.components[name]
+
+    @property
+    def count(self) -> int:
+        return max((stats.count for stats in self.components.values()), default=0)
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, ArrayLike]) -> DomainStats:
+        """Statistics of aligned per-paper value arrays keyed by component."""
+        return cls({name: RunningStats.from_values(columns[name]) for name in STAT_COMPONENTS})
+
+    def replace_columns(
+        self, old: Mapping[str, ArrayLike], new: Mapping[str, ArrayLike]
+    ) -> DomainStats:
+        """Statistics after the papers with values ``old`` were rescored to ``new``."""
+        return DomainStats(
+            {
+                name: stats.subtract(RunningStats.from_values(old[name])).merge(
+                    RunningStats.from_values(new[name])
+                )
+                for name, stats in self.components.items()
+            }
+        )
+
+    def merge(self, other: DomainStats) -> DomainStats:
+        return DomainStats(
+            {name: stats.merge(other.components[name]) for name, stats in self.components.items()}
+        )
+
+    def summary(self) -> dict[str, float]:
+        """``<component>_mu`` and ``<component>_sigma`` values, as on ``DomainMetric``."""
+        result: dict[str, float] = {}
+        for name, stats in self.components.items():
+            result[f"{name}_mu"] = stats.mean
+            result[f"{name}_sigma"] = stats.std
+        return result
+
+    def apply_to(self, metric: Any) -> None:
+        """Write count, means and deviations onto a ``DomainMetric``."""
+        metric.paper_count = self.count
+        for name, stats in self.components.items():
+            setattr(metric, f"{name}_mu", stats.mean)
+            setattr(metric, f"{name}_sigma", stats.std)
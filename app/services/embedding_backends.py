@@ -0,0 +1,130 @@
+"""Inference backends for EmbeddingService (PyTorch sentence-transformers or ONNX Runtime)."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # pragma: no cover
+    SentenceTransformer = None
+
+try:
+    import onnxruntime
+except ImportError:  # pragma: no cover
+    onnxruntime = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # pragma: no cover
+    Tokenizer = None
+
+from app.config import settings
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class EmbeddingBackend(Protocol):
+    dim: int
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Return L2-normalized float32 embeddings, one row per text."""
+        ...
+
+
+class TorchBackend:
+    """The reference sentence-transformers model on PyTorch."""
+
+    def __init__(self, model_name: str):
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension() or settings.embedding_dim
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32, copy=False)
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over the attention mask and L2-normalize, as the model's pooling."""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class OnnxBackend:
+    """
+    The same transformer exported to ONNX and run with ONNX Runtime on CPU.
+
+    ``model_dir`` holds the export written by ``scripts/export_onnx_embeddings.py``:
+    ``model.onnx``, optionally the int8 dynamically quantized
+    ``model.int8.onnx``, and the fast tokenizer's ``tokenizer.json``.
+    """
+
+    def __init__(self, model_dir: str | Path, quantized: bool = False, threads: int = 0):
+        model_dir = Path(model_dir)
+        model_file = model_dir / (ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.fspath(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.fspath(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        self.dim = int(self.session.get_outputs()[0].shape[-1] or settings.embedding_dim)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+        return mean_pool(token_embeddings, attention_mask)
+
+
+def load_backend(
+    name: str | None = None,
+    model_name: str | None = None,
+    onnx_dir: str | None = None,
+    quantized: bool | None = None,
+) -> EmbeddingBackend | None:
+    """
+    Build the backend selected by ``EMBEDDING_BACKEND`` (``torch`` or ``onnx``).
+
+    Returns None when the backend's packages are not installed, in which case
+    EmbeddingService falls back to zero vectors.
+    """
+    name = (name or settings.embedding_backend).lower()
+    if name == "onnx":
+        if onnxruntime is None or Tokenizer is None:
+            return None
+        return OnnxBackend(
+            onnx_dir or settings.embedding_onnx_dir,
+            settings.embedding_onnx_quantized if quantized is None else quantized,
+            settings.embedding_onnx_threads,
+        )
+    if name == "torch":
+        if SentenceTransformer is None:
+            return None
+        return TorchBackend(model_name or settings.embedding_model)
+    raise ValueError(f"Unknown embedding backend: {name}")
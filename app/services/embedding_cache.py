@@ -0,0 +1,113 @@
+"""Content-addressed embedding cache in front of the embedding model."""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import EmbeddingCacheEntry
+from app.metrics import EMBEDDING_CACHE_LOOKUPS
+from app.services.embeddings import EmbeddingService
+from app.utils.lru import LRUCache
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so formatting-only edits share a cache entry."""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embed texts through an in-process LRU, then the ``embedding_cache`` table.
+
+    Entries are keyed by (model key, SHA-256 of the normalized text), so a
+    model or backend change never serves stale vectors. Only texts missing from both
+    tiers reach the model, in one ``embed_many`` call; their vectors are added
+    to both tiers. The database tier is used only when a session is given.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        model: str | None = None,
+        max_entries: int | None = None,
+    ):
+        self.embedder = embedder
+        self.model = model or embedder.model_key
+        self.max_entries = (
+            settings.embedding_cache_size if max_entries is None else max_entries
+        )
+        self._lru: LRUCache[str, np.ndarray] = LRUCache(self.max_entries)
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def _get(self, key: str) -> np.ndarray | None:
+        return self._lru.get(key)
+
+    def _put(self, key: str, vector: np.ndarray) -> None:
+        self._lru.put(key, vector)
+
+    def _load(self, session: Session, keys: list[str]) -> dict[str, np.ndarray]:
+        rows = session.execute(
+            select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding).where(
+                EmbeddingCacheEntry.model == self.model,
+                EmbeddingCacheEntry.text_hash.in_(keys),
+            )
+        )
+        return {key: np.asarray(embedding, dtype=np.float32) for key, embedding in rows}
+
+    def _store(self, session: Session, vectors: dict[str, np.ndarray]) -> None:
+        session.execute(
+            insert(EmbeddingCacheEntry)
+            .values(
+                [
+                    {"model": self.model, "text_hash": key, "embedding": vector}
+                    for key, vector in vectors.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["model", "text_hash"])
+        )
+
+    def embed_many(self, texts: Sequence[str], session: Session | None = None) -> np.ndarray:
+        """Return a float32 matrix with one embedding per text, in input order."""
+        keys = [text_hash(text) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        for key in dict.fromkeys(keys):
+            cached = self._get(key)
+            if cached is not None:
+                found[key] = cached
+        EMBEDDING_CACHE_LOOKUPS.labels(tier="memory", result="hit").inc(len(found))
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and session is not None:
+            loaded = self._load(session, missing)
+            EMBEDDING_CACHE_LOOKUPS.labels(tier="database", result="hit").inc(len(loaded))
+            for key, vector in loaded.items():
+                self._put(key, vector)
+            found.update(loaded)
+            missing = [key for key in missing if key not in loaded]
+
+        if missing:
+            EMBEDDING_CACHE_LOOKUPS.labels(tier="model", result="miss").inc(len(missing))
+            texts_by_key = dict(zip(keys, texts, strict=True))
+            computed = self.embedder.embed_many([texts_by_key[key] for key in missing])
+            fresh = dict(zip(missing, computed, strict=True))
+            for key, vector in fresh.items():
+                self._put(key, vector)
+            if session is not None:
+                self._store(session, fresh)
+            found.update(fresh)
+
+        if not keys:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
@@ -0,0 +1,145 @@
+"""Micro-batching executor that embeds concurrent query texts together."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.config import settings
+from app.metrics import (
+    EMBEDDING_EXECUTOR_BATCH_SIZE,
+    EMBEDDING_EXECUTOR_QUEUE_DEPTH,
+    EMBEDDING_EXECUTOR_REJECTED,
+)
+from app.services.embeddings import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingQueueFullError(RuntimeError):
+    """The executor's queue is at capacity; the caller should shed the request."""
+
+
+class EmbeddingExecutor:
+    """
+    Coalesce concurrent ``embed`` calls into ``embed_many`` micro-batches.
+
+    Requests go into a bounded queue and are resolved through per-request
+    futures by one dedicated worker thread. The worker takes the first
+    waiting text, then keeps collecting until it holds ``max_batch_size``
+    texts or ``max_wait_ms`` has passed, so a lone request waits at most
+    ``max_wait_ms`` while bursts share one forward pass.
+    """
+
+    _instance: EmbeddingExecutor | None = None
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        max_batch_size: int | None = None,
+        max_wait_ms: float | None = None,
+        max_queue: int | None = None,
+    ):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size or settings.embedding_executor_batch_size
+        self.max_wait = (
+            settings.embedding_executor_max_wait_ms if max_wait_ms is None else max_wait_ms
+        ) / 1000.0
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=max_queue or settings.embedding_executor_queue_size
+        )
+        self._thread = threading.Thread(
+            target=self._work, name="embedding-executor", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> EmbeddingExecutor:
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = EmbeddingExecutor(EmbeddingService.get())
+        return cls._instance
+
+    @classmethod
+    def shutdown_instance(cls) -> None:
+        with cls._lock:
+            if cls._instance:
+                cls._instance.shutdown()
+                cls._instance = None
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, text: str) -> Future:
+        """Queue ``text``; the future resolves to its float32 embedding row."""
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((text, future))
+        except queue.Full:
+            EMBEDDING_EXECUTOR_REJECTED.inc()
+            raise EmbeddingQueueFullError(
+                f"Embedding queue is full ({self._queue.maxsize} pending)"
+            ) from None
+        EMBEDDING_EXECUTOR_QUEUE_DEPTH.observe(self._queue.qsize())
+        return future
+
+    def embed(self, text: str, timeout: float | None = None) -> list[float]:
+        """Embed one text through the queue, waiting at most ``timeout`` seconds."""
+        timeout = settings.embedding_executor_timeout_s if timeout is None else timeout
+        future = self.submit(text)
+        try:
+            return future.result(timeout=timeout).tolist()
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        """Stop the worker after the texts already queued are embedded."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _next_batch(self) -> tuple[list[tuple[str, Future]], bool]:
+        batch: list[tuple[str, Future]] = []
+        item = self._queue.get()
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _work(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            # Futures cancelled by callers that gave up are dropped before the model runs
+            batch = [
+                (text, future) for text, future in batch if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            EMBEDDING_EXECUTOR_BATCH_SIZE.observe(len(batch))
+            try:
+                vectors = self.embedder.embed_many([text for text, _ in batch])
+            except Exception as exc:
+                logger.exception("Embedding batch of %d failed", len(batch))
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), vector in zip(batch, np.asarray(vectors), strict=True):
+                future.set_result(vector)
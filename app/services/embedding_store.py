@@ -0,0 +1,318 @@
+"""
+Versioned paper embeddings.
+
+Vectors of ``EMBEDDING_COLUMN_MODEL`` live in ``papers.embedding``; any other
+model version is stored in ``paper_embeddings`` keyed by (paper, model), with
+its own partial HNSW index. Writers store under the configured model
+(``embedding_model_key``), readers use ``EMBEDDING_READ_MODEL``, so a new model
+can be backfilled and indexed while the API keeps serving the old one, and
+reads switch over in one setting change. Until then, ingestion embeds new
+papers under both models.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+import numpy as np
+from sqlalchemy import Select, exists, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import QueryableAttribute, Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+from app.db.models import Paper, PaperEmbedding
+from app.services.embeddings import embedding_model_key
+
+logger = logging.getLogger(__name__)
+
+
+def read_model() -> str:
+    return settings.embedding_read_model or settings.embedding_column_model
+
+
+def write_model() -> str:
+    return embedding_model_key()
+
+
+def ingest_models() -> list[str]:
+    """
+    Models new papers are embedded under: the write model and, while reads
+    still use another one, the read model too.
+
+    Papers ingested during a cutover are then searchable whichever model the
+    API reads, and need no backfill after the switch.
+    """
+    return list(dict.fromkeys([write_model(), read_model()]))
+
+
+def in_column(model: str) -> bool:
+    return model == settings.embedding_column_model
+
+
+def embedding_expr(model: str | None = None) -> ColumnElement | QueryableAttribute:
+    """A paper's vector under ``model``, usable in any query selecting from ``papers``."""
+    model = model or read_model()
+    if in_column(model):
+        return Paper.embedding
+    return (
+        select(PaperEmbedding.embedding)
+        .where(PaperEmbedding.paper_id == Paper.id, PaperEmbedding.model == model)
+        .correlate(Paper)
+        .scalar_subquery()
+    )
+
+
+def has_embedding(model: str | None = None) -> ColumnElement[bool]:
+    model = model or read_model()
+    if in_column(model):
+        return Paper.embedding.is_not(None)
+    return exists().where(PaperEmbedding.paper_id == Paper.id, PaperEmbedding.model == model)
+
+
+def load_embeddings(
+    session: Session, paper_ids: Sequence[int], model: str | None = None
+) -> dict[int, np.ndarray]:
+    model = model or read_model()
+    if not paper_ids:
+        return {}
+    query: Select
+    if in_column(model):
+        query = select(Paper.id, Paper.embedding).where(
+            Paper.id.in_(paper_ids), Paper.embedding.is_not(None)
+        )
+    else:
+        query = select(PaperEmbedding.paper_id, PaperEmbedding.embedding).where(
+            PaperEmbedding.model == model, PaperEmbedding.paper_id.in_(paper_ids)
+        )
+    return {
+        paper_id: np.asarray(vector, dtype=np.float32)
+        for paper_id, vector in session.execute(query)
+    }
+
+
+def write_embeddings(
+    session: Session,
+    paper_ids: Sequence[int],
+    matrix: np.ndarray | Sequence[np.ndarray],
+    model: str | None = None,
+) -> None:
+    """
+    Store one vector per paper under ``model`` (default: the configured write model).
+
+    Stamps ``papers.embedded_at`` or ``paper_embeddings.updated_at``, which the
+    neighbor graph job reads to find papers whose vector changed.
+    """
+    model = model or write_model()
+    if not len(paper_ids):
+        return
+    if in_column(model):
+        embedded_at = datetime.now(UTC)
+        rows = [
+            {"id": paper_id, "embedding": vector, "embedded_at": embedded_at}
+            for paper_id, vector in zip(paper_ids, matrix, strict=True)
+        ]
+        session.execute(update(Paper), rows)
+        return
+    statement = insert(PaperEmbedding).values(
+        [
+            {"paper_id": paper_id, "model": model, "embedding": vector}
+            for paper_id, vector in zip(paper_ids, matrix, strict=True)
+        ]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[PaperEmbedding.paper_id, PaperEmbedding.model],
+            set_={"embedding": statement.excluded.embedding, "updated_at": func.now()},
+        )
+    )
+
+
+def sql_literal(value: str) -> str:
+    """``value`` as a quoted SQL string, for DDL and partial-index predicates."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def index_name(model: str) -> str:
+    return f"ix_paper_embeddings_hnsw_{hashlib.sha256(model.encode()).hexdigest()[:12]}"
+
+
+def vector_sql(dim: int, alias: str = "e") -> str:
+    """
+    A model's vector in ``paper_embeddings``, cast to the model's dimension.
+
+    Queries must use this exact expression for the planner to pick the
+    partial index built by ``create_model_index``.
+    """
+    column = f"{alias}.embedding" if alias else "embedding"
+    return f"({column}::vector({int(dim)}))"
+
+
+def index_expression(column: str, dim: int, precision: str) -> str:
+    """
+    Expression an HNSW index is built on for ``precision``.
+
+    ``half`` indexes a ``halfvec`` cast (half the size) and ``binary`` the
+    ``binary_quantize`` bit string (1/32 of the size, for a coarse pass); the
+    table keeps full precision for re-ranking.
+    """
+    if precision == "half":
+        return f"(({column})::halfvec({int(dim)}))"
+    if precision == "binary":
+        return f"(binary_quantize({column})::bit({int(dim)}))"
+    if precision == "full":
+        return column
+    raise ValueError(f"Unknown vector index precision: {precision}")
+
+
+def distance_sql(column: str, dim: int, precision: str, query: str = ":vec") -> str:
+    """Distance from ``query`` that an index on ``index_expression`` can order by."""
+    expression = index_expression(column, dim, precision)
+    if precision == "half":
+        return f"{expression} <=> CAST({query} AS halfvec({int(dim)}))"
+    if precision == "binary":
+        bits = f"binary_quantize(CAST({query} AS vector({int(dim)})))::bit({int(dim)})"
+        return f"{expression} <~> {bits}"
+    return f"{expression} <=> {query}"
+
+
+OPERATOR_CLASSES = {
+    "full": "vector_cosine_ops",
+    "half": "halfvec_cosine_ops",
+    "binary": "bit_hamming_ops",
+}
+
+INDEX_PROGRESS_SQL = """
+    SELECT i.relname AS index, p.phase, p.blocks_done, p.blocks_total,
+           p.tuples_done, p.tuples_total
+    FROM pg_stat_progress_create_index p
+    LEFT JOIN pg_class i ON i.oid = p.index_relid
+    WHERE p.relid = to_regclass(:table)
+"""
+
+
+def hnsw_options(m: int | None = None, ef_construction: int | None = None) -> str:
+    """HNSW build parameters, by default ``VECTOR_HNSW_M`` and ``VECTOR_HNSW_EF_CONSTRUCTION``."""
+    m = m or settings.vector_hnsw_m
+    ef_construction = ef_construction or settings.vector_hnsw_ef_construction
+    return f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+
+
+def _progress_message(row) -> str:
+    message = f"{row.index or 'index'}, {row.phase}"
+    if row.tuples_total:
+        message += f": {row.tuples_done}/{row.tuples_total} tuples"
+        message += f" ({100 * row.tuples_done / row.tuples_total:.0f}%)"
+    elif row.blocks_total:
+        message += f": {row.blocks_done}/{row.blocks_total} blocks"
+        message += f" ({100 * row.blocks_done / row.blocks_total:.0f}%)"
+    return message
+
+
+@contextmanager
+def report_index_progress(engine: Engine, table: str, interval: float = 15.0) -> Iterator[None]:
+    """
+    Log ``pg_stat_progress_create_index`` for ``table`` while the block builds an index.
+
+    The build blocks its own connection, so progress is polled from another
+    one every ``interval`` seconds.
+    """
+    done = threading.Event()
+
+    def poll() -> None:
+        with engine.connect() as connection:
+            while not done.wait(interval):
+                for row in connection.execute(text(INDEX_PROGRESS_SQL), {"table": table}):
+                    logger.info("Building %s", _progress_message(row))
+                connection.rollback()
+
+    thread = threading.Thread(target=poll, name=f"index-progress-{table}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def create_model_index(
+    connection: Connection, model: str, dim: int, precision: str | None = None
+) -> str:
+    """
+    Build the partial HNSW index of one model version without blocking writes.
+
+    ``CREATE INDEX CONCURRENTLY`` cannot run in a transaction, so
+    ``connection`` must be in autocommit mode.
+    """
+    precision = precision or settings.vector_index_precision
+    name = index_name(model) if precision == "full" else f"{index_name(model)}_{precision}"
+    expression = index_expression(vector_sql(dim, alias=""), dim, precision)
+    connection.execute(
+        text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON paper_embeddings "
+            f"USING hnsw ({expression} {OPERATOR_CLASSES[precision]}) {hnsw_options()} "
+            f"WHERE model = {sql_literal(model)}"
+        )
+    )
+    return name
+
+
+PAPERS_INDEX_NAMES = {
+    "full": "ix_papers_embedding_hnsw",
+    "half": "ix_papers_embedding_halfvec_hnsw",
+    "binary": "ix_papers_embedding_bit_hnsw",
+}
+
+
+def create_papers_index(connection: Connection, dim: int, precision: str | None = None) -> str:
+    """
+    Build the HNSW index over ``papers.embedding`` that ``precision`` searches use.
+
+    Quantized indexes are built on ``index_expression``, so the table keeps
+    full-precision vectors for re-ranking. ``connection`` must be in
+    autocommit mode.
+    """
+    precision = precision or settings.vector_index_precision
+    name = PAPERS_INDEX_NAMES[precision]
+    expression = index_expression("embedding", dim, precision)
+    connection.execute(
+        text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON papers "
+            f"USING hnsw (({expression}) {OPERATOR_CLASSES[precision]}) {hnsw_options()}"
+        )
+    )
+    return name
+
+
+def domain_index_name(domain: str, precision: str) -> str:
+    digest = hashlib.sha256(domain.encode()).hexdigest()[:12]
+    suffix = "" if precision == "full" else f"_{precision}"
+    return f"ix_papers_embedding_hnsw_domain_{digest}{suffix}"
+
+
+def create_domain_index(
+    connection: Connection, domain: str, dim: int, precision: str | None = None
+) -> str:
+    """
+    Build an HNSW index over ``papers.embedding`` restricted to one domain.
+
+    Searches filtered to that domain (``p.domain = '<domain>'`` inlined, see
+    ``VectorFilters``) scan only its graph instead of skipping other domains'
+    neighbours. ``connection`` must be in autocommit mode.
+    """
+    precision = precision or settings.vector_index_precision
+    name = domain_index_name(domain, precision)
+    expression = index_expression("embedding", dim, precision)
+    connection.execute(
+        text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON papers "
+            f"USING hnsw (({expression}) {OPERATOR_CLASSES[precision]}) {hnsw_options()} "
+            f"WHERE domain = {sql_literal(domain)}"
+        )
+    )
+    return name
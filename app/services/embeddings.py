@@ -1,26 +1,50 @@
 from __future__ import annotations
 
 import threading
+from collections.abc import Sequence
+from typing import ClassVar
 
-try:
-    from sentence_transformers import SentenceTransformer
-except ImportError:  # pragma: no cover
-    SentenceTransformer = None  # type: ignore
+import numpy as np
 
 from app.config import settings
+from app.services.embedding_backends import EmbeddingBackend, load_backend
+
+
+def embedding_text(*pieces: str | None) -> str:
+    """Text embedded for a paper: its non-empty parts (title, abstract), one per line."""
+    return "\n".join(piece.strip() for piece in pieces if piece)
+
+
+def embedding_model_key() -> str:
+    """
+    Model name qualified by the backend variant, used to key stored vectors.
+
+    ONNX and int8 outputs differ slightly from the PyTorch reference, so
+    they are never mixed with its embeddings.
+    """
+    if settings.embedding_backend.lower() != "onnx":
+        return settings.embedding_model
+    variant = "onnx-int8" if settings.embedding_onnx_quantized else "onnx"
+    return f"{settings.embedding_model}:{variant}"
+
+
+def load_model_backend(model_key: str) -> EmbeddingBackend | None:
+    """Backend producing the vectors stored under ``model_key`` (see ``embedding_model_key``)."""
+    variant = model_key.partition(":")[2]
+    if variant in ("onnx", "onnx-int8"):
+        return load_backend("onnx", quantized=variant == "onnx-int8")
+    return load_backend("torch", model_name=model_key)
 
 
 class EmbeddingService:
     _instance: EmbeddingService | None = None
+    _models: ClassVar[dict[str, EmbeddingService]] = {}
     _lock = threading.Lock()
 
-    def __init__(self):
+    def __init__(self, backend: EmbeddingBackend | None = None, model_key: str | None = None):
         self.dim = settings.embedding_dim
-        self._model = (
-            SentenceTransformer(settings.embedding_model)
-            if SentenceTransformer
-            else None
-        )
+        self._model_key = model_key
+        self._backend = backend or (load_model_backend(model_key) if model_key else load_backend())
 
     @classmethod
     def get(cls) -> EmbeddingService:
@@ -30,8 +54,37 @@ class EmbeddingService:
                     cls._instance = EmbeddingService()
         return cls._instance
 
+    @classmethod
+    def for_model(cls, model_key: str) -> EmbeddingService:
+        """Service embedding under ``model_key``; the configured model's is ``get()``."""
+        if model_key == embedding_model_key():
+            return cls.get()
+        with cls._lock:
+            if model_key not in cls._models:
+                cls._models[model_key] = EmbeddingService(model_key=model_key)
+            return cls._models[model_key]
+
+    @property
+    def model_key(self) -> str:
+        return self._model_key or embedding_model_key()
+
     def embed(self, text: str) -> list[float]:
-        if not self._model:
-            return [0.0] * self.dim
-        vec = self._model.encode(text, normalize_embeddings=True)
-        return [float(x) for x in vec.tolist()] if hasattr(vec, "tolist") else list(vec)
+        return self.embed_many([text])[0].tolist()
+
+    def embed_many(self, texts: Sequence[str], batch_size: int | None = None) -> np.ndarray:
+        """
+        Embed many texts and return a ``(len(texts), dim)`` float32 matrix.
+
+        Texts are sorted by length and encoded ``batch_size`` at a time
+        (``EMBEDDING_BATCH_SIZE``), so each batch holds texts of similar length
+        and little compute is spent on padding. Rows keep the input order.
+        """
+        batch_size = batch_size or settings.embedding_batch_size
+        if not self._backend or not texts:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]))
+        matrix = np.empty((len(texts), self._backend.dim), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            rows = order[start : start + batch_size]
+            matrix[rows] = self._backend.encode([texts[idx] for idx in rows])
+        return matrix
@@ -0,0 +1,69 @@
+"""Full-text and vector search over papers, fused by reciprocal rank in one statement."""
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.vector_search import VectorFilters, iterative_scan_condition, nearest_sql
+
+
+def hybrid_search(
+    db: Session,
+    q: str,
+    vec: list[float],
+    k: int = 10,
+    filters: VectorFilters | None = None,
+    candidates: int | None = None,
+    rrf_k: int | None = None,
+):
+    """
+    Papers ranked by reciprocal rank fusion of a full-text and a vector query.
+
+    Each arm keeps its top ``candidates`` (``HYBRID_CANDIDATES``): the text arm
+    ranks ``tsv @@ plainto_tsquery(q)`` matches by ``ts_rank_cd`` through the
+    GIN index, the vector arm is the HNSW search of ``search_by_vector``. A
+    paper scores ``sum(1 / (rrf_k + rank))`` over the arms that returned it,
+    so either arm alone can surface it. Both arms and the fusion run as one
+    statement; rows carry ``text_rank`` and ``vector_rank`` (None when an arm
+    missed the paper) to show where a result came from.
+    """
+    filters = filters or VectorFilters()
+    candidates = candidates or settings.hybrid_candidates
+    params: dict = {
+        "q": q,
+        "vec": vec,
+        "k": k,
+        "rrf_k": settings.hybrid_rrf_k if rrf_k is None else rrf_k,
+    }
+    vector_arm = nearest_sql(params, candidates, limit_param="arm_limit", filters=filters)
+    text_where = " AND ".join(["p.tsv @@ query", *filters.clauses(params)])
+    # Filtered vector scans need iterative scans, set by the statement itself
+    vector_where = iterative_scan_condition(params) if filters else "TRUE"
+    sql = f"""
+        WITH text_hits AS (
+            SELECT p.id, ts_rank_cd(p.tsv, query) AS text_score,
+                   row_number() OVER (ORDER BY ts_rank_cd(p.tsv, query) DESC, p.id) AS rank
+            FROM papers p, plainto_tsquery('english', :q) query
+            WHERE {text_where}
+            ORDER BY text_score DESC, p.id
+            LIMIT :arm_limit
+        ),
+        vector_hits AS (
+            SELECT id, similarity,
+                   row_number() OVER (ORDER BY similarity DESC, id) AS rank
+            FROM ({vector_arm}) nearest
+            WHERE {vector_where}
+        )
+        SELECT p.id, p.title,
+               COALESCE(1.0 / (:rrf_k + t.rank), 0)
+                 + COALESCE(1.0 / (:rrf_k + v.rank), 0) AS score,
+               t.rank AS text_rank, v.rank AS vector_rank,
+               t.text_score, v.similarity
+        FROM text_hits t
+        FULL OUTER JOIN vector_hits v ON v.id = t.id
+        JOIN papers p ON p.id = COALESCE(t.id, v.id)
+        ORDER BY score DESC, p.id
+        LIMIT :k
+    """
+    return db.execute(text(sql), params).mappings().all()
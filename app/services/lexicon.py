@@ -0,0 +1,130 @@
+"""Compiled keyword matcher for the scoring lexicons."""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+LEXICON_PATH = Path(__file__).parent.parent.parent / "config" / "scoring_lexicons.yaml"
+
+# section -> category -> matched keywords (in lexicon order)
+LexiconMatches = dict[str, dict[str, list[str]]]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _boundary_inside(keyword: str, pos: int) -> bool:
+    """Whether ``\\b`` holds between ``keyword[pos - 1]`` and ``keyword[pos]``."""
+    return _is_word_char(keyword[pos - 1]) != _is_word_char(keyword[pos])
+
+
+class LexiconMatcher:
+    """
+    Match every lexicon keyword against a text in a single regex scan.
+
+    All keywords from all sections are compiled into one word-boundary
+    alternation (longest first) wrapped in a lookahead, so ``finditer`` reports
+    the longest keyword starting at each position. Shorter keywords that start
+    at the same position (``cmos`` inside ``cmos compatible``) are implied by
+    the longer match and resolved from a precomputed table, which keeps the
+    results identical to running one ``\\b<keyword>\\b`` search per keyword.
+
+    The YAML file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, path: Path | str = LEXICON_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._lexicons: dict[str, Any] = {}
+        self._pattern: re.Pattern[str] | None = None
+        self._implied: dict[str, tuple[str, ...]] = {}
+
+    @property
+    def lexicons(self) -> dict[str, Any]:
+        self._refresh()
+        return self._lexicons
+
+    def _refresh(self) -> None:
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path) as f:
+                lexicons = yaml.safe_load(f) or {}
+            self._compile(lexicons)
+            self._lexicons = lexicons
+            self._mtime = mtime
+
+    def _compile(self, lexicons: dict[str, Any]) -> None:
+        keywords = {
+            keyword.lower()
+            for section in lexicons.values()
+            if isinstance(section, dict)
+            for category in section.values()
+            for keyword in category or []
+        }
+        ordered = sorted(keywords, key=lambda kw: (-len(kw), kw))
+        self._implied = {
+            keyword: tuple(
+                other
+                for other in keywords
+                if len(other) < len(keyword)
+                and keyword.startswith(other)
+                and _boundary_inside(keyword, len(other))
+            )
+            for keyword in ordered
+        }
+        if ordered:
+            alternation = "|".join(re.escape(keyword) for keyword in ordered)
+            self._pattern = re.compile(r"(?=\b(" + alternation + r")\b)")
+        else:
+            self._pattern = None
+
+    def find(self, text: str) -> set[str]:
+        """Return the set of lowercased keywords present in ``text``."""
+        self._refresh()
+        pattern = self._pattern
+        if pattern is None or not text:
+            return set()
+        found: set[str] = set()
+        for match in pattern.finditer(text.lower()):
+            keyword = match.group(1)
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self._implied[keyword])
+        return found
+
+    def match(self, text: str) -> LexiconMatches:
+        """Return matched keywords for every section and category of the lexicon."""
+        found = self.find(text)
+        return {
+            section_name: {
+                category: [kw for kw in keywords or [] if kw.lower() in found]
+                for category, keywords in section.items()
+            }
+            for section_name, section in self._lexicons.items()
+            if isinstance(section, dict)
+        }
+
+
+_matcher: LexiconMatcher | None = None
+_matcher_lock = threading.Lock()
+
+
+def get_lexicon_matcher() -> LexiconMatcher:
+    """Return the process-wide matcher for ``config/scoring_lexicons.yaml``."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = LexiconMatcher()
+    return _matcher
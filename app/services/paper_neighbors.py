@@ -0,0 +1,36 @@
+"""
+Reads of the precomputed paper neighbor graph.
+
+``app.workers.paper_neighbors`` keeps each paper's ``NEIGHBORS_K`` most similar
+papers under the read model in ``paper_neighbors``. Related-paper lookups
+read it here instead of searching the vector index once per paper.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Paper, PaperNeighbor
+from app.services.embedding_store import read_model
+
+
+def related_papers(session: Session, paper_id: int, k: int) -> list[dict] | None:
+    """
+    The ``k`` papers most similar to ``paper_id`` from the graph, by primary key.
+
+    Returns None when the graph holds fewer than ``k`` neighbors for the
+    paper (not built yet, a new paper, or ``k`` above ``NEIGHBORS_K``), so
+    the caller can fall back to an index search.
+    """
+    rows = session.execute(
+        select(Paper.id, Paper.title, PaperNeighbor.similarity)
+        .join(Paper, Paper.id == PaperNeighbor.neighbor_id)
+        .where(PaperNeighbor.paper_id == paper_id, PaperNeighbor.model == read_model())
+        .order_by(PaperNeighbor.rank)
+        .limit(k)
+    ).all()
+    if len(rows) < k:
+        return None
+    return [
+        {"id": row.id, "title": row.title, "similarity": float(row.similarity)} for row in rows
+    ]
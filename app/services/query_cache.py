@@ -0,0 +1,138 @@
+"""Two-level cache for /papers/near: query embeddings, then search results."""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import QUERY_CACHE_LOOKUPS
+from app.services.corpus_version import current_corpus_version
+from app.services.embedding_cache import text_hash
+from app.utils.lru import LRUCache
+
+ResultKey = tuple[str, int, tuple[tuple[str, Any], ...]]
+
+
+def vector_hash(vec: ArrayLike) -> str:
+    return hashlib.sha256(np.asarray(vec, dtype=np.float32).tobytes()).hexdigest()
+
+
+class QueryCache:
+    """
+    Level one maps normalized query text to its embedding in a bounded LRU.
+    Level two maps (vector hash, k, filters) to the result list, with a TTL.
+
+    Results are also dropped as a whole when the corpus version advanced by
+    ingestion and scoring moves on. The version is read from the database at
+    most every ``version_poll`` seconds, so a request rarely pays for it; the
+    TTL bounds staleness in between. A size of 0 disables a level.
+    """
+
+    _instance: QueryCache | None = None
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        embedding_entries: int | None = None,
+        result_entries: int | None = None,
+        ttl: float | None = None,
+        version_poll: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embeddings: LRUCache[str, list[float]] = LRUCache(
+            settings.query_cache_size if embedding_entries is None else embedding_entries
+        )
+        self.results: LRUCache[ResultKey, list[dict]] = LRUCache(
+            settings.query_result_cache_size if result_entries is None else result_entries,
+            ttl=settings.query_result_cache_ttl_s if ttl is None else ttl,
+            clock=clock,
+        )
+        self.version_poll = (
+            settings.query_cache_version_poll_s if version_poll is None else version_poll
+        )
+        self._clock = clock
+        self._version: int | None = None
+        self._checked_at: float | None = None
+        self._version_lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> QueryCache:
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = QueryCache()
+        return cls._instance
+
+    def embedding(self, text: str, embed: Callable[[str], list[float]]) -> list[float]:
+        key = text_hash(text)
+        vec = self.embeddings.get(key)
+        if vec is not None:
+            QUERY_CACHE_LOOKUPS.labels(level="embedding", result="hit").inc()
+            return vec
+        QUERY_CACHE_LOOKUPS.labels(level="embedding", result="miss").inc()
+        vec = embed(text)
+        self.embeddings.put(key, vec)
+        return vec
+
+    def embeddings_for(
+        self, texts: Sequence[str], embed_many: Callable[[list[str]], ArrayLike]
+    ) -> list[list[float]]:
+        """Embeddings of ``texts``; the uncached ones are embedded in one ``embed_many`` call."""
+        keys = [text_hash(text) for text in texts]
+        vectors = [self.embeddings.get(key) for key in keys]
+        missing = [idx for idx, vec in enumerate(vectors) if vec is None]
+        QUERY_CACHE_LOOKUPS.labels(level="embedding", result="hit").inc(len(texts) - len(missing))
+        if missing:
+            QUERY_CACHE_LOOKUPS.labels(level="embedding", result="miss").inc(len(missing))
+            matrix = np.asarray(embed_many([texts[idx] for idx in missing]))
+            for idx, row in zip(missing, matrix, strict=True):
+                vector = row.tolist()
+                vectors[idx] = vector
+                self.embeddings.put(keys[idx], vector)
+        return vectors  # type: ignore[return-value]
+
+    def sync_version(self, session: Session) -> None:
+        """Clear cached results if the corpus version changed since the last poll."""
+        now = self._clock()
+        with self._version_lock:
+            if self._checked_at is not None and now - self._checked_at < self.version_poll:
+                return
+            self._checked_at = now
+        version = current_corpus_version(session)
+        with self._version_lock:
+            if version != self._version:
+                self.results.clear()
+                self._version = version
+
+    def search(
+        self,
+        session: Session,
+        vec: ArrayLike,
+        k: int,
+        filters: Mapping[str, Any],
+        run: Callable[[], list[dict]],
+    ) -> list[dict]:
+        """Cached results of ``run`` for this vector, ``k`` and filter set."""
+        if self.results.max_entries <= 0:
+            return run()
+        self.sync_version(session)
+        key: ResultKey = (
+            vector_hash(vec),
+            k,
+            tuple(sorted((name, value) for name, value in filters.items() if value is not None)),
+        )
+        results = self.results.get(key)
+        if results is not None:
+            QUERY_CACHE_LOOKUPS.labels(level="results", result="hit").inc()
+            return results
+        QUERY_CACHE_LOOKUPS.labels(level="results", result="miss").inc()
+        results = run()
+        self.results.put(key, results)
+        return results
@@ -0,0 +1,116 @@
+"""Columnar per-domain score frame used by the scoring job."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from app.services.domain_stats import DomainStats
+
+# Per-paper columns held by a frame
+SCORE_COLUMNS = (
+    "novelty",
+    "momentum",
+    "moat",
+    "scalability",
+    "network",
+    "attention_raw",
+    "attention_gap",
+    "composite",
+)
+
+# DomainMetric statistic prefix for each aggregated column
+METRIC_COLUMNS = {
+    "novelty": "novelty",
+    "momentum": "momentum",
+    "moat": "moat",
+    "scalability": "scalability",
+    "network": "network",
+    "attention_raw": "attention",
+}
+
+
+@dataclass
+class ScoreFrame:
+    """
+    Array-backed component scores of one domain, keyed by paper id.
+
+    ``ids`` are kept sorted so a paper's row is found with a binary search
+    rather than a list scan, and each column is a float64 array aligned with
+    ``ids``. Frames built per chunk or per shard are concatenated in id order.
+    """
+
+    domain: str
+    ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.ids = np.asarray(self.ids, dtype=np.int64)
+        for name in SCORE_COLUMNS:
+            values = self.columns.get(name)
+            self.columns[name] = (
+                np.zeros(len(self.ids))
+                if values is None
+                else np.asarray(values, dtype=np.float64)
+            )
+        if len(self.ids) > 1 and np.any(np.diff(self.ids) <= 0):
+            raise ValueError("ScoreFrame ids must be unique and increasing")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @classmethod
+    def concat(cls, domain: str, frames: Iterable[ScoreFrame]) -> ScoreFrame:
+        """Join frames whose id ranges follow one another."""
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return cls(domain)
+        return cls(
+            domain,
+            np.concatenate([frame.ids for frame in frames]),
+            {
+                name: np.concatenate([frame.columns[name] for frame in frames])
+                for name in SCORE_COLUMNS
+            },
+        )
+
+    def contains(self, paper_ids: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Boolean mask of which ``paper_ids`` have a row in the frame."""
+        wanted = np.asarray(paper_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids, wanted)
+        found = rows < len(self.ids)
+        found[found] = self.ids[rows[found]] == wanted[found]
+        return found
+
+    def rows(self, paper_ids: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Row positions of ``paper_ids``; raises ``KeyError`` for unknown ids."""
+        wanted = np.asarray(paper_ids, dtype=np.int64)
+        found = self.contains(wanted)
+        if not found.all():
+            raise KeyError(wanted[~found].tolist())
+        return np.searchsorted(self.ids, wanted)
+
+    def get(self, name: str, paper_ids: Sequence[int] | np.ndarray) -> np.ndarray:
+        return self.columns[name][self.rows(paper_ids)]
+
+    def assign(self, paper_ids: Sequence[int] | np.ndarray, **values: ArrayLike) -> None:
+        """Overwrite columns for ``paper_ids`` in place."""
+        rows = self.rows(paper_ids)
+        for name, column in values.items():
+            self.columns[name][rows] = column
+
+    def stats(self) -> DomainStats:
+        """Running statistics of the aggregated columns, named as on ``DomainMetric``."""
+        return DomainStats.from_columns(
+            {prefix: self.columns[column] for column, prefix in METRIC_COLUMNS.items()}
+        )
+
+    def stat_columns(self, paper_ids: Sequence[int] | np.ndarray) -> dict[str, np.ndarray]:
+        """Aggregated column values of ``paper_ids``, keyed by statistic name."""
+        rows = self.rows(paper_ids)
+        return {prefix: self.columns[column][rows] for column, prefix in METRIC_COLUMNS.items()}
@@ -1,192 +1,292 @@
 """Scoring functions for moat and scalability analysis."""
+import hashlib
 import math
-import re
-from pathlib import Path
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from statistics import mean, pstdev
 from typing import Any
 
-import yaml
+import numpy as np
+from numpy.typing import ArrayLike
+
+from app.services.domain_stats import RunningStats
+from app.services.lexicon import LexiconMatches, get_lexicon_matcher
 
 
 def load_lexicons() -> dict[str, Any]:
-    """Load scoring lexicons from YAML configuration."""
-    config_path = Path(__file__).parent.parent.parent / "config" / "scoring_lexicons.yaml"
-    with open(config_path) as f:
-        return yaml.safe_load(f)
+    """Load scoring lexicons from YAML configuration (cached until the file changes)."""
+    return get_lexicon_matcher().lexicons
 
 
-def calculate_moat_score(title: str, abstract: str | None, keywords: list[str] | None) -> tuple[float, dict]:
-    """
-    Calculate moat score based on barriers to replication.
-    
-    Returns:
-        Tuple of (score, evidence) where score is in [0, 1] and evidence contains details
-    """
-    lexicons = load_lexicons()
-    moat_barriers = lexicons.get("moat_barriers", {})
-    
-    # Combine all text for analysis
+def _scoring_text(title: str, abstract: str | None, keywords: list[str] | None) -> str:
     text = (title or "").lower()
     if abstract:
         text += " " + abstract.lower()
     if keywords:
         text += " " + " ".join(keywords).lower()
-    
-    # Count barrier types detected
-    evidence = {
-        "equipment_barriers": [],
-        "process_barriers": [],
-        "material_barriers": [],
-        "compute_barriers": [],
-        "openness_signals": [],
-    }
-    
-    total_barriers = 0
-    
-    # Equipment barriers
-    for keyword in moat_barriers.get("equipment", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["equipment_barriers"].append(keyword)
-            total_barriers += 1
-    
-    # Process barriers
-    for keyword in moat_barriers.get("process", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["process_barriers"].append(keyword)
-            total_barriers += 1
-    
-    # Material barriers
-    for keyword in moat_barriers.get("materials", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["material_barriers"].append(keyword)
-            total_barriers += 1
-    
-    # Compute barriers
-    for keyword in moat_barriers.get("compute", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["compute_barriers"].append(keyword)
-            total_barriers += 1
-    
-    # Openness signals (reduce moat)
-    openness_count = 0
-    for keyword in moat_barriers.get("openness", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["openness_signals"].append(keyword)
-            openness_count += 1
-    
-    # Calculate raw score
-    # More barriers = higher moat score
-    # Cap at reasonable thresholds
-    barrier_score = min(1.0, total_barriers / 5.0)  # 5+ barriers = max score
-    
-    # Penalize for openness (open source reduces moat)
-    openness_penalty = min(0.3, openness_count * 0.1)  # Max 30% penalty
-    
-    score = max(0.0, barrier_score - openness_penalty)
-    
-    evidence["total_barriers"] = total_barriers
-    evidence["openness_count"] = openness_count
-    evidence["raw_barrier_score"] = barrier_score
-    evidence["openness_penalty"] = openness_penalty
-    
-    return score, evidence
-
-
-def calculate_scalability_score(title: str, abstract: str | None, keywords: list[str] | None) -> tuple[float, dict]:
+    return text
+
+
+def content_hash(title: str, abstract: str | None, keywords: list[str] | None) -> str:
+    """
+    Hash the text fields that feed scoring.
+
+    Used by incremental scoring to detect papers whose title, abstract or
+    keywords changed since they were last scored.
+    """
+    payload = "\x1f".join([title or "", abstract or "", "\x1e".join(keywords or [])])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def match_lexicons(
+    title: str, abstract: str | None, keywords: list[str] | None
+) -> LexiconMatches:
+    """
+    Match all lexicon categories against a paper's text in one pass.
+
+    The result can be passed to both ``calculate_moat_score`` and
+    ``calculate_scalability_score`` so the text is only scanned once.
+    """
+    return get_lexicon_matcher().match(_scoring_text(title, abstract, keywords))
+
+
+COMPOSITE_WEIGHTS = {
+    "novelty": 0.25,
+    "momentum": 0.15,
+    "attention_gap": 0.20,
+    "moat": 0.20,
+    "scalability": 0.15,
+    "network": 0.05,
+}
+SYNERGY_THRESHOLD = 0.7
+
+
+def calculate_moat_scores(
+    matches: Sequence[LexiconMatches],
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Calculate moat scores for many papers from their lexicon matches.
+
+    Returns:
+        Tuple of (scores, evidence) where scores is a float64 array aligned with ``matches``
+    """
+    evidences: list[dict] = []
+    for paper_matches in matches:
+        moat_barriers = paper_matches.get("moat_barriers", {})
+        evidences.append(
+            {
+                "equipment_barriers": list(moat_barriers.get("equipment", [])),
+                "process_barriers": list(moat_barriers.get("process", [])),
+                "material_barriers": list(moat_barriers.get("materials", [])),
+                "compute_barriers": list(moat_barriers.get("compute", [])),
+                "openness_signals": list(moat_barriers.get("openness", [])),
+            }
+        )
+
+    total_barriers = np.array(
+        [
+            len(ev["equipment_barriers"])
+            + len(ev["process_barriers"])
+            + len(ev["material_barriers"])
+            + len(ev["compute_barriers"])
+            for ev in evidences
+        ],
+        dtype=np.int64,
+    )
+    openness_count = np.array([len(ev["openness_signals"]) for ev in evidences], dtype=np.int64)
+
+    # More barriers = higher moat score, 5+ barriers = max score
+    barrier_score = np.minimum(1.0, total_barriers / 5.0)
+    # Penalize for openness (open source reduces moat), max 30% penalty
+    openness_penalty = np.minimum(0.3, openness_count * 0.1)
+    scores = np.maximum(0.0, barrier_score - openness_penalty)
+
+    for idx, evidence in enumerate(evidences):
+        evidence["total_barriers"] = int(total_barriers[idx])
+        evidence["openness_count"] = int(openness_count[idx])
+        evidence["raw_barrier_score"] = float(barrier_score[idx])
+        evidence["openness_penalty"] = float(openness_penalty[idx])
+
+    return scores, evidences
+
+
+def calculate_moat_score(
+    title: str,
+    abstract: str | None,
+    keywords: list[str] | None,
+    matches: LexiconMatches | None = None,
+) -> tuple[float, dict]:
+    """
+    Calculate moat score based on barriers to replication.
+
+    Args:
+        matches: Optional precomputed result of ``match_lexicons`` for this paper
+
+    Returns:
+        Tuple of (score, evidence) where score is in [0, 1] and evidence contains details
+    """
+    if matches is None:
+        matches = match_lexicons(title, abstract, keywords)
+    scores, evidences = calculate_moat_scores([matches])
+    return float(scores[0]), evidences[0]
+
+
+def calculate_scalability_scores(
+    matches: Sequence[LexiconMatches],
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Calculate scalability scores for many papers from their lexicon matches.
+
+    Returns:
+        Tuple of (scores, evidence) where scores is a float64 array aligned with ``matches``
+    """
+    evidences: list[dict] = []
+    for paper_matches in matches:
+        scalability_signals = paper_matches.get("scalability_signals", {})
+        evidences.append(
+            {
+                "manufacturing_signals": list(scalability_signals.get("manufacturing", [])),
+                "economic_signals": list(scalability_signals.get("economic", [])),
+                "maturity_signals": list(scalability_signals.get("maturity", [])),
+                "blocker_signals": list(scalability_signals.get("blockers", [])),
+            }
+        )
+
+    positive_signals = np.array(
+        [
+            len(ev["manufacturing_signals"])
+            + len(ev["economic_signals"])
+            + len(ev["maturity_signals"])
+            for ev in evidences
+        ],
+        dtype=np.int64,
+    )
+    blocker_count = np.array([len(ev["blocker_signals"]) for ev in evidences], dtype=np.int64)
+
+    # More positive signals = higher scalability, 5+ signals = max score
+    positive_score = np.minimum(1.0, positive_signals / 5.0)
+    # Penalize for blockers, max 40% penalty
+    blocker_penalty = np.minimum(0.4, blocker_count * 0.15)
+    scores = np.maximum(0.0, positive_score - blocker_penalty)
+
+    for idx, evidence in enumerate(evidences):
+        evidence["positive_signals"] = int(positive_signals[idx])
+        evidence["blocker_count"] = int(blocker_count[idx])
+        evidence["raw_positive_score"] = float(positive_score[idx])
+        evidence["blocker_penalty"] = float(blocker_penalty[idx])
+
+    return scores, evidences
+
+
+def calculate_scalability_score(
+    title: str,
+    abstract: str | None,
+    keywords: list[str] | None,
+    matches: LexiconMatches | None = None,
+) -> tuple[float, dict]:
     """
     Calculate scalability score based on manufacturing readiness.
-    
+
+    Args:
+        matches: Optional precomputed result of ``match_lexicons`` for this paper
+
     Returns:
         Tuple of (score, evidence) where score is in [0, 1] and evidence contains details
     """
-    lexicons = load_lexicons()
-    scalability_signals = lexicons.get("scalability_signals", {})
-    
-    # Combine all text for analysis
-    text = (title or "").lower()
-    if abstract:
-        text += " " + abstract.lower()
-    if keywords:
-        text += " " + " ".join(keywords).lower()
-    
-    # Count signal types detected
-    evidence = {
-        "manufacturing_signals": [],
-        "economic_signals": [],
-        "maturity_signals": [],
-        "blocker_signals": [],
-    }
-    
-    positive_signals = 0
-    
-    # Manufacturing signals
-    for keyword in scalability_signals.get("manufacturing", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["manufacturing_signals"].append(keyword)
-            positive_signals += 1
-    
-    # Economic signals
-    for keyword in scalability_signals.get("economic", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["economic_signals"].append(keyword)
-            positive_signals += 1
-    
-    # Maturity signals
-    for keyword in scalability_signals.get("maturity", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["maturity_signals"].append(keyword)
-            positive_signals += 1
-    
-    # Blocker signals (reduce scalability)
-    blocker_count = 0
-    for keyword in scalability_signals.get("blockers", []):
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text):
-            evidence["blocker_signals"].append(keyword)
-            blocker_count += 1
-    
-    # Calculate raw score
-    # More positive signals = higher scalability
-    positive_score = min(1.0, positive_signals / 5.0)  # 5+ signals = max score
-    
-    # Penalize for blockers
-    blocker_penalty = min(0.4, blocker_count * 0.15)  # Max 40% penalty
-    
-    score = max(0.0, positive_score - blocker_penalty)
-    
-    evidence["positive_signals"] = positive_signals
-    evidence["blocker_count"] = blocker_count
-    evidence["raw_positive_score"] = positive_score
-    evidence["blocker_penalty"] = blocker_penalty
-    
-    return score, evidence
+    if matches is None:
+        matches = match_lexicons(title, abstract, keywords)
+    scores, evidences = calculate_scalability_scores([matches])
+    return float(scores[0]), evidences[0]
+
+
+def normalize_scores_zscore(
+    scores: ArrayLike, domain_mean: float, domain_std: float, clip_std: float = 3.0
+) -> np.ndarray:
+    """
+    Normalize an array of scores using z-score normalization with clipping.
+
+    See ``normalize_score_zscore`` for the mapping; returns a float64 array.
+    """
+    values = np.asarray(scores, dtype=np.float64)
+    if domain_std == 0:
+        return np.full(values.shape, 0.5)  # If no variance, return neutral score
+
+    # Clip z-scores to prevent extreme values, then map [-clip_std, +clip_std] to [0, 1]
+    z_scores = np.clip((values - domain_mean) / domain_std, -clip_std, clip_std)
+    normalized = (z_scores + clip_std) / (2 * clip_std)
+
+    return np.clip(normalized, 0.0, 1.0)
 
 
 def normalize_score_zscore(score: float, domain_mean: float, domain_std: float, clip_std: float = 3.0) -> float:
     """
     Normalize a score using z-score normalization with clipping.
-    
+
     Args:
         score: Raw score to normalize
         domain_mean: Mean score in the domain
         domain_std: Standard deviation in the domain
         clip_std: Number of standard deviations to clip at (default 3.0)
-    
+
     Returns:
         Normalized score in approximately [0, 1] range
     """
-    if domain_std == 0:
-        return 0.5  # If no variance, return neutral score
-    
-    # Calculate z-score
-    z_score = (score - domain_mean) / domain_std
-    
-    # Clip to prevent extreme values
-    z_score = max(-clip_std, min(clip_std, z_score))
-    
-    # Map to [0, 1] range
-    # z-score range [-clip_std, +clip_std] maps to [0, 1]
-    normalized = (z_score + clip_std) / (2 * clip_std)
-    
-    return max(0.0, min(1.0, normalized))
+    return float(normalize_scores_zscore([score], domain_mean, domain_std, clip_std)[0])
+
+
+def calculate_attention_gap_scores(
+    moat_scores: ArrayLike,
+    scalability_scores: ArrayLike,
+    repo_stars: ArrayLike,
+    link_counts: ArrayLike,
+    domain_mean_stars: float | None = None,
+    domain_std_stars: float | None = None,
+    attention_stats: RunningStats | None = None,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Calculate attention gap scores for many papers in one domain.
+
+    The domain attention statistics come from ``attention_stats`` (the live
+    running aggregate) when given, otherwise from ``domain_mean_stars`` and
+    ``domain_std_stars``.
+
+    Returns:
+        Tuple of (scores, columns) where columns holds the per-paper evidence arrays
+        (technical_quality, attention_raw, attention_normalized, gap)
+    """
+    moat = np.asarray(moat_scores, dtype=np.float64)
+    scalability = np.asarray(scalability_scores, dtype=np.float64)
+    stars = np.asarray(repo_stars)
+    links = np.asarray(link_counts)
+    if attention_stats is not None:
+        domain_mean_stars, domain_std_stars = attention_stats.mean, attention_stats.std
+    elif domain_mean_stars is None or domain_std_stars is None:
+        raise ValueError("attention statistics are required")
+
+    # Technical quality proxy (average of moat and scalability)
+    technical_quality = (moat + scalability) / 2.0
+
+    # Attention proxy: each link is worth 10 "stars"
+    attention_raw = stars + (links * 10)
+
+    # Normalize attention using domain statistics
+    if domain_std_stars > 0:
+        attention_normalized = normalize_scores_zscore(
+            attention_raw, domain_mean_stars, domain_std_stars, clip_std=3.0
+        )
+    else:
+        attention_normalized = np.full(technical_quality.shape, 0.5)
+
+    # Gap score: high quality + low attention = high gap
+    gap = (1.0 - attention_normalized) * technical_quality
+
+    columns = {
+        "technical_quality": technical_quality,
+        "attention_raw": attention_raw,
+        "attention_normalized": attention_normalized,
+        "gap": gap,
+    }
+    return np.clip(gap, 0.0, 1.0), columns
 
 
 def calculate_attention_gap_score(
@@ -194,12 +294,13 @@ def calculate_attention_gap_score(
     scalability_score: float,
     repo_stars: int,
     link_count: int,
-    domain_mean_stars: float,
-    domain_std_stars: float,
+    domain_mean_stars: float | None = None,
+    domain_std_stars: float | None = None,
+    attention_stats: RunningStats | None = None,
 ) -> tuple[float, dict]:
     """
     Calculate attention gap score (quality vs attention mismatch).
-    
+
     Args:
         moat_score: Moat score of the paper
         scalability_score: Scalability score of the paper
@@ -207,38 +308,81 @@ def calculate_attention_gap_score(
         link_count: Number of paper-repo links
         domain_mean_stars: Mean stars in domain
         domain_std_stars: Standard deviation of stars in domain
-    
+        attention_stats: Running domain attention statistics; overrides the mean and std
+
     Returns:
         Tuple of (score, evidence) where score is in [0, 1]
     """
-    # Technical quality proxy (average of moat and scalability)
-    technical_quality = (moat_score + scalability_score) / 2.0
-    
-    # Attention proxy (normalized repo stars + link count boost)
-    attention_raw = repo_stars + (link_count * 10)  # Each link worth 10 "stars"
-    
-    # Normalize attention using domain statistics
-    if domain_std_stars > 0:
-        attention_normalized = normalize_score_zscore(
-            attention_raw, domain_mean_stars, domain_std_stars, clip_std=3.0
-        )
-    else:
-        attention_normalized = 0.5
-    
-    # Gap score: high quality + low attention = high gap
-    # Weighted by quality (we only care about gap if quality is high)
-    gap = (1.0 - attention_normalized) * technical_quality
-    
+    scores, columns = calculate_attention_gap_scores(
+        [moat_score],
+        [scalability_score],
+        [repo_stars],
+        [link_count],
+        domain_mean_stars,
+        domain_std_stars,
+        attention_stats,
+    )
     evidence = {
-        "technical_quality": technical_quality,
+        "technical_quality": float(columns["technical_quality"][0]),
         "repo_stars": repo_stars,
         "link_count": link_count,
-        "attention_raw": attention_raw,
-        "attention_normalized": attention_normalized,
-        "gap": gap,
+        "attention_raw": columns["attention_raw"][0].item(),
+        "attention_normalized": float(columns["attention_normalized"][0]),
+        "gap": float(columns["gap"][0]),
     }
-    
-    return max(0.0, min(1.0, gap)), evidence
+    return float(scores[0]), evidence
+
+
+def calculate_network_scores(
+    authors: Sequence[list[str] | None],
+    coauthor_counts: dict[str, int] | None = None,
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Calculate network scores for many papers.
+
+    Returns:
+        Tuple of (scores, evidence) where scores is a float64 array aligned with ``authors``
+    """
+    author_counts = np.array([len(names) if names else 0 for names in authors], dtype=np.int64)
+
+    # Simple centrality proxy: number of coauthors per author
+    # If coauthor_counts not provided, use author count as proxy
+    avg_centrality: list[float | int] = []
+    if coauthor_counts:
+        normalized_centrality = np.zeros(len(author_counts))
+        for idx, names in enumerate(authors):
+            if not names:
+                avg_centrality.append(0.0)
+                continue
+            centralities = [coauthor_counts.get(author, 1) for author in names]
+            avg = sum(centralities) / len(centralities)
+            avg_centrality.append(avg)
+            # Normalize: log scale (researchers with 100+ coauthors are very connected)
+            normalized_centrality[idx] = math.log1p(avg) / math.log1p(100)
+    else:
+        # Fallback: more authors = more connected, 10+ authors = max
+        normalized_centrality = np.minimum(1.0, author_counts / 10.0)
+        avg_centrality = [int(count) if count else 0.0 for count in author_counts]
+
+    # Cross-domain bonus: if authors > 5, assume cross-domain collaboration
+    cross_domain_bonus = np.where(author_counts > 5, 0.1, 0.0)
+
+    scores = np.clip(np.minimum(1.0, normalized_centrality + cross_domain_bonus), 0.0, 1.0)
+    scores[author_counts == 0] = 0.0
+
+    evidences: list[dict] = []
+    for idx, count in enumerate(author_counts):
+        if not count:
+            evidences.append({"author_count": 0, "avg_centrality": 0.0})
+            continue
+        evidences.append(
+            {
+                "author_count": int(count),
+                "avg_centrality": avg_centrality[idx],
+                "cross_domain_bonus": float(cross_domain_bonus[idx]),
+            }
+        )
+    return scores, evidences
 
 
 def calculate_network_score(
@@ -247,42 +391,72 @@ def calculate_network_score(
 ) -> tuple[float, dict]:
     """
     Calculate network score based on author collaboration patterns.
-    
+
     Args:
         authors: List of author names for this paper
         coauthor_counts: Optional dict mapping authors to their total coauthor counts
-    
+
     Returns:
         Tuple of (score, evidence) where score is in [0, 1]
     """
-    if not authors or len(authors) == 0:
-        return 0.0, {"author_count": 0, "avg_centrality": 0.0}
-    
-    # Simple centrality proxy: number of coauthors per author
-    # If coauthor_counts not provided, use author count as proxy
-    if coauthor_counts:
-        centralities = [coauthor_counts.get(author, 1) for author in authors]
-        avg_centrality = sum(centralities) / len(centralities)
-        # Normalize: log scale (researchers with 100+ coauthors are very connected)
-        normalized_centrality = math.log1p(avg_centrality) / math.log1p(100)
-    else:
-        # Fallback: more authors = more connected (simple proxy)
-        author_count = len(authors)
-        normalized_centrality = min(1.0, author_count / 10.0)  # 10+ authors = max
-        avg_centrality = author_count
-    
-    # Cross-domain bonus: if authors > 5, assume cross-domain collaboration
-    cross_domain_bonus = 0.1 if len(authors) > 5 else 0.0
-    
-    score = min(1.0, normalized_centrality + cross_domain_bonus)
-    
-    evidence = {
-        "author_count": len(authors),
-        "avg_centrality": avg_centrality,
-        "cross_domain_bonus": cross_domain_bonus,
+    scores, evidences = calculate_network_scores([authors], coauthor_counts)
+    return float(scores[0]), evidences[0]
+
+
+def calculate_composite_scores(
+    novelty: ArrayLike,
+    momentum: ArrayLike,
+    attention_gap: ArrayLike,
+    moat: ArrayLike,
+    scalability: ArrayLike,
+    network: ArrayLike,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Calculate composite scores for many papers from their component score arrays.
+
+    Returns:
+        Tuple of (composite_scores, columns) where columns holds the per-paper
+        weighted_sum, synergy_bonus and high_score_count arrays
+    """
+    components = [
+        np.asarray(novelty, dtype=np.float64),
+        np.asarray(momentum, dtype=np.float64),
+        np.asarray(attention_gap, dtype=np.float64),
+        np.asarray(moat, dtype=np.float64),
+        np.asarray(scalability, dtype=np.float64),
+        np.asarray(network, dtype=np.float64),
+    ]
+    weights = list(COMPOSITE_WEIGHTS.values())
+
+    # Weighted sum, accumulated in the same order as the weights
+    weighted_sum = components[0] * weights[0]
+    for component, weight in zip(components[1:], weights[1:], strict=True):
+        weighted_sum = weighted_sum + component * weight
+
+    # Synergy bonus: papers that excel in multiple dimensions get a boost
+    high_scores = np.zeros(weighted_sum.shape, dtype=np.int64)
+    for component in components:
+        high_scores += component > SYNERGY_THRESHOLD
+    synergy_bonus = np.minimum(0.08, high_scores * 0.02)
+
+    composite = np.clip(weighted_sum + synergy_bonus, 0.0, 1.0)
+
+    columns = {
+        "weighted_sum": weighted_sum,
+        "synergy_bonus": synergy_bonus,
+        "high_score_count": high_scores,
+    }
+    return composite, columns
+
+
+def composite_metadata(columns: dict[str, np.ndarray], idx: int) -> dict:
+    """Build the ``scoring_metadata`` payload for one row of ``calculate_composite_scores``."""
+    return {
+        "weighted_sum": float(columns["weighted_sum"][idx]),
+        "synergy_bonus": float(columns["synergy_bonus"][idx]),
+        "high_score_count": int(columns["high_score_count"][idx]),
+        "weights": dict(COMPOSITE_WEIGHTS),
     }
-    
-    return max(0.0, min(1.0, score)), evidence
 
 
 def calculate_composite_score(
@@ -295,7 +469,7 @@ def calculate_composite_score(
 ) -> tuple[float, dict]:
     """
     Calculate composite score from all 6 component scores.
-    
+
     Weights:
         - novelty: 0.25
         - momentum: 0.15
@@ -303,43 +477,115 @@ def calculate_composite_score(
         - moat: 0.20
         - scalability: 0.15
         - network: 0.05
-    
+
     Synergy bonus: +0.02 per metric >0.7, capped at +0.08
-    
+
     Returns:
         Tuple of (composite_score, metadata)
     """
-    # Weighted sum
-    weights = {
-        "novelty": 0.25,
-        "momentum": 0.15,
-        "attention_gap": 0.20,
-        "moat": 0.20,
-        "scalability": 0.15,
-        "network": 0.05,
-    }
-    
-    weighted_sum = (
-        novelty * weights["novelty"] +
-        momentum * weights["momentum"] +
-        attention_gap * weights["attention_gap"] +
-        moat * weights["moat"] +
-        scalability * weights["scalability"] +
-        network * weights["network"]
+    scores, columns = calculate_composite_scores(
+        [novelty], [momentum], [attention_gap], [moat], [scalability], [network]
+    )
+    return float(scores[0]), composite_metadata(columns, 0)
+
+
+@dataclass
+class ScoreBatch:
+    """Columnar scoring result; every array and list is aligned with the input papers."""
+
+    moat: np.ndarray
+    scalability: np.ndarray
+    network: np.ndarray
+    attention_raw: np.ndarray
+    attention_gap: np.ndarray
+    composite: np.ndarray
+    moat_evidence: list[dict]
+    scalability_evidence: list[dict]
+    network_evidence: list[dict]
+    attention_gap_evidence: list[dict]
+    scoring_metadata: list[dict]
+
+    def __len__(self) -> int:
+        return len(self.composite)
+
+
+def score_batch(
+    papers: Sequence[Mapping[str, Any]],
+    domain_mean_stars: float | None = None,
+    domain_std_stars: float | None = None,
+    coauthor_counts: dict[str, int] | None = None,
+    attention_stats: RunningStats | None = None,
+) -> ScoreBatch:
+    """
+    Score many papers of one domain at once.
+
+    Each paper mapping provides ``title``, ``abstract``, ``keywords``, ``novelty``,
+    ``momentum``, ``repo_stars``, ``link_count`` and optionally ``authors``.
+    Attention is normalized with ``attention_stats`` when given, else with
+    ``domain_mean_stars``/``domain_std_stars``. When both are omitted the
+    statistics are computed from the batch (mean and population standard
+    deviation of the raw attention values).
+
+    Returns:
+        ScoreBatch with values identical to the per-paper ``calculate_*`` functions
+    """
+    matches = [
+        match_lexicons(paper["title"], paper.get("abstract"), paper.get("keywords"))
+        for paper in papers
+    ]
+    moat, moat_evidence = calculate_moat_scores(matches)
+    scalability, scalability_evidence = calculate_scalability_scores(matches)
+    network, network_evidence = calculate_network_scores(
+        [paper.get("authors") for paper in papers], coauthor_counts
+    )
+
+    repo_stars = np.array([paper.get("repo_stars", 0) for paper in papers], dtype=np.int64)
+    link_counts = np.array([paper.get("link_count", 0) for paper in papers], dtype=np.int64)
+    if attention_stats is None and (domain_mean_stars is None or domain_std_stars is None):
+        attention_values = (repo_stars + link_counts * 10).tolist()
+        domain_mean_stars = mean(attention_values) if attention_values else 0.0
+        domain_std_stars = pstdev(attention_values) if len(attention_values) > 1 else 0.0
+
+    attention_gap, attention_columns = calculate_attention_gap_scores(
+        moat,
+        scalability,
+        repo_stars,
+        link_counts,
+        domain_mean_stars,
+        domain_std_stars,
+        attention_stats,
+    )
+    composite, composite_columns = calculate_composite_scores(
+        [paper.get("novelty", 0.0) for paper in papers],
+        [paper.get("momentum", 0.0) for paper in papers],
+        attention_gap,
+        moat,
+        scalability,
+        network,
+    )
+
+    attention_gap_evidence = [
+        {
+            "technical_quality": float(attention_columns["technical_quality"][idx]),
+            "repo_stars": int(repo_stars[idx]),
+            "link_count": int(link_counts[idx]),
+            "attention_raw": int(attention_columns["attention_raw"][idx]),
+            "attention_normalized": float(attention_columns["attention_normalized"][idx]),
+            "gap": float(attention_columns["gap"][idx]),
+        }
+        for idx in range(len(papers))
+    ]
+
+    return ScoreBatch(
+        moat=moat,
+        scalability=scalability,
+        network=network,
+        attention_raw=attention_columns["attention_raw"],
+        attention_gap=attention_gap,
+        composite=composite,
+        moat_evidence=moat_evidence,
+        scalability_evidence=scalability_evidence,
+        network_evidence=network_evidence,
+        attention_gap_evidence=attention_gap_evidence,
+        scoring_metadata=[composite_metadata(composite_columns, idx) for idx in range(len(papers))],
     )
-    
-    # Synergy bonus: papers that excel in multiple dimensions get a boost
-    high_scores = sum(1 for score in [novelty, momentum, attention_gap, moat, scalability, network] if score > 0.7)
-    synergy_bonus = min(0.08, high_scores * 0.02)
-    
-    composite = weighted_sum + synergy_bonus
-    composite = max(0.0, min(1.0, composite))  # Clip to [0, 1]
-    
-    metadata = {
-        "weighted_sum": weighted_sum,
-        "synergy_bonus": synergy_bonus,
-        "high_score_count": high_scores,
-        "weights": weights,
-    }
-    
-    return composite, metadata
@@ -0,0 +1,296 @@
+"""Vector search backends for /papers/near: pgvector in the database or an in-process index."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Paper
+from app.metrics import ANN_INDEX_ROWS
+from app.services.ann_index import IvfIndex, read_meta
+from app.services.embedding_store import embedding_expr, has_embedding, read_model
+from app.services.vector_search import (
+    VectorFilters,
+    drop_query_papers,
+    search_by_vector,
+    search_many_by_vector,
+)
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH = 1000
+# Filtered local searches start from this many candidates per requested paper
+FILTER_OVERFETCH = 4
+
+
+class SearchBackend(Protocol):
+    def search(
+        self,
+        db: Session,
+        vec: Sequence[float],
+        k: int,
+        filters: VectorFilters | None = None,
+        ef_search: int | None = None,
+    ) -> list[dict]:
+        """Top ``k`` papers passing ``filters`` as ``{"id", "title", "similarity"}``."""
+        ...
+
+    def search_many(
+        self,
+        db: Session,
+        vecs: Sequence[Sequence[float]],
+        k: int,
+        exclude_ids: Sequence[int | None] | None = None,
+    ) -> list[list[dict]]:
+        """
+        ``search`` for each of ``vecs``, one result list per vector.
+
+        ``exclude_ids`` gives, per vector, the paper it was read from (or
+        None); that paper is left out of its own results.
+        """
+        ...
+
+
+class PgvectorBackend:
+    def search(
+        self,
+        db: Session,
+        vec: Sequence[float],
+        k: int,
+        filters: VectorFilters | None = None,
+        ef_search: int | None = None,
+    ) -> list[dict]:
+        return [
+            {"id": r["id"], "title": r["title"], "similarity": float(r["similarity"])}
+            for r in search_by_vector(db, vec, k, filters=filters, ef_search=ef_search)
+        ]
+
+    def search_many(
+        self,
+        db: Session,
+        vecs: Sequence[Sequence[float]],
+        k: int,
+        exclude_ids: Sequence[int | None] | None = None,
+    ) -> list[list[dict]]:
+        return search_many_by_vector(db, vecs, k, exclude_ids=exclude_ids)
+
+
+class LocalIndexBackend:
+    """
+    Answer searches from an ``IvfIndex`` in this process; only titles come from the database.
+
+    At most every ``refresh_interval`` seconds a search first appends papers
+    with ids above the index watermark, so ingestion shows up without a
+    rebuild. Re-embedded or deleted papers are reflected by the next snapshot
+    (deleted ones are already dropped when titles are looked up).
+    """
+
+    def __init__(
+        self,
+        index: IvfIndex,
+        probes: int | None = None,
+        refresh_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.index = index
+        self.probes = probes or settings.ann_probes
+        self.refresh_interval = (
+            settings.ann_refresh_interval_s if refresh_interval is None else refresh_interval
+        )
+        self._clock = clock
+        self._refreshed_at: float | None = None
+        self._refresh_lock = threading.Lock()
+        ANN_INDEX_ROWS.labels(source="snapshot").set(index.meta.rows)
+
+    def refresh(self, db: Session) -> int:
+        """Add papers embedded since the snapshot; returns how many were added."""
+        now = self._clock()
+        # One request refreshes while the others search what is already indexed
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return 0
+            self._refreshed_at = now
+            added = 0
+            while True:
+                rows = db.execute(
+                    select(Paper.id, embedding_expr(self.index.meta.model))
+                    .where(Paper.id > self.index.watermark, has_embedding(self.index.meta.model))
+                    .order_by(Paper.id)
+                    .limit(REFRESH_BATCH)
+                ).all()
+                if not rows:
+                    break
+                ids = [row[0] for row in rows]
+                self.index.add(ids, np.asarray([row[1] for row in rows], dtype=np.float32))
+                added += len(rows)
+            ANN_INDEX_ROWS.labels(source="delta").set(len(self.index) - self.index.meta.rows)
+            return added
+        finally:
+            self._refresh_lock.release()
+
+    def search(
+        self,
+        db: Session,
+        vec: Sequence[float],
+        k: int,
+        filters: VectorFilters | None = None,
+        ef_search: int | None = None,
+    ) -> list[dict]:
+        """
+        Nearest papers from the index, checked against ``filters`` in the database.
+
+        Like pgvector's iterative scan, a filtered search widens the candidate
+        set and the probed lists until k papers match, the whole index has
+        been scanned or ``VECTOR_MAX_SCAN_TUPLES`` candidates were checked.
+        ``ef_search`` tunes HNSW only; this index trades recall with ``ANN_PROBES``.
+        """
+        self.refresh(db)
+        filters = filters or VectorFilters()
+        size = k * FILTER_OVERFETCH if filters else k
+        probes = self.probes
+        while True:
+            hits = self.index.search(vec, size, probes)
+            titles = self._titles(db, [paper_id for paper_id, _ in hits], filters)
+            exhausted = len(hits) < size and probes >= self.index.meta.lists
+            if not filters or len(titles) >= k or exhausted:
+                break
+            if size >= settings.vector_max_scan_tuples:
+                break
+            size, probes = size * 4, probes * 2
+        return [
+            {"id": paper_id, "title": titles[paper_id], "similarity": similarity}
+            for paper_id, similarity in hits
+            if paper_id in titles
+        ][:k]
+
+    def search_many(
+        self,
+        db: Session,
+        vecs: Sequence[Sequence[float]],
+        k: int,
+        exclude_ids: Sequence[int | None] | None = None,
+    ) -> list[list[dict]]:
+        """Search the index for every vector, then read all titles in one query."""
+        self.refresh(db)
+        size = k if exclude_ids is None else k + 1
+        batch = [self.index.search(vec, size, self.probes) for vec in vecs]
+        ids = sorted({paper_id for hits in batch for paper_id, _ in hits})
+        titles = self._titles(db, ids, VectorFilters())
+        results = [
+            [
+                {"id": paper_id, "title": titles[paper_id], "similarity": similarity}
+                for paper_id, similarity in hits
+                if paper_id in titles
+            ]
+            for hits in batch
+        ]
+        return results if exclude_ids is None else drop_query_papers(results, exclude_ids, k)
+
+    @staticmethod
+    def _titles(db: Session, ids: list[int], filters: VectorFilters) -> dict[int, str]:
+        # Papers deleted since they were indexed drop out here as well
+        if not ids:
+            return {}
+        params: dict = {"ids": ids}
+        where = " AND ".join(["p.id = ANY(:ids)", *filters.clauses(params)])
+        rows = db.execute(text(f"SELECT p.id, p.title FROM papers p WHERE {where}"), params)
+        return {row[0]: row[1] for row in rows.all()}
+
+
+def load_search_backend(
+    name: str | None = None, snapshot_path: str | None = None
+) -> SearchBackend:
+    """
+    Build the backend selected by ``VECTOR_SEARCH_BACKEND`` (``pgvector`` or ``local``).
+
+    ``local`` falls back to pgvector, with a warning, when the snapshot is
+    missing or was built for another model version than the one being read.
+    """
+    name = (name or settings.vector_search_backend).lower()
+    if name == "pgvector":
+        return PgvectorBackend()
+    if name != "local":
+        raise ValueError(f"Unknown vector search backend: {name}")
+    path = Path(snapshot_path or settings.ann_snapshot_path)
+    try:
+        index = IvfIndex.load(path)
+    except FileNotFoundError:
+        logger.warning("No ANN snapshot at %s, searching with pgvector", path)
+        return PgvectorBackend()
+    if index.meta.model != read_model():
+        logger.warning(
+            "ANN snapshot at %s holds %s, not %s; searching with pgvector",
+            path,
+            index.meta.model,
+            read_model(),
+        )
+        return PgvectorBackend()
+    logger.info("Loaded ANN snapshot %s (%d papers, %d lists)", path, len(index), index.meta.lists)
+    return LocalIndexBackend(index)
+
+
+def snapshot_version(path: str | None = None) -> str | None:
+    """``created_at`` of the snapshot at ``path`` (``ANN_SNAPSHOT_PATH``), None if there is none."""
+    try:
+        return read_meta(path or settings.ann_snapshot_path).created_at
+    except (FileNotFoundError, ValueError, TypeError):
+        # A snapshot still being written for the first time; the next check retries
+        return None
+
+
+_backend: SearchBackend | None = None
+_backend_version: str | None = None
+_checked_at: float | None = None
+_backend_lock = threading.Lock()
+
+
+def _reload_due(now: float) -> bool:
+    if settings.vector_search_backend.lower() != "local":
+        return False
+    return _checked_at is None or now - _checked_at >= settings.ann_refresh_interval_s
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    The process-wide backend, loaded on first use (or at API startup).
+
+    With ``VECTOR_SEARCH_BACKEND=local`` the snapshot's ``meta.json`` is checked
+    at most every ``ANN_REFRESH_INTERVAL_S``. When the ``ann-snapshot`` job has
+    replaced it (``created_at`` changed) the backend is reloaded: the new files
+    are mapped and the in-memory delta, which the snapshot now holds, is dropped.
+    Searches already running keep the previous index until they finish.
+    """
+    global _backend, _backend_version, _checked_at
+    now = time.monotonic()
+    if _backend is not None and not _reload_due(now):
+        return _backend
+    with _backend_lock:
+        if _backend is not None and not _reload_due(now):
+            return _backend
+        _checked_at = now
+        version = snapshot_version() if settings.vector_search_backend.lower() == "local" else None
+        if _backend is None or version != _backend_version:
+            if _backend is not None:
+                logger.info("ANN snapshot changed (%s -> %s), reloading", _backend_version, version)
+            _backend = load_search_backend()
+            _backend_version = version
+        return _backend
+
+
+def reset_search_backend() -> None:
+    """Drop the loaded backend so the next search reloads it."""
+    global _backend, _backend_version, _checked_at
+    with _backend_lock:
+        _backend = None
+        _backend_version = None
+        _checked_at = None
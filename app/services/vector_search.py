@@ -1,15 +1,277 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.services.embedding_store import (
+    distance_sql,
+    in_column,
+    read_model,
+    sql_literal,
+    vector_sql,
+)
+
+# pgvector's default hnsw.ef_search
+DEFAULT_EF_SEARCH = 40
+
+# Paper score columns /papers/near can filter on with a minimum
+SCORE_COLUMNS = (
+    "composite_score",
+    "moat_score",
+    "scalability_score",
+    "attention_gap_score",
+    "network_score",
+)
+
+
+@dataclass(frozen=True)
+class VectorFilters:
+    """Conditions a nearest paper must meet, applied inside the index scan."""
+
+    domain: str | None = None
+    published_after: datetime | None = None
+    published_before: datetime | None = None
+    min_composite_score: float | None = None
+    min_moat_score: float | None = None
+    min_scalability_score: float | None = None
+    min_attention_gap_score: float | None = None
+    min_network_score: float | None = None
+    exclude_ids: tuple[int, ...] = ()
+
+    def __bool__(self) -> bool:
+        return any(value not in (None, ()) for value in asdict(self).values())
+
+    def cache_key(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def clauses(self, params: dict[str, Any], alias: str = "p") -> list[str]:
+        """SQL conditions on papers ``alias``; bind values are added to ``params``."""
+        clauses = []
+        if self.domain is not None:
+            # Inlined so the planner can match a per-domain partial index
+            clauses.append(f"{alias}.domain = {sql_literal(self.domain)}")
+        if self.published_after is not None:
+            clauses.append(f"{alias}.published_at >= :published_after")
+            params["published_after"] = self.published_after
+        if self.published_before is not None:
+            clauses.append(f"{alias}.published_at < :published_before")
+            params["published_before"] = self.published_before
+        for column in SCORE_COLUMNS:
+            minimum = getattr(self, f"min_{column}")
+            if minimum is not None:
+                clauses.append(f"{alias}.{column} >= :min_{column}")
+                params[f"min_{column}"] = minimum
+        if self.exclude_ids:
+            clauses.append(f"{alias}.id <> ALL(:exclude_ids)")
+            params["exclude_ids"] = list(self.exclude_ids)
+        return clauses
+
+
+ITERATIVE_SCAN_SETTINGS = (
+    "set_config('hnsw.iterative_scan', :iterative_scan, true), "
+    "set_config('hnsw.max_scan_tuples', :max_scan_tuples, true)"
+)
+
+
+def _iterative_scan_params() -> dict[str, str]:
+    return {
+        "iterative_scan": settings.vector_iterative_scan,
+        "max_scan_tuples": str(settings.vector_max_scan_tuples),
+    }
+
+
+def enable_iterative_scan(db: Session) -> None:
+    """
+    Let HNSW scans of this transaction continue until enough rows pass the filters.
+
+    Without it an index scan stops after ``hnsw.ef_search`` candidates, so a
+    selective filter returns fewer than k papers. Needs pgvector 0.8 or later;
+    ``VECTOR_ITERATIVE_SCAN=off`` skips it.
+    """
+    if settings.vector_iterative_scan == "off":
+        return
+    db.execute(text(f"SELECT {ITERATIVE_SCAN_SETTINGS}"), _iterative_scan_params())
+
+
+def iterative_scan_condition(params: dict) -> str:
+    """
+    ``enable_iterative_scan`` as a WHERE condition, saving its round trip.
+
+    The condition references no row, so it is planned as a one-time filter
+    that runs before the scan beneath it starts. ``TRUE`` when
+    ``VECTOR_ITERATIVE_SCAN=off``.
+    """
+    if settings.vector_iterative_scan == "off":
+        return "TRUE"
+    params.update(_iterative_scan_params())
+    return f"(SELECT concat({ITERATIVE_SCAN_SETTINGS})) IS NOT NULL"
+
 
-def search_by_vector(db: Session, vec: list[float], k: int = 10):
-    sql = text(
+def nearest_sql(
+    params: dict[str, Any],
+    limit: int,
+    limit_param: str = "k",
+    model: str | None = None,
+    precision: str | None = None,
+    filters: VectorFilters | None = None,
+    query: str = ":vec",
+) -> str:
+    """
+    SQL selecting ``id, title, similarity`` of the ``limit`` papers nearest to ``query``.
+
+    ``query`` is a bind parameter or a column of an enclosing query. Bind
+    values, except the query vector, are added to ``params``. Rows are not
+    guaranteed to be ordered; callers sort by ``similarity``.
+    """
+    model = model or read_model()
+    precision = precision or settings.vector_index_precision
+    filters = filters or VectorFilters()
+    dim = settings.embedding_dim
+    params[limit_param] = limit
+    if in_column(model):
+        column = "p.embedding"
+        source = "papers p"
+        conditions = ["p.embedding IS NOT NULL"]
+    else:
+        column = vector_sql(dim)
+        source = "paper_embeddings e JOIN papers p ON p.id = e.paper_id"
+        conditions = ["e.model = :model"]
+        params["model"] = model
+    conditions += filters.clauses(params)
+    where = " AND ".join(conditions)
+
+    if precision == "full":
+        return f"""
+            SELECT p.id, p.title, 1 - ({column} <=> {query}) AS similarity
+            FROM {source}
+            WHERE {where}
+            ORDER BY {distance_sql(column, dim, precision, query)}
+            LIMIT :{limit_param}
+        """
+    params["candidates"] = max(limit, limit * settings.vector_rerank_factor)
+    return f"""
+            SELECT id, title, 1 - (embedding <=> {query}) AS similarity
+            FROM (
+                SELECT p.id, p.title, {column} AS embedding
+                FROM {source}
+                WHERE {where}
+                ORDER BY {distance_sql(column, dim, precision, query)}
+                LIMIT :candidates
+            ) candidates
+            ORDER BY embedding <=> {query}
+            LIMIT :{limit_param}
         """
-        SELECT id, 1 - (embedding <=> :vec) AS similarity
-        FROM papers
-        WHERE embedding IS NOT NULL
-        ORDER BY embedding <=> :vec
-        LIMIT :k
+
+
+def set_ef_search(db: Session, ef_search: int) -> None:
+    """
+    Set ``hnsw.ef_search`` for the current transaction, like ``SET LOCAL``.
+
+    An HNSW scan returns at most ``ef_search`` rows; larger values raise
+    recall at the cost of latency. The setting ends with the transaction, so
+    it never leaks to other requests sharing the pooled connection.
     """
+    db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+        {"ef_search": str(int(ef_search))},
     )
-    return db.execute(sql, {"vec": vec, "k": k}).mappings().all()
+
+
+def bounded_ef_search(ef_search: int, rows: int) -> int:
+    """``ef_search`` capped at ``VECTOR_EF_SEARCH_MAX``, but no lower than the ``rows`` needed."""
+    return max(min(ef_search, settings.vector_ef_search_max), rows)
+
+
+def search_by_vector(
+    db: Session,
+    vec: Sequence[float],
+    k: int = 10,
+    model: str | None = None,
+    precision: str | None = None,
+    filters: VectorFilters | None = None,
+    ef_search: int | None = None,
+):
+    """
+    Nearest papers to ``vec`` by cosine distance under the read model version.
+
+    With ``VECTOR_INDEX_PRECISION`` ``half`` or ``binary`` the quantized HNSW
+    index picks ``k * VECTOR_RERANK_FACTOR`` candidates, which are re-ranked
+    against the full-precision vectors; ``hnsw.ef_search`` is raised to at
+    least that many, since a scan returns no more than ``ef_search`` rows.
+    ``filters`` are evaluated during the index scan, which keeps widening
+    until k papers match. ``ef_search`` overrides ``hnsw.ef_search`` for this
+    query's transaction, bounded by ``VECTOR_EF_SEARCH_MAX``.
+    """
+    params: dict = {"vec": vec}
+    sql = nearest_sql(params, k, model=model, precision=precision, filters=filters)
+    if ef_search or "candidates" in params:
+        rows = params.get("candidates", k)
+        set_ef_search(db, bounded_ef_search(ef_search or DEFAULT_EF_SEARCH, rows))
+    if filters:
+        enable_iterative_scan(db)
+    # Iterative scans may return rows slightly out of order; the outer sort fixes that
+    sql = f"SELECT id, title, similarity FROM ({sql}) nearest ORDER BY similarity DESC"
+    return db.execute(text(sql), params).mappings().all()
+
+
+def drop_query_papers(
+    results: list[list[dict]], exclude_ids: Sequence[int | None], k: int
+) -> list[list[dict]]:
+    """Each result list without its query paper (``exclude_ids`` per list), cut to ``k``."""
+    return [
+        [hit for hit in hits if hit["id"] != paper_id][:k]
+        for hits, paper_id in zip(results, exclude_ids, strict=True)
+    ]
+
+
+def search_many_by_vector(
+    db: Session,
+    vecs: Sequence[Sequence[float]],
+    k: int = 10,
+    model: str | None = None,
+    precision: str | None = None,
+    exclude_ids: Sequence[int | None] | None = None,
+) -> list[list[dict]]:
+    """
+    Nearest papers to each of ``vecs``, in one statement.
+
+    The query vectors form a VALUES list that is LATERAL-joined to the
+    per-query index search, so a batch costs one round trip and one plan.
+    Returns one result list per vector, in input order. ``exclude_ids`` names
+    the paper each vector was read from (or None), which is left out of its
+    own results, as ``/papers/near?paper_id=`` does.
+    """
+    if not len(vecs):
+        return []
+    if exclude_ids is not None:
+        # One extra row per query, since a paper is its own nearest neighbor
+        padded = search_many_by_vector(db, vecs, k + 1, model=model, precision=precision)
+        return drop_query_papers(padded, exclude_ids, k)
+    dim = settings.embedding_dim
+    params: dict = {}
+    values = []
+    for ordinal, vec in enumerate(vecs):
+        params[f"query_{ordinal}"] = "[" + ",".join(str(float(x)) for x in vec) + "]"
+        values.append(f"({ordinal}, CAST(:query_{ordinal} AS vector({int(dim)})))")
+    nearest = nearest_sql(params, k, model=model, precision=precision, query="q.vec")
+    if "candidates" in params:
+        # Every per-query scan must return the whole re-rank pool
+        set_ef_search(db, bounded_ef_search(DEFAULT_EF_SEARCH, params["candidates"]))
+    sql = f"""
+        SELECT q.ord, n.id, n.title, n.similarity
+        FROM (VALUES {", ".join(values)}) AS q(ord, vec)
+        CROSS JOIN LATERAL ({nearest}) n
+        ORDER BY q.ord, n.similarity DESC
+    """
+    results: list[list[dict]] = [[] for _ in vecs]
+    for row in db.execute(text(sql), params).mappings():
+        results[row["ord"]].append(
+            {"id": row["id"], "title": row["title"], "similarity": float(row["similarity"])}
+        )
+    return results
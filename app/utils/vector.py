@@ -1,38 +1,123 @@
 from __future__ import annotations
 
-import math
 from collections.abc import Sequence
 from datetime import datetime
 
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+def stack_vectors(
+    vectors: Sequence[Sequence[float] | np.ndarray | None], dim: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stack vectors into one ``(n, dim)`` float32 matrix.
+
+    pgvector already returns float32 arrays, so rows are copied as whole
+    buffers rather than element by element. ``dim`` defaults to the length of
+    the first non-empty vector. Returns the matrix and a boolean mask of valid
+    rows; missing vectors and vectors of another length become zero rows.
+    """
+    vectors = list(vectors)
+    width = (
+        dim
+        if dim is not None
+        else next((len(vec) for vec in vectors if vec is not None and len(vec)), 0)
+    )
+    valid = np.fromiter(
+        (width > 0 and vec is not None and len(vec) == width for vec in vectors),
+        dtype=np.bool_,
+        count=len(vectors),
+    )
+    if len(vectors) and valid.all():
+        return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), width), valid
+    matrix = np.zeros((len(vectors), width), dtype=np.float32)
+    for idx in np.flatnonzero(valid):
+        matrix[idx] = vectors[idx]
+    return matrix, valid
+
+
+def cosine_similarities(matrix: np.ndarray, vector: ArrayLike) -> np.ndarray:
+    """
+    Cosine similarity of every row of ``matrix`` with ``vector``.
+
+    One matrix-vector product; rows or a vector with zero norm, or a vector
+    of another dimension, give 0.0.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    vector = np.asarray(vector, dtype=np.float32)
+    similarities = np.zeros(len(matrix))
+    if matrix.ndim != 2 or vector.shape != (matrix.shape[1],) or not vector.size:
+        return similarities
+    vector_norm = float(np.linalg.norm(vector.astype(np.float64)))
+    if vector_norm == 0.0:
+        return similarities
+    row_norms = np.linalg.norm(matrix, axis=1).astype(np.float64)
+    dots = (matrix @ vector).astype(np.float64)
+    nonzero = row_norms > 0.0
+    similarities[nonzero] = dots[nonzero] / (row_norms[nonzero] * vector_norm)
+    return np.clip(similarities, -1.0, 1.0)
+
+
+def novelty_scores(
+    matrix: np.ndarray, domain_centroid: Sequence[float] | np.ndarray | None
+) -> np.ndarray:
+    """Novelty (``1 - cosine`` to the domain centroid, clipped to [0, 1]) of every row."""
+    if domain_centroid is None or len(domain_centroid) == 0:
+        return np.zeros(len(matrix))
+    return np.clip(1.0 - cosine_similarities(matrix, domain_centroid), 0.0, 1.0)
+
+
+class CentroidAccumulator:
+    """Build a centroid one vector or matrix at a time, with the same result as ``centroid``."""
+
+    def __init__(self) -> None:
+        self._acc: np.ndarray | None = None
+        self.count = 0
+
+    @property
+    def dim(self) -> int | None:
+        return None if self._acc is None else len(self._acc)
+
+    def add(self, vec: Sequence[float] | np.ndarray | None) -> None:
+        if vec is None or len(vec) == 0:
+            return
+        self.add_matrix(np.asarray(vec, dtype=np.float32).reshape(1, -1))
+
+    def add_matrix(self, matrix: np.ndarray, valid: np.ndarray | None = None) -> None:
+        """Add the rows of a ``stack_vectors`` matrix, skipping rows outside ``valid``."""
+        if valid is not None:
+            matrix = matrix[valid]
+        if not len(matrix) or not matrix.shape[1]:
+            return
+        if self._acc is None:
+            self._acc = np.zeros(matrix.shape[1])
+        if matrix.shape[1] != len(self._acc):
+            return
+        self._acc += matrix.sum(axis=0, dtype=np.float64)
+        self.count += len(matrix)
+
+    def array(self) -> np.ndarray | None:
+        if self._acc is None or self.count == 0:
+            return None
+        return (self._acc / self.count).astype(np.float32)
+
+    def value(self) -> list[float] | None:
+        centroid_array = self.array()
+        return None if centroid_array is None else centroid_array.tolist()
+
 
 def centroid(vectors: Sequence[Sequence[float]]) -> list[float] | None:
-    frames = [vec for vec in vectors if vec]
-    if not frames:
-        return None
-    length = len(frames[0])
-    acc = [0.0] * length
-    count = 0
-    for vec in frames:
-        if len(vec) != length:
-            continue
-        for idx, value in enumerate(vec):
-            acc[idx] += value
-        count += 1
-    if count == 0:
-        return None
-    return [value / count for value in acc]
+    accumulator = CentroidAccumulator()
+    for vec in vectors:
+        accumulator.add(vec)
+    return accumulator.value()
 
 
 def cosine_similarity(first: Sequence[float], second: Sequence[float]) -> float:
-    if not first or not second or len(first) != len(second):
-        return 0.0
-    dot = sum(a * b for a, b in zip(first, second, strict=False))
-    norm_a = math.sqrt(sum(a * a for a in first))
-    norm_b = math.sqrt(sum(b * b for b in second))
-    if norm_a == 0.0 or norm_b == 0.0:
+    if first is None or second is None or len(first) == 0 or len(first) != len(second):
         return 0.0
-    raw = dot / (norm_a * norm_b)
-    return max(-1.0, min(1.0, raw))
+    return float(cosine_similarities(np.asarray(first).reshape(1, -1), second)[0])
 
 
 def momentum_score(published_at: datetime | None, now: datetime | None = None) -> float:
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import logging
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Paper
+from app.db.session import SessionLocal
+from app.lib.job_metrics import COMPUTE, DB_READ, JobRun, job_run
+from app.services.ann_index import IvfIndex
+from app.services.embedding_store import embedding_expr, has_embedding, read_model
+
+logger = logging.getLogger(__name__)
+JOB_NAME = "ann_snapshot"
+READ_CHUNK = 5000
+
+
+def _read_embeddings(
+    session: Session, model: str, dim: int, chunk_size: int = READ_CHUNK
+) -> tuple[np.ndarray, np.ndarray]:
+    """Every paper vector under ``model``, in id order, read by keyset pagination."""
+    total = (
+        session.execute(select(func.count()).select_from(Paper).where(has_embedding(model))).scalar()
+        or 0
+    )
+    ids = np.empty(total, dtype=np.int64)
+    vectors = np.empty((total, dim), dtype=np.float32)
+    filled, after_id = 0, 0
+    while filled < total:
+        rows = session.execute(
+            select(Paper.id, embedding_expr(model))
+            .where(Paper.id > after_id, has_embedding(model))
+            .order_by(Paper.id)
+            .limit(min(chunk_size, total - filled))
+        ).all()
+        if not rows:
+            break
+        ids[filled : filled + len(rows)] = [row[0] for row in rows]
+        vectors[filled : filled + len(rows)] = [row[1] for row in rows]
+        filled += len(rows)
+        after_id = rows[-1][0]
+    return ids[:filled], vectors[:filled]
+
+
+def main(path: str | None = None, lists: int | None = None) -> None:
+    """
+    Build the in-process ANN index from the read model's embeddings and save its snapshot.
+
+    The snapshot replaces the previous one atomically; API processes with
+    ``VECTOR_SEARCH_BACKEND=local`` notice its new ``created_at`` within
+    ``ANN_REFRESH_INTERVAL_S`` and map it, and meanwhile pick up newer papers
+    from their watermark, so a rebuild mainly folds in re-embedded papers and
+    rebalances the inverted lists.
+    """
+    with job_run(JOB_NAME) as run:
+        _run(run, path or settings.ann_snapshot_path, lists or settings.ann_lists or None)
+
+
+def _run(run: JobRun, path: str, lists: int | None) -> None:
+    model = read_model()
+    session = SessionLocal()
+    try:
+        with run.stage(DB_READ) as timing:
+            ids, vectors = _read_embeddings(session, model, settings.embedding_dim)
+            timing.rows = len(ids)
+    finally:
+        session.close()
+
+    with run.stage(COMPUTE, rows=len(ids)):
+        index = IvfIndex.build(ids, vectors, model, lists)
+        index.save(path)
+    run.rows += len(ids)
+    logger.info(
+        "Saved ANN snapshot of %d %s vectors in %d lists to %s (watermark %d)",
+        len(ids),
+        model,
+        index.meta.lists,
+        path,
+        index.meta.watermark,
+    )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the ANN index snapshot for local search")
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="Snapshot directory (default: ANN_SNAPSHOT_PATH)",
+    )
+    parser.add_argument(
+        "--lists",
+        type=int,
+        default=None,
+        help="Inverted lists (default: ANN_LISTS, or sqrt of the paper count)",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(path=args.path, lists=args.lists)
@@ -2,20 +2,45 @@ import logging
 import random
 import time
 from collections.abc import Sequence
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 
 import feedparser
+import numpy as np
 
 from app.config import settings
 from app.db.models.paper import Paper
 from app.db.session import SessionLocal
 from app.lib.http import HttpClient
-from app.metrics import ARXIV_ERRORS, ARXIV_PAPERS_PROCESSED, ARXIV_REQUESTS_TOTAL
-from app.services.embeddings import EmbeddingService
+from app.lib.job_metrics import (
+    DB_READ,
+    DB_WRITE,
+    EMBED,
+    FETCH,
+    PARSE,
+    JobRun,
+    StageRecorder,
+    job_run,
+)
+from app.metrics import (
+    ARXIV_ERRORS,
+    ARXIV_PAPERS_PROCESSED,
+    ARXIV_REQUESTS_TOTAL,
+    EMBEDDING_CACHE_LOOKUPS,
+)
+from app.services.corpus_version import bump_corpus_version
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_store import (
+    in_column,
+    ingest_models,
+    load_embeddings,
+    write_embeddings,
+)
+from app.services.embeddings import EmbeddingService, embedding_text
 from app.services.keyword_domain import classify_domain
 
 logger = logging.getLogger(__name__)
 
+JOB_NAME = "arxiv_hourly"
 ARXIV_API_URL = "http://export.arxiv.org/api/query"
 PAGE_LIMIT = 3
 FETCH_DELAY = 3.0
@@ -43,12 +68,122 @@ def _enforce_domain(title: str, keywords: Sequence[str]) -> str:
 
 
 def _build_embedding_text(entry: dict) -> str:
-    pieces = [entry.get("title"), entry.get("summary")]
-    return "\n".join(p.strip() for p in pieces if p)
+    return embedding_text(entry.get("title"), entry.get("summary"))
+
+
+def _external_id(entry: dict) -> str | None:
+    external_id = entry.get("id")
+    if not external_id:
+        return None
+    if "/" in external_id:
+        external_id = external_id.rsplit("/", 1)[-1]
+    return external_id
+
+
+def _changed(current, value) -> bool:
+    # Embeddings load as numpy arrays, where != compares element-wise
+    if isinstance(current, np.ndarray) or isinstance(value, np.ndarray):
+        return current is None or value is None or not np.array_equal(current, value)
+    return current != value
+
+
+def _existing_papers(session, entries: Sequence[dict]) -> dict[str, Paper]:
+    external_ids = {external_id for entry in entries if (external_id := _external_id(entry))}
+    if not external_ids:
+        return {}
+    papers = session.query(Paper).filter(Paper.external_id.in_(external_ids))
+    return {paper.external_id: paper for paper in papers}
+
+
+def _stored_embeddings(session, existing: dict[str, Paper], model: str) -> dict[int, np.ndarray]:
+    """Vectors of the stored papers under ``model``."""
+    if in_column(model):
+        return {
+            paper.id: np.asarray(paper.embedding, dtype=np.float32)
+            for paper in existing.values()
+            if paper.embedding is not None
+        }
+    return load_embeddings(session, [paper.id for paper in existing.values()], model)
+
+
+def _embed_texts(
+    cache: EmbeddingCache,
+    session,
+    entries: Sequence[dict],
+    indices: Sequence[int],
+    stages: StageRecorder,
+) -> np.ndarray:
+    texts = [
+        _build_embedding_text(entries[idx]) or _external_id(entries[idx]) or ""
+        for idx in indices
+    ]
+    with stages.stage(EMBED, rows=len(texts)):
+        return cache.embed_many(texts, session)
+
+
+def _embed_entries(
+    cache: EmbeddingCache,
+    session,
+    entries: Sequence[dict],
+    existing: dict[str, Paper],
+    stages: StageRecorder,
+) -> np.ndarray:
+    """
+    Embed a page of entries under ``cache.model``, skipping the model for unchanged papers.
+
+    A stored paper whose title and abstract are unchanged keeps its embedding;
+    the rest go through the embedding cache in one batched call.
+    """
+    stored = _stored_embeddings(session, existing, cache.model)
+    reused: dict[int, np.ndarray] = {}
+    pending: list[int] = []
+    for idx, entry in enumerate(entries):
+        paper = existing.get(_external_id(entry) or "")
+        vector = stored.get(paper.id) if paper is not None else None
+        if (
+            paper is not None
+            and vector is not None
+            and paper.title == (entry.get("title") or "").strip()
+            and paper.abstract == (entry.get("summary") or "").strip()
+        ):
+            reused[idx] = vector
+        else:
+            pending.append(idx)
+
+    computed = _embed_texts(cache, session, entries, pending, stages) if pending else None
+    if computed is not None:
+        # Vectors stored at another dimension than the model now returns are embedded again
+        stale = [idx for idx, vector in reused.items() if len(vector) != computed.shape[1]]
+        if stale:
+            logger.debug(
+                "Embedding dim mismatch (%d stored vectors, %d expected)",
+                len(stale),
+                computed.shape[1],
+            )
+            for idx in stale:
+                del reused[idx]
+            pending += stale
+            computed = np.concatenate(
+                [computed, _embed_texts(cache, session, entries, stale, stages)]
+            )
+    EMBEDDING_CACHE_LOOKUPS.labels(tier="paper", result="hit").inc(len(reused))
+
+    if computed is not None:
+        dim = computed.shape[1]
+    elif reused:
+        dim = len(next(iter(reused.values())))
+    else:
+        dim = settings.embedding_dim
+    embeddings = np.zeros((len(entries), dim), dtype=np.float32)
+    if computed is not None:
+        embeddings[pending] = computed
+    for idx, vector in reused.items():
+        embeddings[idx] = vector
+    return embeddings
 
 
 def _fetch_entries(
-    client: HttpClient, category: str, start: int, max_results: int
+    client: HttpClient, category: str, start: int, max_results: int, stages: StageRecorder
 ) -> list[dict]:
     params = {
         "search_query": f"cat:{category}",
@@ -58,9 +193,10 @@ def _fetch_entries(
         "sortOrder": "descending",
     }
     try:
-        resp = client.get(
-            ARXIV_API_URL, params=params, extra_headers={"Accept": "application/atom+xml"}
-        )
+        with stages.stage(FETCH):
+            resp = client.get(
+                ARXIV_API_URL, params=params, extra_headers={"Accept": "application/atom+xml"}
+            )
         ARXIV_REQUESTS_TOTAL.labels(category=category, status=resp.status_code).inc()
         
         if resp.status_code != 200:
@@ -69,7 +205,10 @@ def _fetch_entries(
             )
             ARXIV_ERRORS.labels(category=category, error_type="http_error").inc()
             return []
-        return list(feedparser.parse(resp.text).entries)
+        with stages.stage(PARSE) as timing:
+            entries = list(feedparser.parse(resp.text).entries)
+            timing.rows = len(entries)
+        return entries
     except Exception as e:
         logger.error("arXiv request exception for category %s: %s", category, str(e))
         ARXIV_REQUESTS_TOTAL.labels(category=category, status="error").inc()
@@ -78,14 +217,17 @@ def _fetch_entries(
 
 
 def _persist_entry(
-    session, embedder: EmbeddingService, entry: dict, published_at: datetime | None, category: str
+    session,
+    entry: dict,
+    embedding: np.ndarray | None,
+    existing: dict[str, Paper],
+    published_at: datetime | None,
+    category: str,
 ):
-    external_id = entry.get("id")
+    external_id = _external_id(entry)
     if not external_id:
         ARXIV_ERRORS.labels(category=category, error_type="missing_id").inc()
         return None
-    if "/" in external_id:
-        external_id = external_id.rsplit("/", 1)[-1]
     
     try:
         title = (entry.get("title") or "").strip()
@@ -93,15 +235,7 @@ def _persist_entry(
         keywords = list(_extract_keywords(entry))
         doi = entry.get("arxiv_doi")
         domain = _enforce_domain(title, keywords)
-        text_to_embed = _build_embedding_text(entry) or external_id
-        embedding = embedder.embed(text_to_embed)
-        if len(embedding) != settings.embedding_dim:
-            logger.debug(
-                "Embedding dim mismatch (%d expected, %d got)",
-                settings.embedding_dim,
-                len(embedding),
-            )
-        paper = session.query(Paper).filter_by(external_id=external_id).one_or_none()
+        paper = existing.get(external_id)
         values = {
             "title": title,
             "abstract": summary,
@@ -109,18 +243,25 @@ def _persist_entry(
             "keywords": keywords,
             "doi": doi,
             "published_at": published_at,
-            "embedding": embedding,
         }
+        # Other model versions are written to paper_embeddings once the page is flushed
+        if embedding is not None:
+            values["embedding"] = embedding
         if not paper:
+            if "embedding" in values:
+                values["embedded_at"] = datetime.now(UTC)
             paper = Paper(external_id=external_id, **values)
             session.add(paper)
+            existing[external_id] = paper
             ARXIV_PAPERS_PROCESSED.labels(category=category, status="inserted").inc()
             return "insert"
         updated = False
         for field, value in values.items():
-            if getattr(paper, field) != value:
+            if _changed(getattr(paper, field), value):
                 setattr(paper, field, value)
                 updated = True
+                if field == "embedding":
+                    paper.embedded_at = datetime.now(UTC)
         if updated:
             ARXIV_PAPERS_PROCESSED.labels(category=category, status="updated").inc()
         else:
@@ -132,9 +273,34 @@ def _persist_entry(
         raise
 
 
+def _write_side_embeddings(
+    session,
+    entries: Sequence[dict],
+    embeddings: np.ndarray,
+    existing: dict[str, Paper],
+    model: str,
+) -> None:
+    session.flush()
+    rows = [
+        (paper.id, vector)
+        for entry, vector in zip(entries, embeddings, strict=True)
+        if (paper := existing.get(_external_id(entry) or "")) is not None
+    ]
+    write_embeddings(
+        session, [paper_id for paper_id, _ in rows], [vector for _, vector in rows], model
+    )
+
+
 def main() -> None:
+    with job_run(JOB_NAME) as run:
+        _run(run)
+
+
+def _run(run: JobRun) -> None:
     client = HttpClient()
-    embedder = EmbeddingService.get()
+    caches = [
+        EmbeddingCache(EmbeddingService.for_model(model), model) for model in ingest_models()
+    ]
     cutoff = datetime.utcnow() - timedelta(days=settings.arxiv_lookback_days)
     inserted = 0
     updated = 0
@@ -146,21 +312,46 @@ def main() -> None:
             stop = False
             while page < PAGE_LIMIT and not stop:
                 entries = _fetch_entries(
-                    client, category, start, settings.arxiv_max_results
+                    client, category, start, settings.arxiv_max_results, run
                 )
                 if not entries:
                     break
+                page_entries: list[tuple[dict, datetime | None]] = []
                 for entry in entries:
                     published_at = _parse_published(entry)
                     if published_at and published_at < cutoff:
                         stop = True
                         break
-                    status = _persist_entry(session, embedder, entry, published_at, category)
+                    page_entries.append((entry, published_at))
+                page_dicts = [entry for entry, _ in page_entries]
+                with run.stage(DB_READ, rows=len(page_dicts)):
+                    existing = _existing_papers(session, page_dicts)
+                embeddings = {
+                    cache.model: _embed_entries(cache, session, page_dicts, existing, run)
+                    for cache in caches
+                }
+                column_embeddings = next(
+                    (matrix for model, matrix in embeddings.items() if in_column(model)), None
+                )
+                changed = 0
+                for idx, (entry, published_at) in enumerate(page_entries):
+                    embedding = None if column_embeddings is None else column_embeddings[idx]
+                    status = _persist_entry(
+                        session, entry, embedding, existing, published_at, category
+                    )
                     if status == "insert":
                         inserted += 1
                     elif status == "update":
                         updated += 1
-                session.commit()
+                    changed += status is not None
+                with run.stage(DB_WRITE, rows=len(page_entries)):
+                    for model, matrix in embeddings.items():
+                        if not in_column(model):
+                            _write_side_embeddings(session, page_dicts, matrix, existing, model)
+                    if changed:
+                        bump_corpus_version(session)
+                    session.commit()
+                run.rows += len(page_entries)
                 page += 1
                 start += settings.arxiv_max_results
                 if stop:
@@ -172,3 +363,7 @@ def main() -> None:
     finally:
         session.close()
         logger.info("arXiv ingestion done (inserted=%d, updated=%d)", inserted, updated)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,15 @@ from app.db.models.http_cache import HttpCache
 from app.db.models.repository import Repository
 from app.db.session import SessionLocal
 from app.lib.http import HttpClient
+from app.lib.job_metrics import (
+    COMPUTE,
+    DB_READ,
+    DB_WRITE,
+    FETCH,
+    PARSE,
+    JobRun,
+    job_run,
+)
 from app.metrics import (
     GITHUB_ERRORS,
     GITHUB_RATE_LIMIT_HITS,
@@ -21,6 +30,7 @@ from app.metrics import (
 
 logger = logging.getLogger(__name__)
 
+JOB_NAME = "github_hourly"
 GITHUB_SEARCH_URL = "https://api.github.com/search/repositories"
 PAGE_LIMIT = 2
 PER_PAGE = 30
@@ -73,9 +83,8 @@ def _compute_complexity(star_score: float, open_issues: int) -> float:
 
 
 def _persist_cache(
-    session: Session, key: str, response, params: dict[str, str]
+    session: Session, cache: HttpCache | None, key: str, response, params: dict[str, str]
 ) -> None:
-    cache = session.query(HttpCache).filter_by(url=key).one_or_none()
     if not cache:
         cache = HttpCache(url=key)
         session.add(cache)
@@ -86,47 +95,51 @@ def _persist_cache(
     session.flush()
 
 
-def _upsert_repository(session: Session, data: dict, query: str) -> str:
+def _repository_values(data: dict) -> tuple[str, dict] | None:
+    """Full name and column values of one search result, None if it has no name."""
     full_name = data.get("full_name")
     if not full_name:
         GITHUB_ERRORS.labels(error_type="missing_full_name").inc()
-        return "skipped"
-    
+        return None
+    created_at = _parse_datetime(data.get("created_at"))
+    pushed_at = _parse_datetime(data.get("pushed_at"))
+    stars = data.get("stargazers_count", 0) or 0
+    forks = data.get("forks_count", 0) or 0
+    open_issues = data.get("open_issues_count", 0) or 0
+    velocity, velocity_evidence = _compute_velocity(stars, pushed_at)
+    star_score = min(1.0, math.log1p(stars) / math.log1p(2000))
+    complexity = _compute_complexity(star_score, open_issues)
+    return full_name, {
+        "description": data.get("description"),
+        "language": data.get("language"),
+        "topics": data.get("topics") or [],
+        "stars": stars,
+        "forks": forks,
+        "open_issues": open_issues,
+        "created_at": created_at,
+        "pushed_at": pushed_at,
+        "deeptech_complexity_score": complexity,
+        "velocity_score": velocity,
+        "velocity_evidence": velocity_evidence,
+    }
+
+
+def _upsert_repository(
+    session: Session, repo: Repository | None, full_name: str, values: dict, query: str
+) -> str:
     try:
-        repo = session.query(Repository).filter_by(full_name=full_name).one_or_none()
-        created_at = _parse_datetime(data.get("created_at"))
-        pushed_at = _parse_datetime(data.get("pushed_at"))
-        stars = data.get("stargazers_count", 0) or 0
-        forks = data.get("forks_count", 0) or 0
-        open_issues = data.get("open_issues_count", 0) or 0
-        velocity, velocity_evidence = _compute_velocity(stars, pushed_at)
-        star_score = min(1.0, math.log1p(stars) / math.log1p(2000))
-        complexity = _compute_complexity(star_score, open_issues)
-        values = {
-            "description": data.get("description"),
-            "language": data.get("language"),
-            "topics": data.get("topics") or [],
-            "stars": stars,
-            "forks": forks,
-            "open_issues": open_issues,
-            "created_at": created_at,
-            "pushed_at": pushed_at,
-            "deeptech_complexity_score": complexity,
-            "velocity_score": velocity,
-            "velocity_evidence": velocity_evidence,
-        }
         if not repo:
             repo = Repository(full_name=full_name, **values)
             session.add(repo)
             GITHUB_REPOS_PROCESSED.labels(query=query, status="inserted").inc()
             return "insert"
-        
+
         updated = False
         for field, value in values.items():
             if getattr(repo, field) != value:
                 setattr(repo, field, value)
                 updated = True
-        
+
         if updated:
             GITHUB_REPOS_PROCESSED.labels(query=query, status="updated").inc()
             return "update"
@@ -140,6 +153,11 @@ def _upsert_repository(session: Session, data: dict, query: str) -> str:
 
 
 def main() -> None:
+    with job_run(JOB_NAME) as run:
+        _run(run)
+
+
+def _run(run: JobRun) -> None:
     if not settings.github_token:
         logger.warning("Skipping GitHub ingestion: GITHUB_TOKEN not configured")
         return
@@ -165,22 +183,25 @@ def main() -> None:
                     "page": str(page),
                 }
                 cache_key = _cache_key(GITHUB_SEARCH_URL, params)
-                cache = session.query(HttpCache).filter_by(url=cache_key).one_or_none()
+                with run.stage(DB_READ):
+                    cache = session.query(HttpCache).filter_by(url=cache_key).one_or_none()
                 
                 try:
-                    resp = client.get(
-                        GITHUB_SEARCH_URL,
-                        params=params,
-                        etag=cache.etag if cache else None,
-                        last_modified=cache.last_modified if cache else None,
-                        extra_headers=headers,
-                    )
+                    with run.stage(FETCH):
+                        resp = client.get(
+                            GITHUB_SEARCH_URL,
+                            params=params,
+                            etag=cache.etag if cache else None,
+                            last_modified=cache.last_modified if cache else None,
+                            extra_headers=headers,
+                        )
                     GITHUB_REQUESTS_TOTAL.labels(
                         endpoint="search/repositories", status=resp.status_code
                     ).inc()
                     
                     if resp.status_code == 304:
-                        _persist_cache(session, cache_key, resp, params)
+                        with run.stage(DB_WRITE):
+                            _persist_cache(session, cache, cache_key, resp, params)
                         continue
                     
                     if resp.status_code == 403:
@@ -196,20 +217,38 @@ def main() -> None:
                         GITHUB_ERRORS.labels(error_type="http_error").inc()
                         break
                     
-                    payload = resp.json()
-                    items = payload.get("items", [])
+                    with run.stage(PARSE) as timing:
+                        payload = resp.json()
+                        items = payload.get("items", [])
+                        timing.rows = len(items)
                     if not items:
                         break
                     
-                    for item in items:
-                        status = _upsert_repository(session, item, category)
-                        if status == "insert":
-                            inserted += 1
-                        elif status == "update":
-                            updated += 1
-                    
-                    _persist_cache(session, cache_key, resp, params)
-                    session.commit()
+                    with run.stage(COMPUTE, rows=len(items)):
+                        rows = [row for item in items if (row := _repository_values(item))]
+
+                    with run.stage(DB_READ) as timing:
+                        names = [full_name for full_name, _ in rows]
+                        existing = {
+                            repo.full_name: repo
+                            for repo in session.query(Repository).filter(
+                                Repository.full_name.in_(names)
+                            )
+                        }
+                        timing.rows = len(existing)
+
+                    with run.stage(DB_WRITE, rows=len(rows)):
+                        for full_name, values in rows:
+                            status = _upsert_repository(
+                                session, existing.get(full_name), full_name, values, category
+                            )
+                            if status == "insert":
+                                inserted += 1
+                            elif status == "update":
+                                updated += 1
+                        _persist_cache(session, cache, cache_key, resp, params)
+                        session.commit()
+                    run.rows += len(items)
                     time.sleep(RATE_LIMIT_SECONDS + random.random())
                     
                 except Exception as e:
@@ -224,3 +263,7 @@ def main() -> None:
     finally:
         session.close()
         logger.info("GitHub ingestion completed (inserted=%d, updated=%d)", inserted, updated)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,10 @@ from app.db.models.paper import Paper
 from app.db.models.paper_repo_link import PaperRepoLink
 from app.db.models.repository import Repository
 from app.db.session import SessionLocal
+from app.lib.job_metrics import COMPUTE, DB_READ, DB_WRITE, JobRun, job_run
 
 logger = logging.getLogger(__name__)
+JOB_NAME = "linking_job"
 MAX_MATCHES = 3
 MIN_CONFIDENCE = 0.4
 TOKEN_PATTERN = re.compile(r"\w{3,}")
@@ -21,76 +23,101 @@ def _tokens(text: str | None) -> set[str]:
 
 
 def _upsert_link(
-    session: Session, paper_id: int, repo_id: int, confidence: float, evidence: dict
-) -> None:
-    link = (
-        session.query(PaperRepoLink)
-        .filter_by(paper_id=paper_id, repo_id=repo_id)
-        .one_or_none()
-    )
+    session: Session,
+    existing: dict[tuple[int, int], PaperRepoLink],
+    paper_id: int,
+    repo_id: int,
+    confidence: float,
+    evidence: dict,
+) -> bool:
+    """Store one match; returns whether a link between the pair already existed."""
+    link = existing.get((paper_id, repo_id))
     if link:
         if confidence > link.confidence:
             link.confidence = confidence
             link.evidence = evidence
-        return
+        return True
     session.add(
         PaperRepoLink(
             paper_id=paper_id, repo_id=repo_id, confidence=confidence, evidence=evidence
         )
     )
+    return False
 
 
 def main() -> None:
+    with job_run(JOB_NAME) as run:
+        _run(run)
+
+
+def _match_papers(
+    papers: list[Paper], repositories: list[Repository]
+) -> list[tuple[int, int, float, dict]]:
+    """Best (paper id, repo id, confidence, evidence) matches of each paper."""
+    links: list[tuple[int, int, float, dict]] = []
+    repo_tokens_map = {
+        repo.id: _tokens(repo.full_name) | _tokens(repo.description)
+        for repo in repositories
+    }
+    for paper in papers:
+        if not (paper.keywords or paper.title):
+            continue
+        paper_tokens = _tokens(paper.title) | {
+            kw.lower() for kw in (paper.keywords or [])
+        }
+        matches: list[tuple[float, int, dict]] = []
+        for repo in repositories:
+            repo_topics = {topic.lower() for topic in (repo.topics or [])}
+            overlap = paper_tokens & repo_topics
+            title_overlap = bool(paper_tokens & repo_tokens_map.get(repo.id, set()))
+            confidence = 0.0
+            if overlap:
+                confidence = min(0.9, 0.45 + 0.1 * len(overlap))
+            if title_overlap:
+                confidence = max(confidence, 0.4)
+            if confidence < MIN_CONFIDENCE:
+                continue
+            evidence = {
+                "matching_topics": sorted(overlap),
+                "title_overlap": title_overlap,
+                "repo_topics": sorted(repo_topics),
+            }
+            matches.append((confidence, repo.id, evidence))
+        matches.sort(key=lambda row: row[0], reverse=True)
+        for confidence, repo_id, evidence in matches[:MAX_MATCHES]:
+            links.append((paper.id, repo_id, confidence, evidence))
+    return links
+
+
+def _run(run: JobRun) -> None:
     session = SessionLocal()
     created = 0
     updated = 0
     try:
-        papers = session.query(Paper).all()
-        repositories = session.query(Repository).all()
-        repo_tokens_map = {
-            repo.id: _tokens(repo.full_name) | _tokens(repo.description)
-            for repo in repositories
-        }
-        for paper in papers:
-            if not (paper.keywords or paper.title):
-                continue
-            paper_tokens = _tokens(paper.title) | {
-                kw.lower() for kw in (paper.keywords or [])
+        with run.stage(DB_READ) as timing:
+            papers = session.query(Paper).all()
+            repositories = session.query(Repository).all()
+            existing = {
+                (link.paper_id, link.repo_id): link for link in session.query(PaperRepoLink)
             }
-            matches: list[tuple[float, int, dict]] = []
-            for repo in repositories:
-                repo_topics = {topic.lower() for topic in (repo.topics or [])}
-                overlap = paper_tokens & repo_topics
-                title_overlap = bool(paper_tokens & repo_tokens_map.get(repo.id, set()))
-                confidence = 0.0
-                if overlap:
-                    confidence = min(0.9, 0.45 + 0.1 * len(overlap))
-                if title_overlap:
-                    confidence = max(confidence, 0.4)
-                if confidence < MIN_CONFIDENCE:
-                    continue
-                evidence = {
-                    "matching_topics": sorted(overlap),
-                    "title_overlap": title_overlap,
-                    "repo_topics": sorted(repo_topics),
-                }
-                matches.append((confidence, repo.id, evidence))
-            matches.sort(key=lambda row: row[0], reverse=True)
-            for confidence, repo_id, evidence in matches[:MAX_MATCHES]:
-                before = (
-                    session.query(PaperRepoLink)
-                    .filter_by(paper_id=paper.id, repo_id=repo_id)
-                    .one_or_none()
-                )
-                _upsert_link(session, paper.id, repo_id, confidence, evidence)
-                if before:
+            timing.rows = len(papers) + len(repositories) + len(existing)
+        with run.stage(COMPUTE, rows=len(papers)):
+            links = _match_papers(papers, repositories)
+        with run.stage(DB_WRITE, rows=len(links)):
+            for paper_id, repo_id, confidence, evidence in links:
+                if _upsert_link(session, existing, paper_id, repo_id, confidence, evidence):
                     updated += 1
                 else:
                     created += 1
-        session.commit()
+            session.commit()
+        run.rows += len(papers)
     except Exception:
         session.rollback()
         raise
     finally:
         session.close()
         logger.info("Linking done (created=%d, updated=%d)", created, updated)
+
+
+if __name__ == "__main__":
+    main()
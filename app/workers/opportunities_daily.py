@@ -7,8 +7,11 @@ from sqlalchemy.orm import Session
 
 from app.db.models import Opportunity, Paper, PaperRepoLink
 from app.db.session import SessionLocal
+from app.lib.job_metrics import COMPUTE, DB_READ, DB_WRITE, JobRun, job_run
+from app.services.embedding_store import has_embedding
 
 logger = logging.getLogger(__name__)
+JOB_NAME = "opportunities_daily"
 TOP_K_PER_DOMAIN = 5
 MIN_COMPOSITE_SCORE = 0.65
 DEDUP_WEEKS = 4
@@ -89,9 +92,19 @@ def _generate_investment_thesis(paper: Paper) -> str:
     return " | ".join(thesis_parts)
 
 
-def _related_repositories(session: Session, paper_id: int) -> Sequence[int]:
-    rows = session.query(PaperRepoLink.repo_id).filter_by(paper_id=paper_id).all()
-    return [row.repo_id for row in rows]
+def _related_repositories(session: Session, paper_ids: Sequence[int]) -> dict[int, list[int]]:
+    """Linked repository ids of each paper, in one query."""
+    related: dict[int, list[int]] = {paper_id: [] for paper_id in paper_ids}
+    if not paper_ids:
+        return related
+    rows = (
+        session.query(PaperRepoLink.paper_id, PaperRepoLink.repo_id)
+        .filter(PaperRepoLink.paper_id.in_(paper_ids))
+        .all()
+    )
+    for row in rows:
+        related[row.paper_id].append(row.repo_id)
+    return related
 
 
 def _get_recently_selected_papers(session: Session, domain: str, week_of: datetime.date) -> set[int]:
@@ -114,78 +127,103 @@ def _get_recently_selected_papers(session: Session, domain: str, week_of: dateti
 
 
 def main() -> None:
+    with job_run(JOB_NAME) as run:
+        _run(run)
+
+
+def _run(run: JobRun) -> None:
     session = SessionLocal()
     today = datetime.utcnow().date()
     # Weekly freeze: Monday 00:00 UTC
     week_of = today - timedelta(days=today.weekday())
-    
+
     try:
-        papers = (
-            session.query(Paper)
-            .filter(
-                Paper.embedding.is_not(None),
-                Paper.domain.is_not(None),
-                Paper.composite_score.is_not(None),
-                Paper.composite_score >= MIN_COMPOSITE_SCORE
+        with run.stage(DB_READ) as timing:
+            papers = (
+                session.query(Paper)
+                .filter(
+                    has_embedding(),
+                    Paper.domain.is_not(None),
+                    Paper.composite_score.is_not(None),
+                    Paper.composite_score >= MIN_COMPOSITE_SCORE
+                )
+                .all()
             )
-            .all()
-        )
-        
-        domain_groups: dict[str, list[Paper]] = {}
-        for paper in papers:
-            domain = paper.domain or "other"
-            domain_groups.setdefault(domain, []).append(paper)
-        
-        for domain, group in domain_groups.items():
+            timing.rows = len(papers)
+            domain_groups: dict[str, list[Paper]] = {}
+            for paper in papers:
+                domain = paper.domain or "other"
+                domain_groups.setdefault(domain, []).append(paper)
             # Get recently selected papers for deduplication
-            recently_selected = _get_recently_selected_papers(session, domain, week_of)
-            
-            # Filter out recently selected papers
-            candidates = [p for p in group if p.id not in recently_selected]
-            
-            # Sort by composite score
-            candidates.sort(key=lambda p: p.composite_score or 0.0, reverse=True)
-            
+            recently_selected = {
+                domain: _get_recently_selected_papers(session, domain, week_of)
+                for domain in domain_groups
+            }
+
+        with run.stage(COMPUTE, rows=len(papers)):
+            selected: dict[str, list[Paper]] = {}
+            for domain, group in domain_groups.items():
+                # Filter out recently selected papers, then sort by composite score
+                candidates = [p for p in group if p.id not in recently_selected[domain]]
+                candidates.sort(key=lambda p: p.composite_score or 0.0, reverse=True)
+                selected[domain] = candidates[:TOP_K_PER_DOMAIN]
+
+        with run.stage(DB_READ) as timing:
+            related_repos = _related_repositories(
+                session, [paper.id for top in selected.values() for paper in top]
+            )
+            timing.rows = len(related_repos)
+
+        with run.stage(COMPUTE, rows=len(related_repos)):
+            opportunities = []
+            for domain, top in selected.items():
+                for rank, paper in enumerate(top, start=1):
+                    slug = (
+                        f"{domain.lower().replace('.', '-')}-{week_of.isoformat()}-{rank}"
+                    )
+
+                    composite_score = paper.composite_score or 0.0
+                    recommendation = _get_recommendation_tier(composite_score)
+
+                    component_scores = {
+                        "composite": composite_score,
+                        "moat": paper.moat_score,
+                        "scalability": paper.scalability_score,
+                        "attention_gap": paper.attention_gap_score,
+                        "network": paper.network_score,
+                    }
+
+                    opportunities.append(
+                        Opportunity(
+                            slug=slug,
+                            domain=domain,
+                            score=composite_score,
+                            component_scores=component_scores,
+                            recommendation=recommendation,
+                            key_papers=[paper.id],
+                            related_repos=related_repos[paper.id],
+                            executive_summary=_generate_executive_summary(paper),
+                            investment_thesis=_generate_investment_thesis(paper),
+                            week_of=week_of,
+                        )
+                    )
+
+        with run.stage(DB_WRITE, rows=len(opportunities)):
             # Clear existing opportunities for this week/domain
-            session.query(Opportunity).filter_by(
-                domain=domain, week_of=week_of
-            ).delete()
-            
-            # Create top K opportunities
-            for rank, paper in enumerate(candidates[:TOP_K_PER_DOMAIN], start=1):
-                slug = (
-                    f"{domain.lower().replace('.', '-')}-{week_of.isoformat()}-{rank}"
-                )
-                
-                composite_score = paper.composite_score or 0.0
-                recommendation = _get_recommendation_tier(composite_score)
-                
-                component_scores = {
-                    "composite": composite_score,
-                    "moat": paper.moat_score,
-                    "scalability": paper.scalability_score,
-                    "attention_gap": paper.attention_gap_score,
-                    "network": paper.network_score,
-                }
-                
-                opportunity = Opportunity(
-                    slug=slug,
-                    domain=domain,
-                    score=composite_score,
-                    component_scores=component_scores,
-                    recommendation=recommendation,
-                    key_papers=[paper.id],
-                    related_repos=list(_related_repositories(session, paper.id)),
-                    executive_summary=_generate_executive_summary(paper),
-                    investment_thesis=_generate_investment_thesis(paper),
-                    week_of=week_of,
-                )
-                session.add(opportunity)
-        
-        session.commit()
+            for domain in selected:
+                session.query(Opportunity).filter_by(
+                    domain=domain, week_of=week_of
+                ).delete()
+            session.add_all(opportunities)
+            session.commit()
+        run.rows += len(papers)
     except Exception:
         session.rollback()
         raise
     finally:
         session.close()
         logger.info("Opportunity run complete for week %s", week_of.isoformat())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import UTC, datetime
+
+from sqlalchemy import delete, exists, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import JobWatermark, Paper, PaperEmbedding, PaperNeighbor
+from app.db.session import SessionLocal
+from app.lib.job_metrics import COMPUTE, DB_READ, DB_WRITE, JobRun, job_run
+from app.services.corpus_version import bump_corpus_version
+from app.services.embedding_store import has_embedding, in_column, load_embeddings, read_model
+from app.services.vector_search import search_many_by_vector, set_ef_search
+
+logger = logging.getLogger(__name__)
+JOB_NAME = "paper_neighbors"
+# pgvector's default; an HNSW scan returns at most ef_search rows
+MIN_EF_SEARCH = 40
+
+NeighborLists = dict[int, list[tuple[int, float]]]
+
+
+def _chunks(ids: Sequence[int], size: int) -> Iterator[list[int]]:
+    for start in range(0, len(ids), size):
+        yield list(ids[start : start + size])
+
+
+def _dirty_ids(session: Session, model: str, since: datetime | None) -> list[int]:
+    """Papers to recompute: all of them, or those re-embedded since ``since`` or not in the graph."""
+    query = select(Paper.id).where(has_embedding(model))
+    if since is not None:
+        missing = ~exists().where(PaperNeighbor.paper_id == Paper.id, PaperNeighbor.model == model)
+        # Only embedding writes count: papers.updated_at also moves on every score write
+        if in_column(model):
+            changed = Paper.embedded_at > since
+        else:
+            changed = exists().where(
+                PaperEmbedding.paper_id == Paper.id,
+                PaperEmbedding.model == model,
+                PaperEmbedding.updated_at > since,
+            )
+        query = query.where(or_(changed, missing))
+    return list(session.execute(query.order_by(Paper.id)).scalars())
+
+
+def _search(session: Session, paper_ids: list[int], model: str, k: int) -> NeighborLists:
+    """Each paper's ``k`` nearest other papers, in one batched index search."""
+    vectors = load_embeddings(session, paper_ids, model)
+    found = [paper_id for paper_id in paper_ids if paper_id in vectors]
+    # One extra row per paper, since a paper is its own nearest neighbor
+    set_ef_search(session, max(MIN_EF_SEARCH, k + 1))
+    batch = search_many_by_vector(session, [vectors[i].tolist() for i in found], k + 1, model=model)
+    return {
+        paper_id: [(hit["id"], hit["similarity"]) for hit in hits if hit["id"] != paper_id][:k]
+        for paper_id, hits in zip(found, batch, strict=True)
+    }
+
+
+def _reverse_neighbors(
+    session: Session, lists: NeighborLists, model: str, k: int, skip: set[int]
+) -> set[int]:
+    """
+    Papers outside ``skip`` whose lists may change because ``lists`` were recomputed.
+
+    These are papers that listed a recomputed paper (its vector may have
+    moved), and papers a recomputed paper is now close enough to enter:
+    similarity is symmetric, so it beats their current k-th neighbor.
+    """
+    if not lists:
+        return set()
+    affected = set(
+        session.execute(
+            select(PaperNeighbor.paper_id)
+            .where(PaperNeighbor.neighbor_id.in_(list(lists)), PaperNeighbor.model == model)
+            .distinct()
+        ).scalars()
+    )
+    closest: dict[int, float] = {}
+    for neighbors in lists.values():
+        for neighbor_id, similarity in neighbors:
+            if neighbor_id not in skip:
+                closest[neighbor_id] = max(similarity, closest.get(neighbor_id, -1.0))
+    if closest:
+        for paper_id, count, weakest in session.execute(
+            select(PaperNeighbor.paper_id, func.count(), func.min(PaperNeighbor.similarity))
+            .where(PaperNeighbor.paper_id.in_(list(closest)), PaperNeighbor.model == model)
+            .group_by(PaperNeighbor.paper_id)
+        ):
+            if count < k or closest[paper_id] > weakest:
+                affected.add(paper_id)
+    return affected - skip
+
+
+def _prune(session: Session, model: str) -> tuple[int, set[int]]:
+    """
+    Delete rows that are no longer part of the graph under ``model``.
+
+    These are the lists of other (retired) model versions, and the lists of
+    and entries for papers without a vector under ``model``. Rows of deleted
+    papers go with them (``ON DELETE CASCADE``). Returns the number of rows
+    deleted and the papers that lost a neighbor, whose lists must be recomputed.
+    """
+    retired = session.execute(delete(PaperNeighbor).where(PaperNeighbor.model != model))
+    unembedded = select(Paper.id).where(~has_embedding(model))
+    removed = session.execute(
+        delete(PaperNeighbor).where(
+            PaperNeighbor.model == model, PaperNeighbor.paper_id.in_(unembedded)
+        )
+    )
+    shortened = set(
+        session.execute(
+            delete(PaperNeighbor)
+            .where(PaperNeighbor.model == model, PaperNeighbor.neighbor_id.in_(unembedded))
+            .returning(PaperNeighbor.paper_id)
+        ).scalars()
+    )
+    return retired.rowcount + removed.rowcount + len(shortened), shortened
+
+
+def _write(session: Session, lists: NeighborLists, model: str) -> None:
+    session.execute(
+        delete(PaperNeighbor).where(
+            PaperNeighbor.paper_id.in_(list(lists)), PaperNeighbor.model == model
+        )
+    )
+    rows = [
+        {
+            "paper_id": paper_id,
+            "model": model,
+            "rank": rank,
+            "neighbor_id": neighbor_id,
+            "similarity": similarity,
+        }
+        for paper_id, neighbors in lists.items()
+        for rank, (neighbor_id, similarity) in enumerate(neighbors)
+    ]
+    if rows:
+        session.execute(insert(PaperNeighbor), rows)
+
+
+def main(full: bool = False) -> None:
+    """
+    Maintain the top-K neighbor list of every paper under the read model.
+
+    Only papers re-embedded since the last run (or missing from the graph) are
+    searched, plus their reverse neighbors: papers that listed them, and
+    papers they now rank above the current K-th neighbor. Each chunk of
+    ``NEIGHBORS_CHUNK_SIZE`` papers is one batched index search and one
+    replace of their rows. Lists of retired models and of papers that lost
+    their vector are deleted first. ``full``, or a change of read model or
+    ``NEIGHBORS_K``, rebuilds the whole graph.
+    """
+    with job_run(JOB_NAME) as run:
+        _run(run, full)
+
+
+def _recompute(
+    run: JobRun,
+    session: Session,
+    paper_ids: Iterable[int],
+    model: str,
+    k: int,
+    reverse_skip: set[int] | None,
+) -> set[int]:
+    """Recompute ``paper_ids`` chunk by chunk; returns their reverse neighbors if asked for."""
+    affected: set[int] = set()
+    for chunk in _chunks(list(paper_ids), settings.neighbors_chunk_size):
+        with run.stage(COMPUTE, rows=len(chunk)):
+            lists = _search(session, chunk, model, k)
+        if reverse_skip is not None:
+            with run.stage(DB_READ, rows=len(lists)):
+                affected |= _reverse_neighbors(session, lists, model, k, reverse_skip)
+        with run.stage(DB_WRITE, rows=len(lists)):
+            _write(session, lists, model)
+            session.commit()
+        run.rows += len(lists)
+    return affected
+
+
+def _run(run: JobRun, full: bool) -> None:
+    model = read_model()
+    k = settings.neighbors_k
+    started = datetime.now(UTC)
+    session = SessionLocal()
+    try:
+        row = session.get(JobWatermark, JOB_NAME)
+        # A new read model or K invalidates every stored list
+        incremental = not full and row is not None and row.state == {"model": model, "k": k}
+        since = row.watermark if row is not None and incremental else None
+        with run.stage(DB_WRITE) as timing:
+            pruned, shortened = _prune(session, model)
+            session.commit()
+            timing.rows = pruned
+        with run.stage(DB_READ) as timing:
+            dirty = _dirty_ids(session, model, since)
+            timing.rows = len(dirty)
+
+        dirty_set = set(dirty)
+        affected = _recompute(run, session, dirty, model, k, dirty_set if incremental else None)
+        if incremental:
+            affected |= shortened - dirty_set
+        _recompute(run, session, sorted(affected), model, k, None)
+
+        if not row:
+            row = JobWatermark(job=JOB_NAME, watermark=started)
+            session.add(row)
+        row.watermark = started
+        row.state = {"model": model, "k": k}
+        if dirty or affected or pruned:
+            bump_corpus_version(session)
+        session.commit()
+        logger.info(
+            "Neighbor graph for %s: %d changed papers, %d reverse neighbors recomputed, "
+            "%d rows pruned",
+            model,
+            len(dirty),
+            len(affected),
+            pruned,
+        )
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain the paper nearest-neighbor graph")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every paper's neighbors",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(full=args.full)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import JobWatermark, Paper
+from app.db.session import SessionLocal, engine
+from app.lib.job_metrics import DB_READ, DB_WRITE, EMBED, JobRun, job_run
+from app.services.corpus_version import bump_corpus_version
+from app.services.embedding_store import (
+    create_model_index,
+    in_column,
+    read_model,
+    report_index_progress,
+    write_embeddings,
+    write_model,
+)
+from app.services.embeddings import EmbeddingService, embedding_text
+
+logger = logging.getLogger(__name__)
+JOB_NAME = "reembed_backfill"
+
+
+@dataclass
+class Checkpoint:
+    """Progress of a backfill towards ``model``, persisted after every written chunk."""
+
+    model: str
+    last_id: int = 0
+    high_id: int = 0
+    rows: int = 0
+    complete: bool = False
+
+    @classmethod
+    def from_state(cls, state: dict | None, model: str) -> Checkpoint:
+        # A checkpoint left by a backfill to another model does not apply
+        if not state or state.get("model") != model:
+            return cls(model)
+        return cls(
+            model,
+            int(state.get("last_id", 0)),
+            int(state.get("high_id", 0)),
+            int(state.get("rows", 0)),
+            bool(state.get("complete", False)),
+        )
+
+    def state(self) -> dict:
+        return {
+            "model": self.model,
+            "last_id": self.last_id,
+            "high_id": self.high_id,
+            "rows": self.rows,
+            "complete": self.complete,
+        }
+
+
+def _load_checkpoint(session: Session, model: str) -> Checkpoint:
+    row = session.get(JobWatermark, JOB_NAME)
+    return Checkpoint.from_state(row.state if row else None, model)
+
+
+def _save_checkpoint(session: Session, checkpoint: Checkpoint) -> None:
+    row = session.get(JobWatermark, JOB_NAME)
+    if not row:
+        row = JobWatermark(job=JOB_NAME, watermark=datetime.now(UTC))
+        session.add(row)
+    row.watermark = datetime.now(UTC)
+    row.state = checkpoint.state()
+
+
+def _read_chunks(
+    session: Session, after_id: int, high_id: int, chunk_size: int
+) -> Iterator[tuple[list[int], list[str]]]:
+    """Papers with ``after_id < id <= high_id`` in id order, by keyset pagination."""
+    while True:
+        rows = session.execute(
+            select(Paper.id, Paper.title, Paper.abstract, Paper.external_id)
+            .where(Paper.id > after_id, Paper.id <= high_id)
+            .order_by(Paper.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield (
+            [row.id for row in rows],
+            [embedding_text(row.title, row.abstract) or row.external_id or "" for row in rows],
+        )
+        after_id = rows[-1].id
+
+
+def _init_worker(threads: int) -> None:
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+    with contextlib.suppress(ImportError):
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def _embed_chunk(ids: list[int], texts: list[str]) -> tuple[list[int], np.ndarray]:
+    # Each pool process loads the model once, on its first chunk
+    return ids, EmbeddingService.get().embed_many(texts)
+
+
+def _build_index(model: str) -> None:
+    """Build the model's partial HNSW index in the background of live traffic."""
+    if in_column(model):
+        return
+    autocommit = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    with report_index_progress(engine, "paper_embeddings"), autocommit as connection:
+        name = create_model_index(connection, model, settings.embedding_dim)
+    logger.info("Index %s ready for %s", name, model)
+
+
+class Throttle:
+    """Sleep between chunks so writes stay under ``max_rows_per_second`` (0: unlimited)."""
+
+    def __init__(self, max_rows_per_second: float, clock=time.monotonic, sleep=time.sleep):
+        self.max_rows_per_second = max_rows_per_second
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._rows = 0
+
+    def wait(self, rows: int) -> None:
+        self._rows += rows
+        if self.max_rows_per_second <= 0:
+            return
+        ahead = self._rows / self.max_rows_per_second - (self._clock() - self._started)
+        if ahead > 0:
+            self._sleep(ahead)
+
+
+def main(
+    restart: bool = False,
+    chunk_size: int | None = None,
+    workers: int | None = None,
+    max_rows_per_second: float | None = None,
+) -> None:
+    """
+    Re-embed every stored paper with the configured embedding model.
+
+    Papers are streamed in id order up to the highest id present at the start,
+    embedded ``chunk_size`` at a time on ``workers`` processes and written back
+    with one bulk statement per chunk, to ``papers.embedding`` or, for another
+    model version, to ``paper_embeddings``. The last written id is checkpointed
+    in the same transaction, so a crashed or interrupted run resumes where it
+    stopped; changing the model starts over, and rerunning a finished backfill
+    catches up on papers added since. Writes are throttled to
+    ``max_rows_per_second`` to leave the database to the API. Once complete,
+    the model's partial HNSW index is built concurrently; then point
+    ``EMBEDDING_READ_MODEL`` at the model to switch reads over.
+    """
+    with job_run(JOB_NAME) as run:
+        _run(run, restart, chunk_size, workers, max_rows_per_second)
+
+
+def _run(
+    run: JobRun,
+    restart: bool,
+    chunk_size: int | None,
+    workers: int | None,
+    max_rows_per_second: float | None,
+) -> None:
+    chunk_size = chunk_size or settings.reembed_chunk_size
+    workers = workers or settings.reembed_workers
+    if max_rows_per_second is None:
+        max_rows_per_second = settings.reembed_max_rows_per_second
+    throttle = Throttle(max_rows_per_second)
+    model = write_model()
+    # Only vectors of the model the API reads change what cached results hold
+    serving = model == read_model()
+    session = SessionLocal()
+    pool: ProcessPoolExecutor | None = None
+    checkpoint = Checkpoint(model)
+    try:
+        if not restart:
+            checkpoint = _load_checkpoint(session, model)
+        # A finished backfill catches up on papers ingested since under the old model
+        if checkpoint.complete or not checkpoint.high_id:
+            checkpoint.high_id = session.execute(select(func.max(Paper.id))).scalar() or 0
+            checkpoint.complete = False
+        if workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(max(1, (os.cpu_count() or 1) // workers),),
+            )
+
+        chunks = _read_chunks(session, checkpoint.last_id, checkpoint.high_id, chunk_size)
+        # Chunks are written in id order; a few are read ahead to keep every worker busy
+        pending: deque[Future | tuple[list[int], np.ndarray]] = deque()
+        read_ahead = 2 * workers if pool is not None else 1
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < read_ahead:
+                with run.stage(DB_READ) as timing:
+                    chunk = next(chunks, None)
+                    timing.rows = len(chunk[0]) if chunk else 0
+                if chunk is None:
+                    exhausted = True
+                elif pool is None:
+                    with run.stage(EMBED, rows=len(chunk[0])):
+                        pending.append(_embed_chunk(*chunk))
+                else:
+                    pending.append(pool.submit(_embed_chunk, *chunk))
+            if not pending:
+                break
+            item = pending.popleft()
+            if isinstance(item, Future):
+                with run.stage(EMBED) as timing:
+                    ids, matrix = item.result()
+                    timing.rows = len(ids)
+            else:
+                ids, matrix = item
+            with run.stage(DB_WRITE, rows=len(ids)):
+                write_embeddings(session, ids, matrix, model)
+                checkpoint.last_id = ids[-1]
+                checkpoint.rows += len(ids)
+                _save_checkpoint(session, checkpoint)
+                if serving:
+                    bump_corpus_version(session)
+                session.commit()
+            run.rows += len(ids)
+            throttle.wait(len(ids))
+
+        checkpoint.complete = True
+        _save_checkpoint(session, checkpoint)
+        session.commit()
+        _build_index(model)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        session.close()
+        logger.info(
+            "Re-embedding backfill for %s stopped at id %d of %d (%d rows, complete=%s)",
+            model,
+            checkpoint.last_id,
+            checkpoint.high_id,
+            checkpoint.rows,
+            checkpoint.complete,
+        )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-embed stored papers with EMBEDDING_MODEL")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and re-embed from the first paper",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Embedding processes (default: REEMBED_WORKERS)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Papers per read, embed and bulk update (default: REEMBED_CHUNK_SIZE)",
+    )
+    parser.add_argument(
+        "--max-rows-per-second",
+        type=float,
+        default=None,
+        help="Write rate limit, 0 for none (default: REEMBED_MAX_ROWS_PER_SECOND)",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(
+        restart=args.restart,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_rows_per_second=args.max_rows_per_second,
+    )
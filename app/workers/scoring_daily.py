@@ -1,197 +1,737 @@
+import argparse
 import logging
-from datetime import datetime, timedelta
-from statistics import mean, pstdev
-
-from app.db.models import DomainMetric, Paper, PaperRepoLink, Repository
-from app.db.session import SessionLocal
-from app.services.scoring import (
-    calculate_attention_gap_score,
-    calculate_composite_score,
-    calculate_moat_score,
-    calculate_network_score,
-    calculate_scalability_score,
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import TypeVar
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Query, Session, load_only, with_expression
+
+from app.config import settings
+from app.db.models import DomainMetric, JobWatermark, Paper, PaperRepoLink, Repository
+from app.db.session import SessionLocal, engine
+from app.lib.job_metrics import COMPUTE, DB_READ, DB_WRITE, JobRun, StageRecorder, job_run
+from app.services.corpus_version import bump_corpus_version
+from app.services.domain_stats import DomainStats, RunningStats
+from app.services.embedding_store import embedding_expr, has_embedding
+from app.services.score_frame import ScoreFrame
+from app.services.scoring import content_hash, score_batch
+from app.utils.vector import (
+    CentroidAccumulator,
+    momentum_score,
+    novelty_scores,
+    stack_vectors,
 )
-from app.utils.vector import centroid, cosine_similarity, momentum_score
 
 logger = logging.getLogger(__name__)
 WINDOW_DAYS = 7
+JOB_NAME = "scoring_daily"
+T = TypeVar("T")
+
+# Paper columns read by the scoring job, besides the read model's embedding;
+# evidence JSON is never loaded
+SCORING_COLUMNS = (
+    Paper.id,
+    Paper.title,
+    Paper.abstract,
+    Paper.keywords,
+    Paper.published_at,
+    Paper.moat_score,
+    Paper.scalability_score,
+    Paper.network_score,
+    Paper.attention_gap_score,
+    Paper.composite_score,
+    Paper.scored_content_hash,
+    Paper.scored_at,
+)
+
+
+def _stat_moved(previous: float | None, current: float, tolerance: float) -> bool:
+    """Whether a domain statistic moved by more than ``tolerance`` (relative, floored at 1)."""
+    if previous is None:
+        return True
+    return abs(current - previous) > tolerance * max(abs(previous), 1.0)
+
+
+def _domain_stats_moved(
+    previous: DomainMetric | None, current: dict[str, float], tolerance: float
+) -> bool:
+    if previous is None:
+        return True
+    return any(
+        _stat_moved(getattr(previous, name), value, tolerance)
+        for name, value in current.items()
+    )
+
+
+def _previous_metric(session: Session, domain: str) -> DomainMetric | None:
+    return (
+        session.query(DomainMetric)
+        .filter(DomainMetric.domain == domain)
+        .order_by(DomainMetric.window_end.desc())
+        .first()
+    )
+
+
+def _load_watermark(session: Session) -> JobWatermark | None:
+    return session.get(JobWatermark, JOB_NAME)
+
+
+def _save_watermark(session: Session, watermark: datetime, state: dict) -> None:
+    row = _load_watermark(session)
+    if not row:
+        row = JobWatermark(job=JOB_NAME, watermark=watermark)
+        session.add(row)
+    row.watermark = watermark
+    row.state = state
+
+
+def _domain_counts(session: Session) -> list[tuple[str, int]]:
+    rows = (
+        session.query(Paper.domain, func.count(Paper.id))
+        .filter(has_embedding(), Paper.domain.is_not(None))
+        .group_by(Paper.domain)
+        .order_by(Paper.domain)
+        .all()
+    )
+    return [(domain, int(count)) for domain, count in rows]
+
+
+def _domain_papers(session: Session, domain: str) -> Query:
+    """Papers of one domain, loading only the columns the scoring job reads."""
+    return (
+        session.query(Paper)
+        .options(
+            load_only(*SCORING_COLUMNS),
+            with_expression(Paper.read_embedding, embedding_expr()),
+        )
+        .filter(Paper.domain == domain, has_embedding())
+        .order_by(Paper.id)
+    )
+
+
+def _stream_chunks(session: Session, query: Query, chunk_size: int) -> Iterator[list[Paper]]:
+    """
+    Stream ORM objects from a server-side cursor in chunks of ``chunk_size``.
+
+    Once the caller is done with a chunk its objects are expunged, so the
+    identity map never holds more than one chunk.
+    """
+    chunk: list[Paper] = []
+    for paper in query.yield_per(chunk_size):
+        chunk.append(paper)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            _release(session, chunk)
+            chunk = []
+    if chunk:
+        yield chunk
+        _release(session, chunk)
+
+
+def _timed_reads(
+    chunks: Iterator[list[Paper]], stages: StageRecorder
+) -> Iterator[list[Paper]]:
+    """Record the time spent waiting on the cursor for each chunk as a DB read."""
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        stages.observe(DB_READ, time.perf_counter() - start, len(chunk))
+        yield chunk
+
+
+def _release(session: Session, chunk: list[Paper]) -> None:
+    for paper in chunk:
+        session.expunge(paper)
+
+
+def _domain_centroid(session: Session, domain: str, chunk_size: int) -> np.ndarray | None:
+    accumulator = CentroidAccumulator()
+    result = session.execute(
+        select(embedding_expr())
+        .select_from(Paper)
+        .where(Paper.domain == domain, has_embedding())
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        matrix, valid = stack_vectors([embedding for (embedding,) in partition], accumulator.dim)
+        accumulator.add_matrix(matrix, valid)
+    return accumulator.array()
+
+
+def _domain_attention(
+    session: Session, domain: str, since: datetime | None, chunk_size: int
+) -> tuple[dict[int, tuple[int, int]], set[int]]:
+    """
+    Collect (repo_stars, link_count) for every linked paper of a domain.
+
+    Also returns the ids of papers whose links, or linked repositories, changed
+    after ``since``.
+    """
+    attention: dict[int, tuple[int, int]] = {}
+    link_dirty: set[int] = set()
+    rows = (
+        session.query(
+            PaperRepoLink.paper_id,
+            PaperRepoLink.created_at,
+            Repository.stars,
+            Repository.updated_at,
+        )
+        .join(Repository, Repository.id == PaperRepoLink.repo_id)
+        .join(Paper, Paper.id == PaperRepoLink.paper_id)
+        .filter(Paper.domain == domain, has_embedding())
+        .yield_per(chunk_size)
+    )
+    for paper_id, created_at, stars, repo_updated_at in rows:
+        repo_stars, link_count = attention.get(paper_id, (0, 0))
+        attention[paper_id] = (repo_stars + (stars or 0), link_count + 1)
+        if since is not None and (
+            (created_at and created_at > since) or (repo_updated_at and repo_updated_at > since)
+        ):
+            link_dirty.add(paper_id)
+    return attention, link_dirty
+
+
+def _novelty_momentum(
+    chunk: list[Paper], domain_centroid: np.ndarray | None
+) -> tuple[np.ndarray, list[float]]:
+    """Novelty of a whole chunk in one matrix-vector product, and per-paper momentum."""
+    embeddings = [paper.read_embedding for paper in chunk]
+    dim = len(domain_centroid) if domain_centroid is not None else None
+    matrix, _ = stack_vectors(embeddings, dim)
+    novelty = novelty_scores(matrix, domain_centroid)
+    # Papers without an embedding have no novelty signal
+    novelty[[embedding is None for embedding in embeddings]] = 0.0
+    momentum = [momentum_score(paper.published_at) for paper in chunk]
+    return novelty, momentum
+
+
+def _score_papers(
+    papers: list[Paper],
+    novelty_scores: list[float],
+    momentum_scores: list[float],
+    attention: dict[int, tuple[int, int]],
+    attention_stats: RunningStats,
+    scored_at: datetime,
+) -> list[dict]:
+    """Score ``papers`` with ``score_batch`` and return one UPDATE parameter set per paper."""
+    scoring_inputs: list[dict] = []
+    for idx, paper in enumerate(papers):
+        repo_stars, link_count = attention.get(paper.id, (0, 0))
+        # Network score uses authors once they are ingested; None for now
+        scoring_inputs.append(
+            {
+                "title": paper.title,
+                "abstract": paper.abstract,
+                "keywords": paper.keywords,
+                "authors": None,
+                "novelty": novelty_scores[idx],
+                "momentum": momentum_scores[idx],
+                "repo_stars": repo_stars,
+                "link_count": link_count,
+            }
+        )
+    batch = score_batch(
+        scoring_inputs, attention_stats=attention_stats
+    )
+    return [
+        {
+            "id": paper.id,
+            "moat_score": float(batch.moat[row]),
+            "moat_evidence": batch.moat_evidence[row],
+            "scalability_score": float(batch.scalability[row]),
+            "scalability_evidence": batch.scalability_evidence[row],
+            "network_score": float(batch.network[row]),
+            "network_evidence": batch.network_evidence[row],
+            "attention_gap_score": float(batch.attention_gap[row]),
+            "attention_gap_evidence": batch.attention_gap_evidence[row],
+            "composite_score": float(batch.composite[row]),
+            "scoring_metadata": batch.scoring_metadata[row],
+            "scored_content_hash": content_hash(paper.title, paper.abstract, paper.keywords),
+            "scored_at": scored_at,
+        }
+        for row, paper in enumerate(papers)
+    ]
+
+
+def _write_scores(session: Session, rows: list[dict]) -> None:
+    """
+    Write score rows with one bulk UPDATE by primary key and commit.
+
+    The ORM bulk path sends the whole list as a single executemany, and
+    committing per chunk keeps row locks short instead of holding them on the
+    whole ``papers`` table until the end of the run.
+    """
+    if not rows:
+        return
+    session.execute(update(Paper), rows)
+    session.commit()
+
+
+@dataclass
+class DomainPlan:
+    """Domain-wide inputs shared by every shard of a domain."""
+
+    domain: str
+    paper_count: int
+    centroid: np.ndarray | None
+    attention: dict[int, tuple[int, int]]
+    link_dirty: set[int]
+    attention_stats: RunningStats
+    shards: list[tuple[int | None, int | None]]
+    stages: list[tuple[str, float, int]] = field(default_factory=list)
+
+
+@dataclass
+class ShardResult:
+    """Component scores of one shard and the number of papers rescored."""
+
+    domain: str
+    frame: ScoreFrame
+    stats: DomainStats
+    rescored: int = 0
+    stages: list[tuple[str, float, int]] = field(default_factory=list)
+
+
+@dataclass
+class RunOptions:
+    full: bool
+    since: datetime | None
+    scored_at: datetime
+    stale_before: datetime
+    chunk_size: int
+    shard_size: int
+
+
+def _shard_bounds(
+    session: Session, domain: str, paper_count: int, shard_size: int
+) -> list[tuple[int | None, int | None]]:
+    """Split a domain into ``[low, high)`` paper id ranges of about ``shard_size`` papers."""
+    if paper_count <= shard_size:
+        return [(None, None)]
+    numbered = (
+        select(Paper.id, func.row_number().over(order_by=Paper.id).label("rn"))
+        .where(Paper.domain == domain, has_embedding())
+        .subquery()
+    )
+    starts = [
+        row.id
+        for row in session.execute(
+            select(numbered.c.id)
+            .where((numbered.c.rn - 1) % shard_size == 0)
+            .order_by(numbered.c.id)
+        )
+    ]
+    lows: list[int | None] = [None, *starts[1:]]
+    highs: list[int | None] = [*starts[1:], None]
+    return list(zip(lows, highs, strict=True))
+
+
+def _plan_domain(domain: str, paper_count: int, options: RunOptions) -> DomainPlan:
+    """Compute the centroid, attention statistics and shards of one domain."""
+    stages = StageRecorder()
+    session = SessionLocal()
+    try:
+        with stages.stage(DB_READ, rows=paper_count):
+            domain_centroid = _domain_centroid(session, domain, options.chunk_size)
+
+            # Attention statistics cover every paper; unlinked papers have zero attention
+            attention, link_dirty = _domain_attention(
+                session, domain, options.since, options.chunk_size
+            )
+            shards = _shard_bounds(session, domain, paper_count, options.shard_size)
+        attention_stats = RunningStats.from_values(
+            [repo_stars + link_count * 10 for repo_stars, link_count in attention.values()]
+        ).merge(RunningStats.constant(0, paper_count - len(attention)))
+
+        return DomainPlan(
+            domain=domain,
+            paper_count=paper_count,
+            centroid=domain_centroid,
+            attention=attention,
+            link_dirty=link_dirty,
+            attention_stats=attention_stats,
+            shards=shards,
+            stages=stages.observations,
+        )
+    finally:
+        session.close()
 
 
-def main() -> None:
+def _shard_papers(session: Session, plan: DomainPlan, shard: int) -> Query:
+    low, high = plan.shards[shard]
+    query = _domain_papers(session, plan.domain)
+    if low is not None:
+        query = query.filter(Paper.id >= low)
+    if high is not None:
+        query = query.filter(Paper.id < high)
+    return query
+
+
+def _chunk_frame(plan: DomainPlan, chunk: list[Paper]) -> ScoreFrame:
+    """Frame of a chunk with fresh novelty, momentum and attention, and stored scores."""
+    novelty, momentum = _novelty_momentum(chunk, plan.centroid)
+    attention = [plan.attention.get(paper.id, (0, 0)) for paper in chunk]
+    columns = {
+        "novelty": novelty,
+        "momentum": momentum,
+        "attention_raw": [stars + links * 10 for stars, links in attention],
+        "moat": [paper.moat_score or 0.0 for paper in chunk],
+        "scalability": [paper.scalability_score or 0.0 for paper in chunk],
+        "network": [paper.network_score or 0.0 for paper in chunk],
+        "attention_gap": [paper.attention_gap_score or 0.0 for paper in chunk],
+        "composite": [paper.composite_score or 0.0 for paper in chunk],
+    }
+    return ScoreFrame(
+        plan.domain,
+        np.array([paper.id for paper in chunk], dtype=np.int64),
+        {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()},
+    )
+
+
+def _rescore(
+    write_session: Session,
+    plan: DomainPlan,
+    frame: ScoreFrame,
+    papers: list[Paper],
+    options: RunOptions,
+    stages: StageRecorder,
+    stats: DomainStats | None = None,
+) -> DomainStats | None:
+    """
+    Score ``papers`` from their frame novelty and momentum, write them and update the frame.
+
+    When running ``stats`` are given, returns them updated for the changed scores
+    without another pass over the shard.
+    """
+    paper_ids = [paper.id for paper in papers]
+    previous = frame.stat_columns(paper_ids) if stats is not None else None
+    with stages.stage(COMPUTE, rows=len(papers)):
+        rows = _score_papers(
+            papers,
+            frame.get("novelty", paper_ids).tolist(),
+            frame.get("momentum", paper_ids).tolist(),
+            plan.attention,
+            plan.attention_stats,
+            options.scored_at,
+        )
+    with stages.stage(DB_WRITE, rows=len(rows)):
+        _write_scores(write_session, rows)
+    frame.assign(
+        paper_ids,
+        moat=[row["moat_score"] for row in rows],
+        scalability=[row["scalability_score"] for row in rows],
+        network=[row["network_score"] for row in rows],
+        attention_gap=[row["attention_gap_score"] for row in rows],
+        composite=[row["composite_score"] for row in rows],
+    )
+    if stats is None or previous is None:
+        return None
+    return stats.replace_columns(previous, frame.stat_columns(paper_ids))
+
+
+def _score_shard(plan: DomainPlan, shard: int, options: RunOptions) -> ShardResult:
+    """
+    Build the score frame of one shard, rescoring the papers that need it.
+
+    Uses its own sessions so shards can run in separate processes.
+    """
+    frames: list[ScoreFrame] = []
+    stats = DomainStats()
+    stages = StageRecorder()
+    rescored = 0
+    # Reads stream through ``session``; scores are written and committed in chunks on
+    # ``write_session`` so commits never close the open server-side cursor
+    session = SessionLocal()
+    write_session = SessionLocal()
+    try:
+        query = _shard_papers(session, plan, shard)
+        chunks = _stream_chunks(session, query, options.chunk_size)
+        for chunk in _timed_reads(chunks, stages):
+            with stages.stage(COMPUTE):
+                frame = _chunk_frame(plan, chunk)
+                dirty = [
+                    paper
+                    for paper in chunk
+                    if options.full
+                    or paper.composite_score is None
+                    or paper.id in plan.link_dirty
+                    or paper.scored_at is None
+                    or paper.scored_at < options.stale_before
+                    or paper.scored_content_hash
+                    != content_hash(paper.title, paper.abstract, paper.keywords)
+                ]
+            if dirty:
+                _rescore(write_session, plan, frame, dirty, options, stages)
+            rescored += len(dirty)
+            frames.append(frame)
+            stats = stats.merge(frame.stats())
+        return ShardResult(
+            plan.domain,
+            ScoreFrame.concat(plan.domain, frames),
+            stats,
+            rescored,
+            stages.observations,
+        )
+    except Exception:
+        write_session.rollback()
+        raise
+    finally:
+        session.close()
+        write_session.close()
+
+
+def _rescore_remaining(
+    plan: DomainPlan, shard: int, result: ShardResult, options: RunOptions
+) -> ShardResult:
+    """
+    Rescore the papers of a shard that were not already scored in this run.
+
+    Only papers held by the shard's frame are rescored; papers ingested or
+    embedded since the first pass are left to the next run.
+    """
+    frame = result.frame
+    if not len(frame):
+        return result
+    stats = result.stats
+    rescored = result.rescored
+    stages = StageRecorder(list(result.stages))
+    session = SessionLocal()
+    write_session = SessionLocal()
+    try:
+        query = _shard_papers(session, plan, shard).filter(
+            Paper.id <= int(frame.ids[-1]),
+            Paper.scored_at.is_distinct_from(options.scored_at),
+        )
+        chunks = _stream_chunks(session, query, options.chunk_size)
+        for chunk in _timed_reads(chunks, stages):
+            held = frame.contains([paper.id for paper in chunk])
+            chunk = [paper for paper, known in zip(chunk, held, strict=True) if known]
+            if not chunk:
+                continue
+            stats = _rescore(write_session, plan, frame, chunk, options, stages, stats) or stats
+            rescored += len(chunk)
+        return ShardResult(plan.domain, frame, stats, rescored, stages.observations)
+    except Exception:
+        write_session.rollback()
+        raise
+    finally:
+        session.close()
+        write_session.close()
+
+
+def _merged_stats(results: list[ShardResult]) -> DomainStats:
+    stats = DomainStats()
+    for result in results:
+        stats = stats.merge(result.stats)
+    return stats
+
+
+def _moved_stats(stats: DomainStats) -> dict[str, float]:
+    """Statistics whose drift forces a domain-wide rescore."""
+    summary = stats.summary()
+    return {
+        name: summary[name]
+        for name in ("novelty_mu", "novelty_sigma", "attention_mu", "attention_sigma")
+    }
+
+
+def _init_worker() -> None:
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def _starmap(pool: Executor | None, fn: Callable[..., T], args: list[tuple]) -> list[T]:
+    """Run ``fn`` over ``args`` on the pool, or in-process when there is no pool."""
+    if pool is None:
+        return [fn(*item) for item in args]
+    return list(pool.map(fn, *zip(*args, strict=True))) if args else []
+
+
+def _store_domain_metric(
+    session: Session,
+    domain: str,
+    stats: DomainStats,
+    window_start: datetime,
+    window_end: datetime,
+) -> DomainMetric:
+    repo_ids = {
+        row.repo_id
+        for row in (
+            session.query(PaperRepoLink.repo_id)
+            .join(Paper, PaperRepoLink.paper_id == Paper.id)
+            .filter(Paper.domain == domain)
+        )
+    }
+    metric = (
+        session.query(DomainMetric)
+        .filter_by(domain=domain, window_start=window_start, window_end=window_end)
+        .one_or_none()
+    )
+    if not metric:
+        metric = DomainMetric(domain=domain, window_start=window_start, window_end=window_end)
+        session.add(metric)
+
+    metric.repo_count = len(repo_ids)
+    stats.apply_to(metric)
+    return metric
+
+
+def main(
+    full: bool = False,
+    chunk_size: int | None = None,
+    workers: int | None = None,
+) -> None:
+    """
+    Score papers and refresh per-domain statistics.
+
+    Papers are streamed per domain from a server-side cursor in chunks of
+    ``chunk_size`` (``SCORING_BATCH_SIZE``), so peak memory does not grow with
+    the corpus. Each chunk's scores are written back with one bulk UPDATE and
+    committed before the next chunk is read.
+
+    Domains are independent, so with ``workers`` > 1 (``SCORING_WORKERS``) they
+    are planned and scored on a process pool, with domains larger than
+    ``SCORING_SHARD_SIZE`` split into paper id ranges. Every shard computes
+    exactly what the serial run computes, and shard results are merged in id
+    order.
+
+    By default only papers that changed since the persisted watermark are
+    rescored: new or edited title/abstract/keywords (content hash), new links
+    or linked repositories whose stars changed, scores older than
+    ``SCORING_MAX_STALENESS_DAYS``, and every paper of a domain whose statistics
+    moved by more than ``SCORING_STATS_TOLERANCE``. Pass ``full=True`` after
+    changing weights or lexicons to rescore everything.
+    """
+    with job_run(JOB_NAME) as run:
+        _run(run, full, chunk_size, workers)
+
+
+def _run(run: JobRun, full: bool, chunk_size: int | None, workers: int | None) -> None:
+    workers = workers or settings.scoring_workers
     session = SessionLocal()
     window_end = datetime.utcnow()
     window_start = window_end - timedelta(days=WINDOW_DAYS)
+    scored_at = window_end.replace(tzinfo=UTC)
+    rescored = 0
+    total = 0
+    pool: Executor | None = None
     try:
-        papers = (
-            session.query(Paper)
-            .filter(Paper.embedding.is_not(None), Paper.domain.is_not(None))
-            .all()
+        watermark = _load_watermark(session)
+        since = watermark.watermark if watermark and not full else None
+        if since is None:
+            full = True
+        options = RunOptions(
+            full=full,
+            since=since,
+            scored_at=scored_at,
+            stale_before=scored_at - timedelta(days=settings.scoring_max_staleness_days),
+            chunk_size=chunk_size or settings.scoring_batch_size,
+            shard_size=settings.scoring_shard_size,
         )
-        domain_groups: dict[str, list[Paper]] = {}
-        for paper in papers:
-            domain = paper.domain or "unknown"
-            domain_groups.setdefault(domain, []).append(paper)
-        
-        # First pass: compute raw scores and collect domain statistics
-        for domain, group in domain_groups.items():
-            vectors = [paper.embedding for paper in group if paper.embedding]
-            domain_centroid = centroid(vectors)
-            novelty_scores: list[float] = []
-            momentum_scores: list[float] = []
-            moat_scores: list[float] = []
-            scalability_scores: list[float] = []
-            attention_raw_scores: list[float] = []
-            network_scores: list[float] = []
-            
-            # Pre-fetch all paper-repo links and repository stars for this domain to avoid N+1 queries
-            paper_ids = [paper.id for paper in group]
-            
-            # Fetch all links for papers in this domain
-            all_links = session.query(PaperRepoLink).filter(
-                PaperRepoLink.paper_id.in_(paper_ids)
-            ).all()
-            
-            # Build a mapping of paper_id -> list of repo_ids
-            paper_to_repos: dict[int, list[int]] = {}
-            for link in all_links:
-                paper_to_repos.setdefault(link.paper_id, []).append(link.repo_id)
-            
-            # Get all unique repo IDs and fetch their stars in one query
-            all_repo_ids = list({link.repo_id for link in all_links})
-            repo_stars_map: dict[int, int] = {}
-            if all_repo_ids:
-                repos = session.query(Repository.id, Repository.stars).filter(
-                    Repository.id.in_(all_repo_ids)
-                ).all()
-                repo_stars_map = {repo_id: stars or 0 for repo_id, stars in repos}
-            
-            for paper in group:
-                # Novelty score
-                novelty = 0.0
-                if paper.embedding and domain_centroid:
-                    similarity = cosine_similarity(paper.embedding, domain_centroid)
-                    novelty = max(0.0, min(1.0, 1 - similarity))
-                novelty_scores.append(novelty)
-                
-                # Momentum score
-                momentum = momentum_score(paper.published_at)
-                momentum_scores.append(momentum)
-                
-                # Moat score
-                moat, moat_evidence = calculate_moat_score(
-                    paper.title,
-                    paper.abstract,
-                    paper.keywords
-                )
-                paper.moat_score = moat
-                paper.moat_evidence = moat_evidence
-                moat_scores.append(moat)
-                
-                # Scalability score
-                scalability, scalability_evidence = calculate_scalability_score(
-                    paper.title,
-                    paper.abstract,
-                    paper.keywords
-                )
-                paper.scalability_score = scalability
-                paper.scalability_evidence = scalability_evidence
-                scalability_scores.append(scalability)
-                
-                # Get repo stars for attention calculation using pre-fetched data
-                repo_ids = paper_to_repos.get(paper.id, [])
-                link_count = len(repo_ids)
-                repo_stars = sum(repo_stars_map.get(repo_id, 0) for repo_id in repo_ids)
-                
-                attention_raw_scores.append(repo_stars + link_count * 10)
-                
-                # Network score (simplified - just count authors for now)
-                # In a real implementation, we'd parse authors from the paper
-                # For now, use a placeholder
-                network, network_evidence = calculate_network_score(authors=None)
-                paper.network_score = network
-                paper.network_evidence = network_evidence
-                network_scores.append(network)
-            
-            # Calculate domain statistics for attention
-            attention_mu = mean(attention_raw_scores) if attention_raw_scores else 0.0
-            attention_sigma = pstdev(attention_raw_scores) if len(attention_raw_scores) > 1 else 0.0
-            
-            # Second pass: compute attention gap and composite scores
-            for paper in group:
-                # Get paper's attention data using pre-fetched data
-                repo_ids = paper_to_repos.get(paper.id, [])
-                link_count = len(repo_ids)
-                repo_stars = sum(repo_stars_map.get(repo_id, 0) for repo_id in repo_ids)
-                
-                # Attention gap score
-                attention_gap, attention_evidence = calculate_attention_gap_score(
-                    moat_score=paper.moat_score or 0.0,
-                    scalability_score=paper.scalability_score or 0.0,
-                    repo_stars=repo_stars,
-                    link_count=link_count,
-                    domain_mean_stars=attention_mu,
-                    domain_std_stars=attention_sigma,
-                )
-                paper.attention_gap_score = attention_gap
-                paper.attention_gap_evidence = attention_evidence
-                
-                # Composite score
-                composite, metadata = calculate_composite_score(
-                    novelty=novelty_scores[group.index(paper)],
-                    momentum=momentum_scores[group.index(paper)],
-                    attention_gap=attention_gap,
-                    moat=paper.moat_score or 0.0,
-                    scalability=paper.scalability_score or 0.0,
-                    network=paper.network_score or 0.0,
-                )
-                paper.composite_score = composite
-                paper.scoring_metadata = metadata
-            
-            # Store domain metrics
-            repo_ids = {
-                row.repo_id
-                for row in (
-                    session.query(PaperRepoLink)
-                    .join(Paper, PaperRepoLink.paper_id == Paper.id)
-                    .filter(Paper.domain == domain)
-                )
-            }
-            metric = (
-                session.query(DomainMetric)
-                .filter_by(
-                    domain=domain, window_start=window_start, window_end=window_end
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+        plans = _starmap(
+            pool,
+            _plan_domain,
+            [(domain, count, options) for domain, count in _domain_counts(session)],
+        )
+        shard_args = [
+            (plan, shard, options) for plan in plans for shard in range(len(plan.shards))
+        ]
+        results: dict[str, list[ShardResult]] = {plan.domain: [] for plan in plans}
+        for result in _starmap(pool, _score_shard, shard_args):
+            results[result.domain].append(result)
+
+        # A domain whose statistics moved gets every remaining paper rescored
+        if not full:
+            moved = [
+                plan
+                for plan in plans
+                if _domain_stats_moved(
+                    _previous_metric(session, plan.domain),
+                    _moved_stats(_merged_stats(results[plan.domain])),
+                    settings.scoring_stats_tolerance,
                 )
-                .one_or_none()
+            ]
+            remaining_args = [
+                (plan, shard, results[plan.domain][shard], options)
+                for plan in moved
+                for shard in range(len(plan.shards))
+            ]
+            for plan in moved:
+                results[plan.domain] = []
+            for result in _starmap(pool, _rescore_remaining, remaining_args):
+                results[result.domain].append(result)
+
+        for plan in plans:
+            run.replay(plan.stages)
+            for result in results[plan.domain]:
+                run.replay(result.stages)
+                rescored += result.rescored
+
+        with run.stage(DB_WRITE, rows=len(plans)):
+            for plan in plans:
+                stats = _merged_stats(results[plan.domain])
+                _store_domain_metric(session, plan.domain, stats, window_start, window_end)
+                total += stats.count
+
+            _save_watermark(
+                session,
+                scored_at,
+                {"full": full, "rescored": rescored, "total": total},
             )
-            if not metric:
-                metric = DomainMetric(
-                    domain=domain, window_start=window_start, window_end=window_end
-                )
-                session.add(metric)
-            
-            metric.paper_count = len(group)
-            metric.repo_count = len(repo_ids)
-            metric.novelty_mu = mean(novelty_scores) if novelty_scores else 0.0
-            metric.novelty_sigma = pstdev(novelty_scores) if len(novelty_scores) > 1 else 0.0
-            metric.momentum_mu = mean(momentum_scores) if momentum_scores else 0.0
-            metric.momentum_sigma = pstdev(momentum_scores) if len(momentum_scores) > 1 else 0.0
-            metric.moat_mu = mean(moat_scores) if moat_scores else 0.0
-            metric.moat_sigma = pstdev(moat_scores) if len(moat_scores) > 1 else 0.0
-            metric.scalability_mu = mean(scalability_scores) if scalability_scores else 0.0
-            metric.scalability_sigma = pstdev(scalability_scores) if len(scalability_scores) > 1 else 0.0
-            metric.attention_mu = attention_mu
-            metric.attention_sigma = attention_sigma
-            metric.network_mu = mean(network_scores) if network_scores else 0.0
-            metric.network_sigma = pstdev(network_scores) if len(network_scores) > 1 else 0.0
-        
-        session.commit()
+            if rescored:
+                bump_corpus_version(session)
+            session.commit()
+        run.rows = total
     except Exception:
         session.rollback()
         raise
     finally:
+        if pool is not None:
+            pool.shutdown()
         session.close()
         logger.info(
-            "Scoring run complete for window %s - %s",
+            "Scoring run complete for window %s - %s (rescored=%d of %d, full=%s, workers=%d)",
             window_start.isoformat(),
             window_end.isoformat(),
+            rescored,
+            total,
+            full,
+            workers,
         )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Daily paper scoring job")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rescore every paper (use after changing weights or lexicons)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes scoring domains in parallel (default: SCORING_WORKERS)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Papers per streamed chunk (default: SCORING_BATCH_SIZE)",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(full=args.full, chunk_size=args.chunk_size, workers=args.workers)
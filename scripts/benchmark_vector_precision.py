@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Recall, latency and index size of full, halfvec and binary-quantized HNSW indexes.
+
+Loads a synthetic clustered corpus of unit vectors into a scratch schema of
+DATABASE_URL, builds one HNSW index per precision and runs the same queries
+through each, with the re-ranking used by /papers/near. Recall@k is measured
+against exact brute force computed in NumPy. Prints one JSON line per precision.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+from sqlalchemy import text
+from vector_bench import Corpus, build_index, literal, ms, recall_at_k, run_queries
+
+from app.db.session import engine
+from app.services.embedding_store import OPERATOR_CLASSES, distance_sql, index_expression
+
+SCHEMA = "vector_bench"
+
+
+def load(connection, corpus: np.ndarray) -> None:
+    dim = corpus.shape[1]
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(
+        text(f"CREATE TABLE {SCHEMA}.vectors (id bigint PRIMARY KEY, embedding vector({dim}))")
+    )
+    cursor = connection.connection.cursor()
+    with cursor.copy(f"COPY {SCHEMA}.vectors (id, embedding) FROM STDIN") as copy:
+        for idx, vector in enumerate(corpus):
+            copy.write_row((idx, literal(vector)))
+
+
+def build_precision_index(connection, precision: str, dim: int) -> tuple[float, int]:
+    expression = index_expression("embedding", dim, precision)
+    return build_index(
+        connection,
+        f"{SCHEMA}.vectors",
+        f"vectors_{precision}_hnsw",
+        f"hnsw (({expression}) {OPERATOR_CLASSES[precision]})",
+    )
+
+
+def search_sql(precision: str, dim: int) -> str:
+    # Same shape as app.services.vector_search.search_by_vector
+    if precision == "full":
+        return (
+            f"SELECT id FROM {SCHEMA}.vectors "
+            f"ORDER BY {distance_sql('embedding', dim, precision)} LIMIT :k"
+        )
+    return (
+        f"SELECT id FROM (SELECT id, embedding FROM {SCHEMA}.vectors "
+        f"ORDER BY {distance_sql('embedding', dim, precision)} LIMIT :candidates) c "
+        "ORDER BY embedding <=> CAST(:vec AS vector) LIMIT :k"
+    )
+
+
+def query_precision(
+    connection,
+    precision: str,
+    queries: np.ndarray,
+    k: int,
+    rerank_factor: int,
+    dim: int,
+    ef_search: int,
+) -> tuple[list[list[int]], np.ndarray]:
+    if precision != "full":
+        # As the API does: a scan returns at most ef_search rows, so cover the re-rank pool
+        connection.execute(text(f"SET hnsw.ef_search = {max(ef_search, k * rerank_factor)}"))
+    params = [
+        {"vec": literal(query), "k": k, "candidates": k * rerank_factor} for query in queries
+    ]
+    return run_queries(connection, search_sql(precision, dim), params)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--ef-search", type=int, default=40)
+    parser.add_argument("--precisions", nargs="+", default=list(OPERATOR_CLASSES))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema")
+    args = parser.parse_args()
+
+    generator = Corpus(args.dim, args.clusters, args.seed)
+    corpus, queries = generator.rows(0, args.size), generator.queries(args.queries)
+    exact = np.argsort(-(queries @ corpus.T), axis=1)[:, : args.k]
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        load(connection, corpus)
+        try:
+            for precision in args.precisions:
+                connection.execute(text(f"SET hnsw.ef_search = {int(args.ef_search)}"))
+                build_seconds, index_bytes = build_precision_index(connection, precision, args.dim)
+                results, latencies = query_precision(
+                    connection,
+                    precision,
+                    queries,
+                    args.k,
+                    args.rerank_factor,
+                    args.dim,
+                    args.ef_search,
+                )
+                connection.execute(text(f"DROP INDEX {SCHEMA}.vectors_{precision}_hnsw"))
+                print(
+                    json.dumps(
+                        {
+                            "precision": precision,
+                            "size": args.size,
+                            "k": args.k,
+                            "rerank_factor": args.rerank_factor,
+                            "recall_at_k": round(recall_at_k(results, exact), 4),
+                            "p50_ms": ms(latencies, 50),
+                            "p95_ms": ms(latencies, 95),
+                            "index_mb": round(index_bytes / 2**20, 1),
+                            "build_seconds": round(build_seconds, 1),
+                        }
+                    )
+                )
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
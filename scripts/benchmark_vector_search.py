@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of the HNSW index across corpus sizes and build parameters.
+
+Streams a synthetic clustered corpus into a scratch schema of DATABASE_URL
+with binary COPY, growing it through each --sizes value. At every size one
+cosine HNSW index is built per (m, ef_construction) pair and the same held-out
+queries run at every hnsw.ef_search value. Recall@k is measured against exact
+brute force computed in NumPy alongside the load. Writes one JSON report
+(--output) with a result per size, build and ef_search, in a stable order so
+reports from two releases can be diffed.
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+from datetime import UTC, datetime
+
+import numpy as np
+from sqlalchemy import text
+from vector_bench import Corpus, build_index, literal, ms, recall_at_k, run_queries
+
+from app.db.session import engine
+from app.services.embedding_store import distance_sql
+
+SCHEMA = "vector_search_bench"
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+PGCOPY_TRAILER = (-1).to_bytes(2, "big", signed=True)
+
+
+class ExactTopK:
+    """Running brute-force top ``k`` of every query over the rows seen so far."""
+
+    def __init__(self, queries: np.ndarray, k: int):
+        self.queries = queries
+        self.k = k
+        self.ids = np.empty((len(queries), 0), dtype=np.int64)
+        self.sims = np.empty((len(queries), 0), dtype=np.float32)
+
+    def add(self, start: int, vectors: np.ndarray) -> None:
+        sims = np.concatenate([self.sims, self.queries @ vectors.T], axis=1)
+        new_ids = np.broadcast_to(np.arange(start, start + len(vectors)), (len(sims), len(vectors)))
+        ids = np.concatenate([self.ids, new_ids], axis=1)
+        if sims.shape[1] > self.k:
+            keep = np.argpartition(-sims, self.k - 1, axis=1)[:, : self.k]
+            sims = np.take_along_axis(sims, keep, axis=1)
+            ids = np.take_along_axis(ids, keep, axis=1)
+        self.sims, self.ids = sims, ids
+
+
+def copy_payload(start: int, vectors: np.ndarray) -> bytes:
+    """``(id, embedding)`` tuples in COPY binary format, using pgvector's wire format."""
+    dim = vectors.shape[1]
+    row = np.dtype(
+        [
+            ("fields", ">i2"),
+            ("id_len", ">i4"),
+            ("id", ">i8"),
+            ("vec_len", ">i4"),
+            ("dim", ">i2"),
+            ("unused", ">i2"),
+            ("vec", ">f4", (dim,)),
+        ]
+    )
+    tuples = np.zeros(len(vectors), dtype=row)
+    tuples["fields"] = 2
+    tuples["id_len"] = 8
+    tuples["id"] = np.arange(start, start + len(vectors))
+    tuples["vec_len"] = 4 + 4 * dim
+    tuples["dim"] = dim
+    tuples["vec"] = vectors
+    return tuples.tobytes()
+
+
+def load(connection, corpus: Corpus, start: int, stop: int, exact: ExactTopK) -> float:
+    """Append rows ``start``..``stop`` to the table and the exact top k; returns seconds."""
+    started = time.perf_counter()
+    cursor = connection.connection.cursor()
+    statement = f"COPY {SCHEMA}.vectors (id, embedding) FROM STDIN (FORMAT BINARY)"
+    with cursor.copy(statement) as copy:
+        copy.write(PGCOPY_HEADER)
+        for offset, vectors in corpus.chunks(start, stop):
+            copy.write(copy_payload(offset, vectors))
+            exact.add(offset, vectors)
+        copy.write(PGCOPY_TRAILER)
+    connection.execute(text(f"VACUUM ANALYZE {SCHEMA}.vectors"))
+    return time.perf_counter() - started
+
+
+def _environment(connection) -> dict:
+    return {
+        "postgres": connection.execute(text("SHOW server_version")).scalar(),
+        "pgvector": connection.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed queries per ef_search")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[64, 128])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 80, 160, 320])
+    parser.add_argument("--maintenance-work-mem", default="2GB", help="for index builds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="-", help="report path (default: stdout)")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.dim, args.clusters, args.seed)
+    query_vectors = corpus.queries(args.queries)
+    queries = [literal(query) for query in query_vectors]
+    exact = ExactTopK(query_vectors, args.k)
+    results = []
+    # Same shape as app.services.vector_search.search_by_vector at full precision
+    search_sql = (
+        f"SELECT id FROM {SCHEMA}.vectors "
+        f"ORDER BY {distance_sql('embedding', args.dim, 'full')} LIMIT :k"
+    )
+    params = [{"vec": query, "k": args.k} for query in queries]
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        environment = _environment(connection)
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(
+            text(
+                f"CREATE TABLE {SCHEMA}.vectors "
+                f"(id bigint PRIMARY KEY, embedding vector({args.dim}) NOT NULL)"
+            )
+        )
+        connection.execute(
+            text("SELECT set_config('maintenance_work_mem', :value, false)"),
+            {"value": args.maintenance_work_mem},
+        )
+        try:
+            loaded = 0
+            for size in sorted(set(args.sizes)):
+                load_seconds = load(connection, corpus, loaded, size, exact)
+                loaded = size
+                for m, ef_construction in itertools.product(args.m, args.ef_construction):
+                    build_seconds, index_bytes = build_index(
+                        connection,
+                        f"{SCHEMA}.vectors",
+                        "vectors_hnsw",
+                        "hnsw (embedding vector_cosine_ops) "
+                        f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})",
+                    )
+                    for ef_search in args.ef_search:
+                        connection.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+                        found, latencies = run_queries(connection, search_sql, params, args.warmup)
+                        result = {
+                            "size": size,
+                            "m": m,
+                            "ef_construction": ef_construction,
+                            "ef_search": ef_search,
+                            "k": args.k,
+                            "recall_at_k": round(recall_at_k(found, exact.ids), 4),
+                            "p50_ms": ms(latencies, 50),
+                            "p95_ms": ms(latencies, 95),
+                            "p99_ms": ms(latencies, 99),
+                            "index_mb": round(index_bytes / 2**20, 1),
+                            "build_seconds": round(build_seconds, 1),
+                            "load_seconds": round(load_seconds, 1),
+                        }
+                        results.append(result)
+                        print(json.dumps(result), file=sys.stderr)
+                    connection.execute(text(f"DROP INDEX {SCHEMA}.vectors_hnsw"))
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    report = {
+        "generated_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": environment,
+        "corpus": {
+            "dim": args.dim,
+            "clusters": args.clusters,
+            "queries": args.queries,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(payload)
+    else:
+        with open(args.output, "w") as handle:
+            handle.write(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
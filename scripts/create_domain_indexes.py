@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Build per-domain partial HNSW indexes for filtered /papers/near searches.
+
+Indexes every domain named on the command line, or else every domain holding
+at least --min-papers embedded papers. Indexes are built CONCURRENTLY and
+existing ones are skipped, so the script can be rerun as domains grow.
+"""
+import argparse
+import sys
+
+from sqlalchemy import func, select, text
+
+from app.config import settings
+from app.db.models import Paper
+from app.db.session import engine
+from app.services.embedding_store import create_domain_index, domain_index_name
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("domains", nargs="*", help="Domains to index (default: by size)")
+    parser.add_argument("--min-papers", type=int, default=5000)
+    parser.add_argument("--precision", default=settings.vector_index_precision)
+    parser.add_argument("--drop", action="store_true", help="Drop the domains' indexes instead")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        domains = args.domains or list(
+            connection.execute(
+                select(Paper.domain)
+                .where(Paper.domain.is_not(None), Paper.embedding.is_not(None))
+                .group_by(Paper.domain)
+                .having(func.count() >= args.min_papers)
+                .order_by(Paper.domain)
+            ).scalars()
+        )
+        for domain in domains:
+            if args.drop:
+                name = domain_index_name(domain, args.precision)
+                connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                print(f"dropped {name} ({domain})")
+            else:
+                name = create_domain_index(
+                    connection, domain, settings.embedding_dim, args.precision
+                )
+                print(f"{name} ready ({domain})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Build the papers HNSW index for VECTOR_INDEX_PRECISION before switching to it.
+
+Builds only the index of the chosen precision (default: the configured one),
+CONCURRENTLY, logging build progress. Once searches on a quantized index are
+validated, --drop-full removes the full-precision index to reclaim its space
+and insert cost; the table keeps full-precision vectors for re-ranking.
+"""
+import argparse
+import sys
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.session import engine
+from app.services.embedding_store import (
+    PAPERS_INDEX_NAMES,
+    create_papers_index,
+    report_index_progress,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--precision", choices=sorted(PAPERS_INDEX_NAMES), default=settings.vector_index_precision
+    )
+    parser.add_argument(
+        "--drop-full",
+        action="store_true",
+        help="Drop the full-precision index instead (after validating a quantized one)",
+    )
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if args.drop_full:
+            if settings.vector_index_precision == "full":
+                print("VECTOR_INDEX_PRECISION is full; searches still use that index")
+                return 1
+            name = PAPERS_INDEX_NAMES["full"]
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            print(f"dropped {name}")
+        else:
+            with report_index_progress(engine, "papers"):
+                name = create_papers_index(connection, settings.embedding_dim, args.precision)
+            print(f"{name} ready")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Export, validate and benchmark the ONNX Runtime embedding backend.
+
+    export     write model.onnx, model.int8.onnx and tokenizer.json to EMBEDDING_ONNX_DIR
+    validate   cosine agreement of the ONNX models with the PyTorch reference
+    benchmark  throughput and peak RSS of each backend, one fresh process each
+
+The corpus is a text file with one document per line (--corpus), or a random
+sample of paper titles and abstracts from the database.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_backends import (
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_MODEL_FILE,
+    OnnxBackend,
+    TorchBackend,
+)
+
+VARIANTS = ("torch", "onnx", "onnx-int8")
+
+
+def load_corpus(path: str | None, sample: int) -> list[str]:
+    if path:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+        return [line for line in lines if line.strip()][:sample]
+    from sqlalchemy import func
+
+    from app.db.models.paper import Paper
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        rows = (
+            session.query(Paper.title, Paper.abstract)
+            .order_by(func.random())
+            .limit(sample)
+            .all()
+        )
+    return ["\n".join(part for part in row if part) for row in rows]
+
+
+def build_backend(variant: str, model_dir: str):
+    if variant == "torch":
+        return TorchBackend(settings.embedding_model)
+    return OnnxBackend(model_dir, quantized=variant == "onnx-int8")
+
+
+def export(model_dir: str, quantize: bool, opset: int) -> None:
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output = Path(model_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    reference = TorchBackend(settings.embedding_model).model
+    tokenizer = reference.tokenizer
+    transformer = reference[0].auto_model.eval()
+
+    class TokenEmbeddings(torch.nn.Module):
+        # Pooling and normalization run in OnnxBackend, so only token embeddings are exported
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    sample = tokenizer(["an example sentence to trace"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = output / ONNX_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(str(output))
+    print(f"Exported {model_path}")
+    if quantize:
+        quantized_path = output / ONNX_QUANTIZED_MODEL_FILE
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        print(f"Quantized {quantized_path}")
+
+
+def validate(model_dir: str, texts: list[str], min_cosine: float, batch_size: int) -> bool:
+    """Compare each ONNX variant with the reference; False if any text falls below min_cosine."""
+    reference = _encode(build_backend("torch", model_dir), texts, batch_size)
+    passed = True
+    for variant in VARIANTS[1:]:
+        model_file = ONNX_QUANTIZED_MODEL_FILE if variant == "onnx-int8" else ONNX_MODEL_FILE
+        if not (Path(model_dir) / model_file).exists():
+            print(f"{variant:<10} skipped ({model_file} not found)")
+            continue
+        vectors = _encode(build_backend(variant, model_dir), texts, batch_size)
+        # Both sides are L2-normalized, so the row-wise dot product is the cosine
+        cosines = np.einsum("ij,ij->i", reference, vectors)
+        ok = bool(cosines.min() >= min_cosine)
+        passed = passed and ok
+        print(
+            f"{variant:<10} n={len(texts)} min={cosines.min():.5f} "
+            f"p01={np.percentile(cosines, 1):.5f} mean={cosines.mean():.5f} "
+            f"{'ok' if ok else 'FAIL'}"
+        )
+    return passed
+
+
+def _encode(backend, texts: list[str], batch_size: int) -> np.ndarray:
+    from app.services.embeddings import EmbeddingService
+
+    return EmbeddingService(backend).embed_many(texts, batch_size=batch_size)
+
+
+def _benchmark_variant(variant: str, model_dir: str, texts: list[str], batch_size: int, queue):
+    from app.lib.job_metrics import peak_rss_bytes
+
+    started = time.perf_counter()
+    backend = build_backend(variant, model_dir)
+    load_seconds = time.perf_counter() - started
+    load_rss = peak_rss_bytes()
+    _encode(backend, texts[:batch_size], batch_size)
+    started = time.perf_counter()
+    _encode(backend, texts, batch_size)
+    elapsed = time.perf_counter() - started
+    queue.put(
+        {
+            "backend": variant,
+            "texts": len(texts),
+            "load_seconds": round(load_seconds, 3),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+            "load_rss_mb": round(load_rss / 2**20, 1),
+            "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+        }
+    )
+
+
+def benchmark(model_dir: str, texts: list[str], variants: list[str], batch_size: int) -> list[dict]:
+    """Run each variant in its own spawned process so RSS is not shared between backends."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for variant in variants:
+        queue = context.Queue()
+        process = context.Process(
+            target=_benchmark_variant, args=(variant, model_dir, texts, batch_size, queue)
+        )
+        process.start()
+        result = queue.get()
+        process.join()
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-dir", default=settings.embedding_onnx_dir)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--no-quantize", action="store_true")
+    export_parser.add_argument("--opset", type=int, default=14)
+
+    for name in ("validate", "benchmark"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--corpus", help="text file with one document per line")
+        sub.add_argument("--sample", type=int, default=1000)
+        sub.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    subparsers.choices["validate"].add_argument("--min-cosine", type=float, default=0.98)
+    subparsers.choices["benchmark"].add_argument(
+        "--backends", nargs="+", choices=VARIANTS, default=list(VARIANTS)
+    )
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args.model_dir, not args.no_quantize, args.opset)
+        return 0
+    texts = load_corpus(args.corpus, args.sample)
+    if not texts:
+        print("Empty corpus", file=sys.stderr)
+        return 1
+    if args.command == "validate":
+        return 0 if validate(args.model_dir, texts, args.min_cosine, args.batch_size) else 1
+    benchmark(args.model_dir, texts, args.backends, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
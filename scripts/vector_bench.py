@@ -0,0 +1,92 @@
+"""
+Helpers shared by the vector index benchmarks.
+
+Used by ``benchmark_vector_search.py`` (HNSW build parameters across corpus
+sizes) and ``benchmark_vector_precision.py`` (full, halfvec and binary
+indexes), so both measure recall and latency the same way.
+"""
+import time
+from collections.abc import Iterator, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+# Rows generated (and copied and scored against the queries) at a time
+CHUNK_ROWS = 50_000
+
+
+class Corpus:
+    """
+    Unit vectors scattered around ``clusters`` random centers, like topical papers.
+
+    Rows are generated chunk by chunk, seeded by their offset, so memory stays
+    bounded at any corpus size and a run is reproducible from its seed.
+    """
+
+    def __init__(self, dim: int, clusters: int, seed: int):
+        self.dim = dim
+        self.seed = seed
+        self.centers = np.random.default_rng(seed).standard_normal((clusters, dim))
+
+    def rows(self, start: int, count: int, stream: int = 0) -> np.ndarray:
+        rng = np.random.default_rng([self.seed, stream, start])
+        labels = rng.integers(len(self.centers), size=count)
+        vectors = self.centers[labels] + 0.6 * rng.standard_normal((count, self.dim))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.astype(np.float32)
+
+    def chunks(self, start: int, stop: int) -> Iterator[tuple[int, np.ndarray]]:
+        for offset in range(start, stop, CHUNK_ROWS):
+            yield offset, self.rows(offset, min(CHUNK_ROWS, stop - offset))
+
+    def queries(self, count: int) -> np.ndarray:
+        # Held out: drawn around the same centers from a separate stream
+        return self.rows(0, count, stream=1)
+
+
+def literal(vector: np.ndarray) -> str:
+    """``vector`` as a pgvector text literal."""
+    return "[" + ",".join(f"{value:.6f}" for value in vector) + "]"
+
+
+def build_index(connection, table: str, name: str, definition: str) -> tuple[float, int]:
+    """Create index ``name`` on ``table`` as ``USING <definition>``; returns seconds and bytes."""
+    started = time.perf_counter()
+    connection.execute(text(f"CREATE INDEX {name} ON {table} USING {definition}"))
+    seconds = time.perf_counter() - started
+    schema = table.rsplit(".", 1)[0] + "." if "." in table else ""
+    size = connection.execute(text(f"SELECT pg_relation_size('{schema}{name}')")).scalar()
+    return seconds, int(size)
+
+
+def run_queries(
+    connection, sql: str, params: Sequence[dict], warmup: int = 0
+) -> tuple[list[list[int]], np.ndarray]:
+    """
+    Ids returned by ``sql`` for each parameter set, with per-query latencies.
+
+    The first ``warmup`` parameter sets run once untimed beforehand.
+    """
+    statement = text(sql)
+    for values in params[:warmup]:
+        connection.execute(statement, values).all()
+    results: list[list[int]] = []
+    latencies = []
+    for values in params:
+        started = time.perf_counter()
+        rows = connection.execute(statement, values).scalars().all()
+        latencies.append(time.perf_counter() - started)
+        results.append(list(rows))
+    return results, np.array(latencies)
+
+
+def recall_at_k(results: list[list[int]], exact: np.ndarray) -> float:
+    """Share of the exact top k ids (one row per query) that the search returned."""
+    hits = sum(
+        len(set(found) & set(truth)) for found, truth in zip(results, exact.tolist(), strict=True)
+    )
+    return hits / exact.size
+
+
+def ms(latencies: np.ndarray, percentile: float) -> float:
+    return round(float(np.percentile(latencies, percentile)) * 1000, 2)
@@ -2,8 +2,17 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.services.query_cache import QueryCache
 
 
 @pytest.fixture(scope="session")
 def client() -> TestClient:
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_query_cache():
+    # /papers/near caches results per process; tests mock the DB per test
+    QueryCache._instance = None
+    yield
+    QueryCache._instance = None
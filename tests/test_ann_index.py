@@ -0,0 +1,201 @@
+"""Tests for the in-process ANN index and the search backends built on it."""
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.ann_index import CURRENT_FILE, IvfIndex, current_version, read_meta
+from app.services.search_backends import (
+    FILTER_OVERFETCH,
+    LocalIndexBackend,
+    PgvectorBackend,
+    get_search_backend,
+    load_search_backend,
+    reset_search_backend,
+)
+from app.services.vector_search import VectorFilters
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def clustered(rows: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim))
+    return centers[rng.integers(8, size=rows)] + 0.3 * rng.standard_normal((rows, dim))
+
+
+@pytest.fixture
+def read_column_model(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_column_model", MODEL)
+    monkeypatch.setattr(settings, "embedding_read_model", "")
+
+
+class TestIvfIndex:
+    """Tests for building, persisting and querying the IVF index."""
+
+    def test_all_probes_match_brute_force(self):
+        """Test probing every list returns the exact cosine top-k."""
+        vectors = clustered(500)
+        ids = np.arange(1, 501)
+        index = IvfIndex.build(ids, vectors, MODEL, lists=10)
+        query = vectors[42] + 0.01
+
+        hits = index.search(query, 5, probes=10)
+
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = ids[np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]]
+        assert [paper_id for paper_id, _ in hits] == list(exact)
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-3)
+        assert index.meta.watermark == 500
+
+    def test_snapshot_loads_memory_mapped(self, tmp_path):
+        """Test a saved snapshot maps its arrays and answers like the built index."""
+        vectors = clustered(200)
+        index = IvfIndex.build(np.arange(200), vectors, MODEL, lists=4)
+        index.save(tmp_path / "ann")
+        index.save(tmp_path / "ann")
+
+        loaded = IvfIndex.load(tmp_path / "ann")
+
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.meta == index.meta
+        assert loaded.search(vectors[3], 3, 2) == index.search(vectors[3], 3, 2)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["ann"]
+
+    def test_save_switches_versions_with_one_pointer(self, tmp_path):
+        """Test a save publishes a new version directory and keeps only the one it replaced."""
+        path = tmp_path / "ann"
+        # A snapshot written before versioning, with its files in the directory itself
+        IvfIndex.build(np.arange(10), clustered(10), MODEL, lists=2).save(path)
+        legacy = current_version(path)
+        for entry in legacy.iterdir():
+            entry.rename(path / entry.name)
+        (path / CURRENT_FILE).unlink()
+        legacy.rmdir()
+        assert read_meta(path).rows == 10
+
+        saved = []
+        for rows in (11, 12, 13):
+            IvfIndex.build(np.arange(rows), clustered(rows), MODEL, lists=2).save(path)
+            saved.append(current_version(path).name)
+            assert read_meta(path).rows == rows
+
+        assert {entry.name for entry in path.iterdir()} == {CURRENT_FILE, *saved[1:]}
+        assert IvfIndex.load(path).meta.rows == 13
+
+    def test_added_papers_are_searched_and_raise_watermark(self):
+        """Test papers added after the snapshot are found before the next rebuild."""
+        index = IvfIndex.build(np.arange(1, 101), clustered(100), MODEL, lists=4)
+        new = np.ones((1, 16))
+
+        index.add([500], new)
+
+        assert index.watermark == 500
+        assert len(index) == 101
+        assert index.search(new[0], 1, probes=1)[0][0] == 500
+
+
+class TestSearchBackends:
+    """Tests for selecting and running vector search backends."""
+
+    def test_local_falls_back_without_snapshot(self, tmp_path, read_column_model):
+        """Test a missing snapshot or another model's snapshot keeps pgvector search."""
+        assert isinstance(load_search_backend("local", str(tmp_path / "none")), PgvectorBackend)
+
+        IvfIndex.build(np.arange(10), clustered(10), "other/model", lists=2).save(tmp_path / "a")
+        assert isinstance(load_search_backend("local", str(tmp_path / "a")), PgvectorBackend)
+
+        IvfIndex.build(np.arange(10), clustered(10), MODEL, lists=2).save(tmp_path / "b")
+        assert isinstance(load_search_backend("local", str(tmp_path / "b")), LocalIndexBackend)
+
+        with pytest.raises(ValueError):
+            load_search_backend("faiss")
+
+    def test_new_snapshot_is_reloaded(self, tmp_path, monkeypatch, read_column_model):
+        """Test the process backend follows the snapshot the cron job writes, with a fresh delta."""
+        path = tmp_path / "ann_index"
+        monkeypatch.setattr(settings, "vector_search_backend", "local")
+        monkeypatch.setattr(settings, "ann_snapshot_path", str(path))
+        monkeypatch.setattr(settings, "ann_refresh_interval_s", 0.0)
+        reset_search_backend()
+        try:
+            assert isinstance(get_search_backend(), PgvectorBackend)
+
+            IvfIndex.build(np.arange(10), clustered(10), MODEL, lists=2).save(path)
+            first = get_search_backend()
+            assert isinstance(first, LocalIndexBackend)
+            first.index.add([10], clustered(1))
+            assert get_search_backend() is first
+
+            IvfIndex.build(np.arange(11), clustered(11), MODEL, lists=2).save(path)
+            second = get_search_backend()
+            assert second is not first
+            assert len(second.index) == second.index.meta.rows == 11
+        finally:
+            reset_search_backend()
+
+    def test_local_search_refreshes_then_reads_titles(self, read_column_model):
+        """Test one refresh per interval and results limited to papers that still exist."""
+        vectors = clustered(50)
+        index = IvfIndex.build(np.arange(1, 51), vectors, MODEL, lists=5)
+        now = [0.0]
+        backend = LocalIndexBackend(index, probes=5, refresh_interval=60, clock=lambda: now[0])
+        db = MagicMock()
+        db.execute.return_value.all.side_effect = [
+            [(51, vectors[0] * 2)],
+            [],
+            [(1, "Paper one"), (51, "Paper fifty-one")],
+            [(1, "Paper one")],
+        ]
+
+        first = backend.search(db, vectors[0], 3)
+        second = backend.search(db, vectors[0], 3)
+
+        assert index.watermark == 51
+        # Paper 51 has paper 1's direction, so both are exact matches
+        assert {hit["id"] for hit in first} == {1, 51}
+        assert all(hit["similarity"] == pytest.approx(1.0, abs=1e-5) for hit in first)
+        assert [hit["id"] for hit in second] == [1]
+        assert db.execute.call_count == 4
+
+    def test_filtered_local_search_widens_until_k_match(self, read_column_model):
+        """Test a selective filter widens the candidate set instead of returning fewer papers."""
+        vectors = clustered(200)
+        vectors[8] = vectors[6]
+        index = IvfIndex.build(np.arange(1, 201), vectors, MODEL, lists=4)
+        backend = LocalIndexBackend(index, probes=1, refresh_interval=60)
+        db = MagicMock()
+        # Nothing to refresh, then each round of candidates matches more papers
+        db.execute.return_value.all.side_effect = [
+            [],
+            [],
+            [(7, "Seven")],
+            [(7, "Seven"), (9, "Nine")],
+        ]
+
+        results = backend.search(db, vectors[6], 2, VectorFilters(domain="cs.RO"))
+
+        assert [hit["id"] for hit in results] in ([7, 9], [9, 7])
+        sql, params = db.execute.call_args.args
+        assert "p.domain = 'cs.RO'" in str(sql)
+        assert len(params["ids"]) == 2 * FILTER_OVERFETCH * 16
+
+    def test_local_batch_search_drops_query_papers(self, read_column_model):
+        """Test a paper id query keeps k neighbors other than the paper itself."""
+        vectors = clustered(50)
+        index = IvfIndex.build(np.arange(1, 51), vectors, MODEL, lists=5)
+        backend = LocalIndexBackend(index, probes=5, refresh_interval=60)
+        db = MagicMock()
+        db.execute.return_value.all.side_effect = [
+            [],
+            [(paper_id, f"Paper {paper_id}") for paper_id in range(1, 51)],
+        ]
+
+        by_paper, by_text = backend.search_many(db, [vectors[0], vectors[0]], 3, [1, None])
+
+        paper_ids = [hit["id"] for hit in by_paper]
+        text_ids = [hit["id"] for hit in by_text]
+        assert len(paper_ids) == 3 and 1 not in paper_ids
+        assert text_ids[0] == 1
+        assert text_ids[1:] == paper_ids[:2]
@@ -0,0 +1,48 @@
+"""Tests for arXiv ingestion embeddings."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.lib.job_metrics import StageRecorder
+from app.workers import arxiv_hourly
+
+MODEL = "intfloat/e5-small-v2"
+
+
+def _entry(external_id: str, title: str) -> dict:
+    return {"id": f"http://arxiv.org/abs/{external_id}", "title": title, "summary": "Abstract"}
+
+
+def _embed(stored: dict[int, np.ndarray], computed: list[np.ndarray]) -> tuple[np.ndarray, MagicMock]:
+    entries = [_entry("1", "Same"), _entry("2", "New")]
+    existing = {"1": SimpleNamespace(id=10, title="Same", abstract="Abstract")}
+    cache = MagicMock(model=MODEL)
+    cache.embed_many.side_effect = computed
+    with patch.object(arxiv_hourly, "_stored_embeddings", return_value=stored):
+        embeddings = arxiv_hourly._embed_entries(cache, None, entries, existing, StageRecorder())
+    return embeddings, cache
+
+
+class TestEmbedEntries:
+    """Tests for reusing stored vectors of unchanged papers."""
+
+    def test_reused_vectors_survive_model_dimension(self):
+        """Test stored vectors are kept when the model's dimension differs from the setting."""
+        stored = {10: np.full(3, 0.5, dtype=np.float32)}
+
+        embeddings, cache = _embed(stored, [np.ones((1, 3), dtype=np.float32)])
+
+        assert embeddings.tolist() == [[0.5, 0.5, 0.5], [1.0, 1.0, 1.0]]
+        cache.embed_many.assert_called_once()
+
+    def test_stored_vectors_of_another_dimension_are_recomputed(self):
+        """Test a stored vector that no longer fits the model is embedded again."""
+        stored = {10: np.full(2, 0.5, dtype=np.float32)}
+
+        embeddings, cache = _embed(
+            stored, [np.ones((1, 3), dtype=np.float32), np.full((1, 3), 2.0, dtype=np.float32)]
+        )
+
+        assert embeddings.tolist() == [[2.0, 2.0, 2.0], [1.0, 1.0, 1.0]]
+        assert cache.embed_many.call_args.args[0] == ["Same\nAbstract"]
@@ -0,0 +1,92 @@
+"""Tests for mergeable running domain statistics."""
+from statistics import mean, pstdev
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.domain_stats import STAT_COMPONENTS, DomainStats, RunningStats
+
+
+def _values(seed: int, size: int) -> list[float]:
+    return np.random.default_rng(seed).normal(50.0, 20.0, size).tolist()
+
+
+class TestRunningStats:
+    """Tests for RunningStats."""
+
+    def test_from_values_matches_statistics_module(self):
+        """Test count, mean and deviation agree with mean and pstdev."""
+        values = _values(1, 200)
+        stats = RunningStats.from_values(values)
+
+        assert stats.count == 200
+        assert stats.mean == pytest.approx(mean(values))
+        assert stats.std == pytest.approx(pstdev(values))
+
+    def test_merge_of_shards_equals_whole(self):
+        """Test statistics of parallel shards merge into those of the whole."""
+        values = _values(2, 300)
+        merged = RunningStats()
+        for shard in (values[:17], values[17:170], [], values[170:]):
+            merged = merged.merge(RunningStats.from_values(shard))
+        whole = RunningStats.from_values(values)
+
+        assert merged.count == whole.count
+        assert merged.mean == pytest.approx(whole.mean)
+        assert merged.m2 == pytest.approx(whole.m2)
+
+    def test_subtract_inverts_merge(self):
+        """Test subtracting a shard restores the statistics of the rest."""
+        values = _values(3, 100)
+        remaining = RunningStats.from_values(values).subtract(RunningStats.from_values(values[60:]))
+        assert remaining.count == 60
+        assert remaining.mean == pytest.approx(mean(values[:60]))
+        assert remaining.std == pytest.approx(pstdev(values[:60]))
+
+    def test_constant_and_small_counts(self):
+        """Test padding with constants and degenerate counts."""
+        stats = RunningStats.from_values([10.0, 30.0]).merge(RunningStats.constant(0, 2))
+        assert stats.mean == pytest.approx(mean([10.0, 30.0, 0.0, 0.0]))
+        assert stats.std == pytest.approx(pstdev([10.0, 30.0, 0.0, 0.0]))
+        assert RunningStats.from_values([3.0]).std == 0.0
+        assert RunningStats().std == 0.0
+        assert RunningStats.from_values([3.0]).subtract(RunningStats.from_values([3.0])) == (
+            RunningStats()
+        )
+
+
+class TestDomainStats:
+    """Tests for DomainStats."""
+
+    def _columns(self, seed: int, size: int) -> dict[str, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        return {name: rng.random(size) for name in STAT_COMPONENTS}
+
+    def test_replace_columns_matches_recompute(self):
+        """Test rescoring a batch of papers keeps statistics exact."""
+        columns = self._columns(5, 40)
+        stats = DomainStats.from_columns(columns)
+        new = {name: values[:5] * 2 for name, values in columns.items()}
+        old = {name: values[:5] for name, values in columns.items()}
+
+        updated = stats.replace_columns(old, new)
+        for name in STAT_COMPONENTS:
+            columns[name][:5] = new[name]
+        expected = DomainStats.from_columns(columns)
+
+        for name, value in expected.summary().items():
+            assert updated.summary()[name] == pytest.approx(value)
+
+    def test_apply_to_metric(self):
+        """Test count, means and deviations are written to a DomainMetric."""
+        stats = DomainStats.from_columns(self._columns(6, 25))
+        metric = SimpleNamespace()
+        stats.apply_to(metric)
+
+        assert metric.paper_count == 25
+        assert metric.attention_sigma == pytest.approx(stats["attention"].std)
+        for name in STAT_COMPONENTS:
+            assert getattr(metric, f"{name}_mu") == stats[name].mean
+            assert getattr(metric, f"{name}_sigma") == stats[name].std
+            assert not hasattr(metric, f"{name}_m2")
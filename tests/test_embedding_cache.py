@@ -0,0 +1,96 @@
+"""Tests for the content-addressed embedding cache."""
+from unittest.mock import MagicMock
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import EmbeddingCacheEntry
+from app.metrics import EMBEDDING_CACHE_LOOKUPS
+from app.services.embedding_cache import EmbeddingCache, text_hash
+
+
+class FakeEmbedder:
+    """Embedder that records every text it is asked to embed."""
+
+    dim = 3
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed_many(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0, 2.0] for text in texts], dtype=np.float32)
+
+
+def _lookups(tier: str, result: str) -> float:
+    return EMBEDDING_CACHE_LOOKUPS.labels(tier=tier, result=result)._value.get()
+
+
+class TestTextHash:
+    """Tests for text normalization and hashing."""
+
+    def test_whitespace_is_normalized(self):
+        """Test formatting-only differences share a key."""
+        assert text_hash("Quantum  dots\n in silicon ") == text_hash("Quantum dots in silicon")
+        assert text_hash("Quantum dots") != text_hash("quantum dots")
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache."""
+
+    def test_memory_hits_skip_the_model(self):
+        """Test repeated texts are embedded once and rows keep input order."""
+        embedder = FakeEmbedder()
+        cache = EmbeddingCache(embedder, model="m", max_entries=10)
+        misses = _lookups("model", "miss")
+
+        first = cache.embed_many(["aa", "b", "aa"])
+        second = cache.embed_many(["b", "ccc"])
+
+        assert embedder.calls == [["aa", "b"], ["ccc"]]
+        assert first[:, 0].tolist() == [2.0, 1.0, 2.0]
+        assert second[:, 0].tolist() == [1.0, 3.0]
+        assert second.dtype == np.float32
+        assert _lookups("model", "miss") == misses + 3
+
+    def test_lru_evicts_oldest(self):
+        """Test the in-process tier stays within its size."""
+        embedder = FakeEmbedder()
+        cache = EmbeddingCache(embedder, model="m", max_entries=2)
+
+        cache.embed_many(["a", "b"])
+        cache.embed_many(["a"])
+        cache.embed_many(["c"])
+        cache.embed_many(["a", "b"])
+
+        assert len(cache) == 2
+        assert embedder.calls[-1] == ["b"]
+
+    def test_database_tier(self):
+        """Test stored vectors are served from the table and new ones are inserted."""
+        embedder = FakeEmbedder()
+        cache = EmbeddingCache(embedder, model="m", max_entries=0)
+        session = MagicMock()
+        stored = np.array([9.0, 9.0, 9.0], dtype=np.float32)
+        session.execute.side_effect = [[(text_hash("known"), stored)], None]
+
+        matrix = cache.embed_many(["known", "new"], session)
+
+        assert matrix[0].tolist() == [9.0, 9.0, 9.0]
+        assert embedder.calls == [["new"]]
+        assert session.execute.call_count == 2
+        insert = session.execute.call_args_list[1].args[0]
+        assert "ON CONFLICT" in str(insert.compile(dialect=postgresql.dialect()))
+
+    def test_table_accepts_any_dimension(self):
+        """Test the cache column is dimensionless, so other model sizes can be stored."""
+        column = EmbeddingCacheEntry.__table__.c.embedding
+
+        assert column.type.dim is None
+
+    def test_empty_input(self):
+        """Test an empty batch returns an empty matrix without touching the model."""
+        embedder = FakeEmbedder()
+
+        assert EmbeddingCache(embedder, model="m").embed_many([]).shape == (0, 3)
+        assert embedder.calls == []
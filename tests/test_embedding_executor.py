@@ -0,0 +1,104 @@
+"""Tests for the micro-batching embedding executor."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.embedding_executor import EmbeddingExecutor, EmbeddingQueueFullError
+
+
+class RecordingEmbedder:
+    """Embedder that records batch sizes and can be held to let the queue fill."""
+
+    def __init__(self):
+        self.batches: list[list[str]] = []
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+
+    def embed_many(self, texts):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+class TestEmbeddingExecutor:
+    """Tests for EmbeddingExecutor."""
+
+    def test_resolves_each_future_with_its_own_row(self):
+        """Test results are routed back to the request that submitted the text."""
+        executor = EmbeddingExecutor(RecordingEmbedder(), max_batch_size=8, max_wait_ms=20)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(executor.embed, ["a" * n for n in range(1, 9)]))
+        finally:
+            executor.shutdown(5)
+
+        assert [row[0] for row in results] == [float(n) for n in range(1, 9)]
+
+    def test_coalesces_queued_texts_up_to_max_batch_size(self):
+        """Test texts waiting behind a running batch are embedded together."""
+        embedder = RecordingEmbedder()
+        embedder.release.clear()
+        executor = EmbeddingExecutor(embedder, max_batch_size=3, max_wait_ms=50)
+        try:
+            first = executor.submit("x")
+            assert embedder.started.wait(5)
+            waiting = [executor.submit(text) for text in ["a", "bb", "ccc", "dddd"]]
+            embedder.release.set()
+            for future in [first, *waiting]:
+                future.result(5)
+        finally:
+            executor.shutdown(5)
+
+        assert embedder.batches == [["x"], ["a", "bb", "ccc"], ["dddd"]]
+
+    def test_full_queue_rejects(self):
+        """Test the queue is bounded and overflow raises instead of blocking."""
+        embedder = RecordingEmbedder()
+        embedder.release.clear()
+        executor = EmbeddingExecutor(embedder, max_batch_size=1, max_wait_ms=0, max_queue=2)
+        try:
+            executor.submit("running")
+            assert embedder.started.wait(5)
+            executor.submit("a")
+            executor.submit("b")
+            with pytest.raises(EmbeddingQueueFullError):
+                executor.submit("c")
+        finally:
+            embedder.release.set()
+            executor.shutdown(5)
+
+    def test_model_error_fails_the_whole_batch(self):
+        """Test an embedding failure surfaces on every future of the batch."""
+
+        class FailingEmbedder:
+            def embed_many(self, texts):
+                raise RuntimeError("model crashed")
+
+        executor = EmbeddingExecutor(FailingEmbedder(), max_batch_size=4, max_wait_ms=1)
+        try:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                executor.embed("a", timeout=5)
+        finally:
+            executor.shutdown(5)
+
+    def test_cancelled_requests_are_skipped(self):
+        """Test a request abandoned by its caller never reaches the model."""
+        embedder = RecordingEmbedder()
+        embedder.release.clear()
+        executor = EmbeddingExecutor(embedder, max_batch_size=4, max_wait_ms=1)
+        try:
+            executor.submit("running")
+            assert embedder.started.wait(5)
+            abandoned = executor.submit("abandoned")
+            kept = executor.submit("kept")
+            assert abandoned.cancel()
+            embedder.release.set()
+            kept.result(5)
+        finally:
+            executor.shutdown(5)
+
+        assert embedder.batches == [["running"], ["kept"]]
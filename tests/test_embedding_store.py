@@ -0,0 +1,263 @@
+"""Tests for versioned embedding storage."""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import embedding_store
+from app.services.vector_search import VectorFilters, search_by_vector, search_many_by_vector
+
+COLUMN_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+@pytest.fixture
+def models(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_column_model", COLUMN_MODEL)
+    monkeypatch.setattr(settings, "embedding_read_model", "")
+    return monkeypatch
+
+
+class TestEmbeddingStore:
+    """Tests for model version routing."""
+
+    def test_reads_column_model_by_default(self, models):
+        """Test an unset EMBEDDING_READ_MODEL keeps reading papers.embedding."""
+        assert embedding_store.read_model() == COLUMN_MODEL
+        assert embedding_store.in_column(embedding_store.read_model())
+
+        models.setattr(settings, "embedding_read_model", "intfloat/e5-small-v2")
+        assert embedding_store.read_model() == "intfloat/e5-small-v2"
+        assert not embedding_store.in_column(embedding_store.read_model())
+
+    def test_ingestion_writes_read_model_during_cutover(self, models):
+        """Test new papers are embedded under the read model too while it differs."""
+        models.setattr(settings, "embedding_backend", "torch")
+        models.setattr(settings, "embedding_model", COLUMN_MODEL)
+        assert embedding_store.ingest_models() == [COLUMN_MODEL]
+
+        models.setattr(settings, "embedding_model", "intfloat/e5-small-v2")
+        assert embedding_store.ingest_models() == ["intfloat/e5-small-v2", COLUMN_MODEL]
+
+    def test_column_model_writes_papers(self, models):
+        """Test the column model's vectors are a bulk UPDATE of papers."""
+        session = MagicMock()
+
+        embedding_store.write_embeddings(session, [1, 2], np.ones((2, 3)), COLUMN_MODEL)
+
+        statement, rows = session.execute.call_args.args
+        assert statement.table.name == "papers"
+        assert [row["id"] for row in rows] == [1, 2]
+        assert all(row["embedded_at"] is not None for row in rows)
+
+    def test_other_model_upserts_side_table(self, models):
+        """Test another model version is upserted into paper_embeddings."""
+        session = MagicMock()
+
+        embedding_store.write_embeddings(session, [1], np.ones((1, 3)), "intfloat/e5-small-v2")
+
+        (statement,) = session.execute.call_args.args
+        sql = str(statement.compile())
+        assert "INSERT INTO paper_embeddings" in sql
+        assert "ON CONFLICT (paper_id, model) DO UPDATE" in sql
+
+    def test_partial_index_matches_query_expression(self, models):
+        """Test the index expression is the cast used by vector search, per model."""
+        connection = MagicMock()
+
+        name = embedding_store.create_model_index(connection, "o'model", 768)
+
+        sql = str(connection.execute.call_args.args[0])
+        assert name == embedding_store.index_name("o'model")
+        assert "CONCURRENTLY" in sql
+        assert "((embedding::vector(768)) vector_cosine_ops)" in sql
+        assert "WHERE model = 'o''model'" in sql
+        assert embedding_store.index_name("a") != embedding_store.index_name("b")
+
+    def test_search_uses_read_model_table(self, models):
+        """Test vector search reads papers.embedding or the model's side-table rows."""
+        db = MagicMock()
+
+        search_by_vector(db, [0.1], 5)
+        assert "FROM papers" in str(db.execute.call_args.args[0])
+
+        models.setattr(settings, "embedding_read_model", "intfloat/e5-small-v2")
+        search_by_vector(db, [0.1], 5)
+        sql, params = db.execute.call_args.args
+        assert "FROM paper_embeddings e" in str(sql)
+        assert f"(e.embedding::vector({settings.embedding_dim})) <=> :vec" in str(sql)
+        assert params["model"] == "intfloat/e5-small-v2"
+
+    def test_quantized_search_reranks_candidates(self, models):
+        """Test a halfvec or bit index pass is re-ranked at full precision."""
+        db = MagicMock()
+        dim = settings.embedding_dim
+        models.setattr(settings, "vector_rerank_factor", 4)
+
+        search_by_vector(db, [0.1], 5, precision="half")
+        sql, params = db.execute.call_args.args
+        assert f"((p.embedding)::halfvec({dim})) <=> CAST(:vec AS halfvec({dim}))" in str(sql)
+        assert "LIMIT :candidates" in str(sql)
+        assert "ORDER BY embedding <=> :vec" in str(sql)
+        assert params["candidates"] == 20
+
+        search_by_vector(db, [0.1], 5, precision="binary")
+        sql = str(db.execute.call_args.args[0])
+        assert f"(binary_quantize(p.embedding)::bit({dim})) <~>" in sql
+
+    def test_quantized_index_per_model(self, models):
+        """Test side-table indexes take the precision's expression and operator class."""
+        connection = MagicMock()
+
+        name = embedding_store.create_model_index(connection, "m", 768, precision="half")
+
+        sql = str(connection.execute.call_args.args[0])
+        assert name == f"{embedding_store.index_name('m')}_half"
+        assert "(((embedding::vector(768)))::halfvec(768)) halfvec_cosine_ops)" in sql
+        with pytest.raises(ValueError):
+            embedding_store.index_expression("embedding", 768, "int4")
+
+    def test_papers_index_for_configured_precision(self, models):
+        """Test only the configured precision's papers index is built."""
+        connection = MagicMock()
+        models.setattr(settings, "vector_index_precision", "binary")
+
+        name = embedding_store.create_papers_index(connection, 384)
+
+        sql = str(connection.execute.call_args.args[0])
+        assert connection.execute.call_count == 1
+        assert name == "ix_papers_embedding_bit_hnsw"
+        assert "((binary_quantize(embedding)::bit(384))) bit_hamming_ops)" in sql
+
+    def test_filters_run_inside_iterative_index_scan(self, models):
+        """Test filters become WHERE clauses of the index scan, with iterative scans on."""
+        db = MagicMock()
+        filters = VectorFilters(domain="cs.AI", min_composite_score=0.6, exclude_ids=(3, 4))
+        models.setattr(settings, "vector_iterative_scan", "relaxed_order")
+
+        search_by_vector(db, [0.1], 5, filters=filters)
+
+        (set_sql, settings_params), (sql, params) = (c.args for c in db.execute.call_args_list)
+        assert "hnsw.iterative_scan" in str(set_sql)
+        assert settings_params["iterative_scan"] == "relaxed_order"
+        assert "p.domain = 'cs.AI'" in str(sql)
+        assert "p.composite_score >= :min_composite_score" in str(sql)
+        assert "p.id <> ALL(:exclude_ids)" in str(sql)
+        assert params["exclude_ids"] == [3, 4]
+
+        db.reset_mock()
+        search_by_vector(db, [0.1], 5)
+        assert db.execute.call_count == 1
+
+    def test_domain_index_is_partial(self, models):
+        """Test per-domain indexes carry the same predicate filtered searches inline."""
+        connection = MagicMock()
+
+        name = embedding_store.create_domain_index(connection, "cs.AI", 384, precision="full")
+
+        sql = str(connection.execute.call_args.args[0])
+        assert name == embedding_store.domain_index_name("cs.AI", "full")
+        assert "ON papers USING hnsw ((embedding) vector_cosine_ops)" in sql
+        assert "WHERE domain = 'cs.AI'" in sql
+
+    def test_batch_search_is_one_lateral_statement(self, models):
+        """Test many query vectors share one statement and come back grouped per query."""
+        db = MagicMock()
+        db.execute.return_value.mappings.return_value = [
+            {"ord": 0, "id": 7, "title": "A", "similarity": 0.9},
+            {"ord": 1, "id": 8, "title": "B", "similarity": 0.8},
+            {"ord": 1, "id": 9, "title": "C", "similarity": 0.7},
+        ]
+
+        results = search_many_by_vector(db, [[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]], 2)
+
+        sql, params = db.execute.call_args.args
+        assert "FROM (VALUES (0, CAST(:query_0 AS vector(" in str(sql)
+        assert "CROSS JOIN LATERAL" in str(sql)
+        assert "p.embedding <=> q.vec" in str(sql)
+        assert params["query_1"] == "[0.3,0.4]"
+        assert [[hit["id"] for hit in hits] for hits in results] == [[7], [8, 9], []]
+
+    def test_batch_search_drops_query_papers(self, models):
+        """Test a vector read from a paper asks for one extra row and drops that paper."""
+        db = MagicMock()
+        db.execute.return_value.mappings.return_value = [
+            {"ord": 0, "id": 1, "title": "Self", "similarity": 1.0},
+            {"ord": 0, "id": 7, "title": "A", "similarity": 0.9},
+            {"ord": 0, "id": 8, "title": "B", "similarity": 0.8},
+            {"ord": 1, "id": 1, "title": "Self", "similarity": 0.7},
+            {"ord": 1, "id": 9, "title": "C", "similarity": 0.6},
+        ]
+
+        results = search_many_by_vector(db, [[0.1, 0.2], [0.3, 0.4]], 2, exclude_ids=[1, None])
+
+        assert db.execute.call_args.args[1]["k"] == 3
+        assert [[hit["id"] for hit in hits] for hits in results] == [[7, 8], [1, 9]]
+
+    def test_ef_search_is_local_and_bounded(self, models):
+        """Test a per-query ef_search is set for the transaction, capped and floored."""
+        db = MagicMock()
+        models.setattr(settings, "vector_ef_search_max", 100)
+        models.setattr(settings, "vector_rerank_factor", 4)
+
+        search_by_vector(db, [0.1], 5, ef_search=500)
+        (set_sql, set_params), _ = (c.args for c in db.execute.call_args_list)
+        assert "set_config('hnsw.ef_search', :ef_search, true)" in str(set_sql)
+        assert set_params["ef_search"] == "100"
+
+        db.reset_mock()
+        search_by_vector(db, [0.1], 10, precision="half", ef_search=20)
+        assert db.execute.call_args_list[0].args[1]["ef_search"] == "40"
+
+    def test_quantized_search_covers_rerank_pool(self, models):
+        """Test half and binary scans raise ef_search to the re-rank candidate count."""
+        db = MagicMock()
+        models.setattr(settings, "vector_rerank_factor", 4)
+
+        search_by_vector(db, [0.1], 20, precision="binary")
+        set_sql, set_params = db.execute.call_args_list[0].args
+        assert "hnsw.ef_search" in str(set_sql)
+        assert set_params["ef_search"] == "80"
+
+        db.reset_mock()
+        search_many_by_vector(db, [[0.1, 0.2]], 25, precision="half")
+        assert db.execute.call_args_list[0].args[1]["ef_search"] == "100"
+
+        db.reset_mock()
+        search_by_vector(db, [0.1], 20, precision="full")
+        assert db.execute.call_count == 1
+
+    def test_indexes_take_build_parameters(self, models):
+        """Test new HNSW indexes are built with the configured m and ef_construction."""
+        connection = MagicMock()
+        models.setattr(settings, "vector_hnsw_m", 24)
+        models.setattr(settings, "vector_hnsw_ef_construction", 200)
+
+        embedding_store.create_model_index(connection, "m", 768)
+
+        assert "WITH (m = 24, ef_construction = 200)" in str(connection.execute.call_args.args[0])
+
+    def test_index_progress_is_logged(self, caplog):
+        """Test a running build's progress is polled from a second connection."""
+        engine = MagicMock()
+        connection = engine.connect.return_value.__enter__.return_value
+        connection.execute.return_value = [
+            SimpleNamespace(
+                index="ix_new",
+                phase="building index: loading tuples",
+                blocks_done=0,
+                blocks_total=0,
+                tuples_done=250,
+                tuples_total=1000,
+            )
+        ]
+
+        with caplog.at_level("INFO", logger=embedding_store.__name__), (
+            embedding_store.report_index_progress(engine, "papers", interval=0.01)
+        ):
+            time.sleep(0.05)
+
+        assert connection.execute.call_args.args[1] == {"table": "papers"}
+        assert "ix_new, building index: loading tuples: 250/1000 tuples (25%)" in caplog.text
@@ -0,0 +1,134 @@
+"""Tests for batched embedding."""
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import embedding_backends
+from app.services.embedding_backends import load_backend, mean_pool
+from app.services.embeddings import EmbeddingService, load_model_backend
+
+
+class FakeBackend:
+    """Deterministic stand-in for an embedding backend."""
+
+    def __init__(self, dim: int = 4):
+        self.dim = dim
+        self.batches: list[list[str]] = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return np.array(
+            [[len(text), 1.0, 0.0, 0.0][: self.dim] for text in texts], dtype=np.float32
+        )
+
+
+def _service(backend) -> EmbeddingService:
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.dim = 4
+    service._model_key = None
+    service._backend = backend
+    return service
+
+
+class TestEmbedMany:
+    """Tests for EmbeddingService.embed_many."""
+
+    def test_rows_keep_input_order(self):
+        """Test each row is the embedding of the text at the same position."""
+        service = _service(FakeBackend())
+        texts = ["ccc", "a", "bbbbb", "dd"]
+
+        matrix = service.embed_many(texts, batch_size=2)
+
+        assert matrix.dtype == np.float32
+        assert matrix.shape == (4, 4)
+        assert matrix[:, 0].tolist() == [3.0, 1.0, 5.0, 2.0]
+
+    def test_batches_group_similar_lengths(self):
+        """Test texts are bucketed by length before batching."""
+        backend = FakeBackend()
+        service = _service(backend)
+
+        service.embed_many(["x" * 50, "y", "z" * 49, "w" * 2], batch_size=2)
+
+        assert [[len(text) for text in batch] for batch in backend.batches] == [[1, 2], [49, 50]]
+
+    def test_without_backend_returns_zeros(self):
+        """Test the zero-vector fallback when no backend is installed."""
+        service = _service(None)
+
+        assert service.embed_many(["a", "b"]).tolist() == [[0.0] * 4] * 2
+        assert service.embed_many([]).shape == (0, 4)
+        assert service.embed("a") == [0.0] * 4
+
+    def test_embed_is_single_row_of_embed_many(self):
+        """Test embed keeps returning a list of floats."""
+        service = _service(FakeBackend())
+
+        assert service.embed("abc") == [3.0, 1.0, 0.0, 0.0]
+
+
+class TestMeanPool:
+    """Tests for the ONNX backend's pooling."""
+
+    def test_ignores_padding_and_normalizes(self):
+        """Test padded positions are excluded from the mean and rows have unit norm."""
+        tokens = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+        mask = np.array([[1, 1, 0]])
+
+        pooled = mean_pool(tokens, mask)
+
+        assert pooled.dtype == np.float32
+        assert pooled.tolist() == [[1.0, 0.0]]
+
+    def test_fully_masked_row_is_zero(self):
+        """Test an all-padding row does not divide by zero."""
+        pooled = mean_pool(np.ones((1, 2, 3), dtype=np.float32), np.zeros((1, 2)))
+
+        assert pooled.tolist() == [[0.0, 0.0, 0.0]]
+
+
+class TestLoadBackend:
+    """Tests for backend selection."""
+
+    def test_unknown_backend_raises(self):
+        """Test a misconfigured EMBEDDING_BACKEND fails loudly."""
+        with pytest.raises(ValueError):
+            load_backend("tensorflow")
+
+    def test_missing_packages_fall_back(self, monkeypatch):
+        """Test a backend whose packages are absent yields None (zero vectors)."""
+        monkeypatch.setattr(embedding_backends, "onnxruntime", None)
+        monkeypatch.setattr(embedding_backends, "SentenceTransformer", None)
+
+        assert load_backend("onnx") is None
+        assert load_backend("torch") is None
+
+    def test_model_key_names_backend_variant(self, monkeypatch):
+        """Test ONNX embeddings are cached apart from the PyTorch reference."""
+        service = _service(FakeBackend())
+        monkeypatch.setattr(settings, "embedding_backend", "torch")
+        assert service.model_key == settings.embedding_model
+
+        monkeypatch.setattr(settings, "embedding_backend", "onnx")
+        monkeypatch.setattr(settings, "embedding_onnx_quantized", True)
+        assert service.model_key == f"{settings.embedding_model}:onnx-int8"
+
+    def test_backend_for_stored_model_key(self, monkeypatch):
+        """Test a stored model key selects the backend and model that produced it."""
+        calls = []
+        monkeypatch.setattr(
+            "app.services.embeddings.load_backend",
+            lambda name, **options: calls.append((name, options)) or FakeBackend(),
+        )
+
+        service = EmbeddingService.for_model("other/model")
+        load_model_backend("other/model:onnx-int8")
+
+        assert service.model_key == "other/model"
+        assert EmbeddingService.for_model("other/model") is service
+        assert calls == [
+            ("torch", {"model_name": "other/model"}),
+            ("onnx", {"quantized": True}),
+        ]
+        EmbeddingService._models.clear()
@@ -0,0 +1,97 @@
+"""Tests for hybrid full-text and vector search."""
+from unittest.mock import MagicMock, patch
+
+from app.config import settings
+from app.db.session import get_db
+from app.main import app
+from app.services.embedding_executor import EmbeddingExecutor
+from app.services.hybrid_search import hybrid_search
+from app.services.vector_search import VectorFilters
+
+
+class TestHybridSearch:
+    """Tests for the fused search statement."""
+
+    def test_both_arms_run_in_one_statement(self):
+        """Test the text and vector arms and their fusion are a single query."""
+        db = MagicMock()
+
+        hybrid_search(db, "quantum error correction", [0.1], 5, candidates=40, rrf_k=60)
+
+        db.execute.assert_called_once()
+        sql, params = db.execute.call_args.args
+        sql = str(sql)
+        assert "p.tsv @@ query" in sql
+        assert "ts_rank_cd(p.tsv, query)" in sql
+        assert "<=> :vec" in sql
+        assert "FULL OUTER JOIN vector_hits" in sql
+        assert params["arm_limit"] == 40
+        assert params["rrf_k"] == 60
+        assert params["k"] == 5
+
+    def test_filters_apply_to_both_arms(self):
+        """Test list_papers filters restrict the text and the vector candidates."""
+        db = MagicMock()
+
+        hybrid_search(db, "robots", [0.1], 5, VectorFilters(domain="cs.RO", min_moat_score=0.5))
+
+        sql, params = db.execute.call_args.args
+        assert str(sql).count("p.domain = 'cs.RO'") == 2
+        assert str(sql).count("p.moat_score >= :min_moat_score") == 2
+        assert params["min_moat_score"] == 0.5
+
+    def test_filtered_search_sets_iterative_scan_in_the_statement(self, monkeypatch):
+        """Test iterative scans are turned on by the fused query, not a separate round trip."""
+        db = MagicMock()
+        monkeypatch.setattr(settings, "vector_iterative_scan", "strict_order")
+
+        hybrid_search(db, "robots", [0.1], 5, VectorFilters(domain="cs.RO"))
+
+        db.execute.assert_called_once()
+        sql, params = db.execute.call_args.args
+        assert "WHERE (SELECT concat(set_config('hnsw.iterative_scan'" in str(sql)
+        assert params["iterative_scan"] == "strict_order"
+
+        db.reset_mock()
+        hybrid_search(db, "robots", [0.1], 5)
+        assert "hnsw.iterative_scan" not in str(db.execute.call_args.args[0])
+
+
+def test_hybrid_endpoint_returns_component_ranks(client):
+    """Test /papers/search returns fused scores with each arm's rank."""
+    mock_db = MagicMock()
+    mock_db.execute().mappings().all.return_value = [
+        {
+            "id": 1,
+            "title": "Surface Codes at Scale",
+            "score": 1 / 61 + 1 / 62,
+            "text_rank": 1,
+            "vector_rank": 2,
+            "text_score": 0.3,
+            "similarity": 0.81,
+        },
+        {
+            "id": 2,
+            "title": "Decoding Qubits",
+            "score": 1 / 61,
+            "text_rank": None,
+            "vector_rank": 1,
+            "text_score": None,
+            "similarity": 0.85,
+        },
+    ]
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch.object(EmbeddingExecutor, "get") as mock_get_executor:
+        mock_get_executor.return_value.embed.return_value = [0.1] * 384
+        response = client.get("/v1/papers/search?q=quantum error correction&k=2")
+        missing = client.get("/v1/papers/search")
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data] == [1, 2]
+    assert data[0]["text_rank"] == 1 and data[0]["vector_rank"] == 2
+    assert data[1]["text_rank"] is None and data[1]["text_score"] is None
+    assert missing.status_code == 422
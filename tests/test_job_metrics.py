@@ -0,0 +1,76 @@
+"""Tests for batch job stage metrics and their export."""
+import pytest
+
+from app.config import settings
+from app.lib.job_metrics import COMPUTE, DB_WRITE, JobRun, StageRecorder, job_run
+from app.metrics import WORKER_REGISTRY
+
+
+def _sample(name: str, **labels) -> float | None:
+    return WORKER_REGISTRY.get_sample_value(name, labels)
+
+
+class TestStageRecorder:
+    """Tests for StageRecorder and JobRun."""
+
+    def test_records_duration_and_rows(self):
+        """Test a stage records its elapsed time and rows set inside the block."""
+        stages = StageRecorder()
+        with stages.stage(COMPUTE) as timing:
+            timing.rows = 12
+        with stages.stage(DB_WRITE, rows=3):
+            pass
+
+        assert [(name, rows) for name, _, rows in stages.observations] == [
+            (COMPUTE, 12),
+            (DB_WRITE, 3),
+        ]
+        assert all(seconds >= 0 for _, seconds, _ in stages.observations)
+
+    def test_stage_is_recorded_on_error(self):
+        """Test a failing stage still records its duration."""
+        stages = StageRecorder()
+        with pytest.raises(RuntimeError), stages.stage(COMPUTE):
+            raise RuntimeError("boom")
+
+        assert len(stages.observations) == 1
+
+    def test_job_run_replays_worker_observations(self):
+        """Test observations from worker processes land in the job histograms."""
+        run = JobRun("test_replay")
+
+        run.replay([(COMPUTE, 0.5, 10), (COMPUTE, 0.25, 5)])
+
+        assert _sample("worker_stage_rows", job="test_replay", stage=COMPUTE) == 15
+        assert _sample(
+            "worker_stage_duration_seconds_count", job="test_replay", stage=COMPUTE
+        ) >= 2
+
+
+class TestJobRun:
+    """Tests for the job_run context manager."""
+
+    def test_writes_textfile_on_success(self, tmp_path, monkeypatch):
+        """Test run metrics are exported to the textfile directory."""
+        monkeypatch.setattr(settings, "metrics_textfile_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "metrics_pushgateway_url", "")
+
+        with job_run("test_textfile") as run:
+            run.rows = 100
+
+        content = (tmp_path / "test_textfile.prom").read_text()
+        assert 'worker_run_duration_seconds{job="test_textfile"}' in content
+        assert 'worker_last_run_timestamp_seconds{job="test_textfile",status="success"}' in content
+        assert "worker_runs_total" not in content
+        assert _sample("worker_peak_rss_bytes", job="test_textfile") > 0
+        assert _sample("worker_rows_per_second", job="test_textfile") > 0
+
+    def test_failure_is_recorded_and_reraised(self, monkeypatch):
+        """Test a failing job is recorded as a failure and a push error does not mask it."""
+        monkeypatch.setattr(settings, "metrics_textfile_dir", "")
+        monkeypatch.setattr(settings, "metrics_pushgateway_url", "http://127.0.0.1:9")
+
+        with pytest.raises(ValueError), job_run("test_failure"):
+            raise ValueError("bad input")
+
+        assert _sample("worker_last_run_timestamp_seconds", job="test_failure", status="failure")
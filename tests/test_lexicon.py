@@ -0,0 +1,72 @@
+"""Tests for the compiled lexicon matcher."""
+import os
+import re
+
+import yaml
+
+from app.services.lexicon import LEXICON_PATH, LexiconMatcher
+
+
+def _naive_find(lexicons: dict, text: str) -> set[str]:
+    return {
+        keyword.lower()
+        for section in lexicons.values()
+        for category in section.values()
+        for keyword in category
+        if re.search(r"\b" + re.escape(keyword.lower()) + r"\b", text.lower())
+    }
+
+
+def _write(path, data: dict) -> None:
+    path.write_text(yaml.safe_dump(data))
+
+
+class TestLexiconMatcher:
+    """Tests for LexiconMatcher."""
+
+    def test_matches_agree_with_per_keyword_search(self):
+        """Test single-pass matching finds exactly what per-keyword searches find."""
+        matcher = LexiconMatcher(LEXICON_PATH)
+        texts = [
+            "CMOS compatible wafer scale process at room temperature",
+            "A cmos-compatible pilot line with high yield and production yield",
+            "cleanroom only fabrication, cryogenic required, pilot plant",
+            "Requires a supercomputer; GPU cluster (petaflop) and TPU",
+            "cmosx pilots yields trl 67 open-source",
+            "",
+        ]
+        for text in texts:
+            assert matcher.find(text) == _naive_find(matcher.lexicons, text), text
+
+    def test_nested_keywords_at_same_position(self):
+        """Test shorter keywords sharing a start with a longer match are reported."""
+        matcher = LexiconMatcher(LEXICON_PATH)
+        matches = matcher.match("cmos compatible pilot line")
+
+        manufacturing = matches["scalability_signals"]["manufacturing"]
+        assert "cmos compatible" in manufacturing
+        assert "cmos" in manufacturing
+        assert "pilot" in matches["scalability_signals"]["maturity"]
+        assert "pilot line" in matches["scalability_signals"]["economic"]
+
+    def test_match_covers_every_category(self):
+        """Test match returns all sections and categories, preserving lexicon order."""
+        matcher = LexiconMatcher(LEXICON_PATH)
+        matches = matcher.match("synchrotron and cryogenic cleanroom")
+
+        assert set(matches) == {"moat_barriers", "scalability_signals"}
+        assert matches["moat_barriers"]["equipment"] == ["cleanroom", "cryogenic", "synchrotron"]
+        assert matches["scalability_signals"]["blockers"] == []
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        """Test the lexicon is recompiled only after the file mtime changes."""
+        path = tmp_path / "lexicons.yaml"
+        _write(path, {"moat_barriers": {"equipment": ["laser"]}})
+        matcher = LexiconMatcher(path)
+        assert matcher.find("laser and maser") == {"laser"}
+
+        _write(path, {"moat_barriers": {"equipment": ["maser"]}})
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        assert matcher.find("laser and maser") == {"maser"}
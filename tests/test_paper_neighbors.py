@@ -0,0 +1,188 @@
+"""Tests for the precomputed paper neighbor graph."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.db.session import get_db
+from app.lib.job_metrics import JobRun
+from app.main import app
+from app.services.paper_neighbors import related_papers
+from app.workers import paper_neighbors
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _run_job(state, dirty, affected, pruned=(0, set())):
+    session = MagicMock()
+    watermark = SimpleNamespace(state=state, watermark="2025-01-01")
+    session.get.return_value = watermark
+    recompute = MagicMock(side_effect=[affected, set()])
+    with patch.object(paper_neighbors, "SessionLocal", return_value=session), patch.object(
+        paper_neighbors, "read_model", return_value=MODEL
+    ), patch.object(paper_neighbors, "_dirty_ids", return_value=dirty) as dirty_ids, patch.object(
+        paper_neighbors, "_recompute", recompute
+    ), patch.object(paper_neighbors, "bump_corpus_version") as bump, patch.object(
+        paper_neighbors.settings, "neighbors_k", 3
+    ), patch.object(paper_neighbors, "_prune", return_value=pruned):
+        paper_neighbors._run(JobRun("test"), False)
+    return watermark, dirty_ids, recompute, bump
+
+
+class TestSearch:
+    """Tests for the batched neighbor search."""
+
+    def test_drops_self_and_keeps_k(self):
+        """Test a paper is not its own neighbor and each list holds k entries."""
+        session = MagicMock()
+        vectors = {1: np.array([1.0, 0.0], dtype=np.float32), 2: np.array([0.0, 1.0], dtype=np.float32)}
+        batch = [
+            [{"id": 1, "similarity": 1.0}, {"id": 5, "similarity": 0.9}, {"id": 6, "similarity": 0.8}],
+            [{"id": 7, "similarity": 0.95}, {"id": 2, "similarity": 0.94}, {"id": 8, "similarity": 0.5}],
+        ]
+        with patch.object(paper_neighbors, "load_embeddings", return_value=vectors), patch.object(
+            paper_neighbors, "search_many_by_vector", return_value=batch
+        ) as search, patch.object(paper_neighbors, "set_ef_search") as ef_search:
+            lists = paper_neighbors._search(session, [1, 2, 3], MODEL, 2)
+
+        assert lists == {1: [(5, 0.9), (6, 0.8)], 2: [(7, 0.95), (8, 0.5)]}
+        assert search.call_args.args[1:3] == ([[1.0, 0.0], [0.0, 1.0]], 3)
+        ef_search.assert_called_once_with(session, paper_neighbors.MIN_EF_SEARCH)
+
+
+class TestReverseNeighbors:
+    """Tests for finding lists a recomputation invalidates."""
+
+    def test_listed_and_newly_close_papers(self):
+        """Test papers listing a changed paper, or now beaten by it, are recomputed."""
+        session = MagicMock()
+        session.execute.side_effect = [
+            MagicMock(scalars=MagicMock(return_value=[10, 1])),
+            # paper_id, neighbor count, weakest similarity
+            [(20, 3, 0.5), (21, 3, 0.95), (22, 2, 0.99)],
+        ]
+        lists = {1: [(20, 0.9), (21, 0.9), (2, 0.9)], 2: [(22, 0.1)]}
+
+        affected = paper_neighbors._reverse_neighbors(session, lists, MODEL, 3, skip={1, 2})
+
+        assert affected == {10, 20, 22}
+
+    def test_nothing_recomputed(self):
+        """Test an empty recomputation touches no other list."""
+        session = MagicMock()
+
+        assert paper_neighbors._reverse_neighbors(session, {}, MODEL, 3, skip=set()) == set()
+        session.execute.assert_not_called()
+
+
+class TestDirtyIds:
+    """Tests for selecting papers whose vector changed."""
+
+    def _sql(self, model: str) -> str:
+        session = MagicMock()
+        with patch.object(paper_neighbors, "in_column", return_value=model == MODEL):
+            paper_neighbors._dirty_ids(session, model, "2025-01-01")
+        return str(session.execute.call_args.args[0])
+
+    def test_column_model_reads_embedded_at(self):
+        """Test score writes, which only move papers.updated_at, do not mark papers dirty."""
+        sql = self._sql(MODEL)
+
+        assert "papers.embedded_at >" in sql
+        assert "papers.updated_at" not in sql
+
+    def test_side_model_reads_its_embedding_rows(self):
+        """Test other model versions use their paper_embeddings write time."""
+        sql = self._sql("intfloat/e5-small-v2")
+
+        assert "paper_embeddings.updated_at >" in sql
+        assert "papers.updated_at" not in sql
+
+
+class TestPrune:
+    """Tests for dropping rows that left the graph."""
+
+    def test_deletes_retired_models_and_unembedded_papers(self):
+        """Test other models' lists and papers without a vector are deleted."""
+        session = MagicMock()
+        session.execute.return_value.rowcount = 2
+        session.execute.return_value.scalars.return_value = [4, 5]
+
+        with patch.object(paper_neighbors, "in_column", return_value=True):
+            pruned, shortened = paper_neighbors._prune(session, MODEL)
+
+        retired, lists, entries = (str(c.args[0]) for c in session.execute.call_args_list)
+        assert "paper_neighbors.model !=" in retired
+        assert "paper_neighbors.paper_id IN (SELECT papers.id" in lists
+        assert "papers.embedding IS NULL" in lists
+        assert "paper_neighbors.neighbor_id IN" in entries
+        assert "RETURNING paper_neighbors.paper_id" in entries
+        assert (pruned, shortened) == (6, {4, 5})
+
+
+class TestRun:
+    """Tests for the incremental job run."""
+
+    def test_incremental_run_recomputes_reverse_neighbors(self):
+        """Test changed papers are searched first, then the lists they invalidated."""
+        state = {"model": MODEL, "k": 3}
+
+        watermark, dirty_ids, recompute, bump = _run_job(state, [1, 2], {7})
+
+        assert dirty_ids.call_args.args[2] == "2025-01-01"
+        assert recompute.call_args_list[0].args[2:] == ([1, 2], MODEL, 3, {1, 2})
+        assert recompute.call_args_list[1].args[2:] == ([7], MODEL, 3, None)
+        assert watermark.state == state
+        bump.assert_called_once()
+
+    def test_lists_that_lost_a_neighbor_are_recomputed(self):
+        """Test papers whose neighbor was pruned are searched again with the reverse neighbors."""
+        state = {"model": MODEL, "k": 3}
+
+        _, _, recompute, bump = _run_job(state, [1], {7}, pruned=(4, {1, 8}))
+
+        assert recompute.call_args_list[1].args[2] == [7, 8]
+        bump.assert_called_once()
+
+    def test_new_k_rebuilds_everything(self):
+        """Test a changed NEIGHBORS_K ignores the watermark and skips reverse lookups."""
+        watermark, dirty_ids, recompute, bump = _run_job({"model": MODEL, "k": 50}, [], set())
+
+        assert dirty_ids.call_args.args[2] is None
+        assert recompute.call_args_list[0].args[5] is None
+        assert watermark.state == {"model": MODEL, "k": 3}
+        bump.assert_not_called()
+
+
+class TestReads:
+    """Tests for reading the graph."""
+
+    def test_related_papers_needs_k_rows(self):
+        """Test a short neighbor list defers to the index search."""
+        session = MagicMock()
+        row = SimpleNamespace(id=5, title="Neighbor", similarity=0.9)
+        session.execute.return_value.all.return_value = [row]
+
+        assert related_papers(session, 1, 2) is None
+        assert related_papers(session, 1, 1) == [{"id": 5, "title": "Neighbor", "similarity": 0.9}]
+
+
+def test_near_by_paper_id_reads_the_graph(client):
+    """Test an unfiltered paper_id query is answered from the graph without a vector search."""
+    mock_db = MagicMock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+    related = [{"id": 5, "title": "Neighbor", "similarity": 0.9}]
+
+    with patch("app.api.routes.papers.related_papers", return_value=related) as graph, patch(
+        "app.api.routes.papers.get_search_backend"
+    ) as backend:
+        response = client.get("/v1/papers/near?paper_id=1&k=1")
+        filtered = client.get("/v1/papers/near?paper_id=1&k=1&domain=cs.RO")
+
+    app.dependency_overrides.clear()
+
+    assert response.json() == related
+    graph.assert_called_once_with(mock_db, 1, 1)
+    assert filtered.status_code == 200
+    backend.return_value.search.assert_called_once()
+    assert backend.return_value.search.call_args.args[3].exclude_ids == (1,)
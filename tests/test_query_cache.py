@@ -0,0 +1,127 @@
+"""Tests for the /papers/near query and result caches."""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services import query_cache as query_cache_module
+from app.services.query_cache import QueryCache
+from app.utils.lru import LRUCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    """Tests for the bounded LRU with TTL."""
+
+    def test_evicts_least_recently_used(self):
+        """Test a read refreshes an entry so the other one is evicted."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_entries_expire_after_ttl(self):
+        """Test entries older than the TTL miss."""
+        clock = FakeClock()
+        cache = LRUCache(10, ttl=5.0, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_size_disables(self):
+        """Test a cache sized 0 stores nothing."""
+        cache = LRUCache(0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestQueryCache:
+    """Tests for QueryCache."""
+
+    def _cache(self, clock, **kwargs) -> QueryCache:
+        options = {"embedding_entries": 10, "result_entries": 10, "ttl": 60.0, "version_poll": 5.0}
+        return QueryCache(clock=clock, **{**options, **kwargs})
+
+    def test_embedding_is_keyed_by_normalized_text(self):
+        """Test whitespace-only variants of a query embed once."""
+        cache = self._cache(FakeClock())
+        embed = MagicMock(return_value=[0.5, 0.5])
+
+        assert cache.embedding("quantum  computing", embed) == [0.5, 0.5]
+        assert cache.embedding(" quantum computing\n", embed) == [0.5, 0.5]
+        embed.assert_called_once_with("quantum  computing")
+
+    def test_batch_embeds_only_uncached_texts_together(self):
+        """Test a batch reuses cached embeddings and embeds the rest in one call."""
+        cache = self._cache(FakeClock())
+        cache.embedding("cached", MagicMock(return_value=[1.0, 0.0]))
+        embed_many = MagicMock(return_value=np.array([[0.0, 1.0], [0.5, 0.5]]))
+
+        vectors = cache.embeddings_for(["new one", "cached", "new two"], embed_many)
+
+        assert vectors == [[0.0, 1.0], [1.0, 0.0], [0.5, 0.5]]
+        embed_many.assert_called_once_with(["new one", "new two"])
+        assert cache.embedding("new two", MagicMock()) == [0.5, 0.5]
+
+    def test_results_keyed_by_vector_k_and_filters(self):
+        """Test a different k or filter set runs its own search."""
+        cache = self._cache(FakeClock())
+        run = MagicMock(return_value=[{"id": 1}])
+
+        with patch.object(query_cache_module, "current_corpus_version", return_value=1):
+            cache.search(MagicMock(), [0.1, 0.2], 5, {}, run)
+            cache.search(MagicMock(), [0.1, 0.2], 5, {"domain": None}, run)
+            cache.search(MagicMock(), [0.1, 0.2], 10, {}, run)
+            cache.search(MagicMock(), [0.1, 0.2], 5, {"domain": "cs.AI"}, run)
+
+        assert run.call_count == 3
+
+    def test_corpus_version_change_clears_results(self):
+        """Test results computed before ingestion or scoring advanced the corpus are dropped."""
+        clock = FakeClock()
+        cache = self._cache(clock)
+        run = MagicMock(return_value=[{"id": 1}])
+
+        with patch.object(
+            query_cache_module, "current_corpus_version", side_effect=[1, 2]
+        ) as version:
+            cache.search(MagicMock(), [0.1], 5, {}, run)
+            clock.now = 1.0
+            cache.search(MagicMock(), [0.1], 5, {}, run)
+            assert run.call_count == 1
+            assert version.call_count == 1
+
+            clock.now = 6.0
+            cache.search(MagicMock(), [0.1], 5, {}, run)
+
+        assert run.call_count == 2
+
+    def test_disabled_result_cache_skips_version_check(self):
+        """Test QUERY_RESULT_CACHE_SIZE=0 always searches and never reads the version."""
+        cache = self._cache(FakeClock(), result_entries=0)
+        run = MagicMock(return_value=[])
+
+        with patch.object(query_cache_module, "current_corpus_version") as version:
+            cache.search(MagicMock(), [0.1], 5, {}, run)
+            cache.search(MagicMock(), [0.1], 5, {}, run)
+
+        assert run.call_count == 2
+        version.assert_not_called()
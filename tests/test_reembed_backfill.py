@@ -0,0 +1,119 @@
+"""Tests for the re-embedding backfill job."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.lib.job_metrics import JobRun
+from app.workers import reembed_backfill
+from app.workers.reembed_backfill import Checkpoint, Throttle
+
+
+class FakeEmbedder:
+    """Embeds a text as [len(text), 0]."""
+
+    def embed_many(self, texts):
+        return np.array([[len(text), 0.0] for text in texts], dtype=np.float32)
+
+
+def _run_backfill(state, chunks, read_model="model-b"):
+    session = MagicMock()
+    watermark = SimpleNamespace(state=state, watermark=None)
+    session.get.return_value = watermark
+    session.execute.return_value.scalar.return_value = 99
+    read_chunks = MagicMock(return_value=iter(chunks))
+    with patch.object(reembed_backfill, "SessionLocal", return_value=session), patch.object(
+        reembed_backfill, "_read_chunks", read_chunks
+    ), patch.object(reembed_backfill, "bump_corpus_version") as bump, patch.object(
+        reembed_backfill.EmbeddingService, "get", return_value=FakeEmbedder()
+    ), patch.object(reembed_backfill, "write_model", return_value="model-b"), patch.object(
+        reembed_backfill, "read_model", return_value=read_model
+    ), patch.object(reembed_backfill, "_build_index") as build_index:
+        reembed_backfill._run(JobRun("test"), False, 2, 1, 0)
+    return session, watermark, read_chunks, bump, build_index
+
+
+class TestCheckpoint:
+    """Tests for backfill checkpoints."""
+
+    def test_resumes_same_model(self):
+        """Test progress toward the configured model is restored."""
+        state = {"model": "m", "last_id": 40, "high_id": 90, "rows": 40, "complete": False}
+
+        assert Checkpoint.from_state(state, "m") == Checkpoint("m", 40, 90, 40, False)
+
+    def test_other_model_starts_over(self):
+        """Test a checkpoint for a previous model is ignored."""
+        state = {"model": "old", "last_id": 40, "high_id": 90, "complete": True}
+
+        assert Checkpoint.from_state(state, "new") == Checkpoint("new")
+        assert Checkpoint.from_state(None, "new") == Checkpoint("new")
+
+
+class TestThrottle:
+    """Tests for the write rate limit."""
+
+    def test_sleeps_until_rate_is_met(self):
+        """Test the throttle waits off the time the rows were ahead of the rate."""
+        clock = MagicMock(side_effect=[0.0, 0.5])
+        sleep = MagicMock()
+
+        Throttle(100, clock=clock, sleep=sleep).wait(200)
+
+        sleep.assert_called_once_with(1.5)
+
+    def test_unlimited(self):
+        """Test a rate of 0 never sleeps."""
+        sleep = MagicMock()
+
+        Throttle(0, sleep=sleep).wait(10_000)
+
+        sleep.assert_not_called()
+
+
+class TestRun:
+    """Tests for the backfill loop."""
+
+    def test_resumes_after_checkpoint_and_checkpoints_each_chunk(self):
+        """Test reading starts after the saved id and every chunk commits its progress."""
+        state = {"model": "model-b", "last_id": 10, "high_id": 50, "rows": 10}
+        chunks = [([11, 12], ["a", "bb"]), ([13], ["ccc"])]
+
+        with patch.object(reembed_backfill, "write_embeddings") as write:
+            session, watermark, read_chunks, bump, build_index = _run_backfill(state, chunks)
+
+        assert read_chunks.call_args.args[1:] == (10, 50, 2)
+        assert [call.args[1] for call in write.call_args_list] == [[11, 12], [13]]
+        assert write.call_args.args[2].tolist() == [[3.0, 0.0]]
+        assert write.call_args.args[3] == "model-b"
+        assert session.commit.call_count == 3
+        assert bump.call_count == 2
+        assert watermark.state == {
+            "model": "model-b",
+            "last_id": 13,
+            "high_id": 50,
+            "rows": 13,
+            "complete": True,
+        }
+        build_index.assert_called_once_with("model-b")
+
+    def test_completed_backfill_catches_up_on_new_papers(self):
+        """Test rerunning a finished backfill reads only papers added since."""
+        state = {"model": "model-b", "last_id": 50, "high_id": 50, "complete": True}
+
+        session, watermark, read_chunks, _, _ = _run_backfill(state, [])
+
+        assert read_chunks.call_args.args[1:] == (50, 99, 2)
+        assert watermark.state["complete"] is True
+        session.commit.assert_called_once()
+
+    def test_backfill_of_unread_model_keeps_caches(self):
+        """Test chunks of a model the API does not read yet leave the corpus version alone."""
+        state = {"model": "model-b", "last_id": 10, "high_id": 50, "rows": 10}
+        chunks = [([11, 12], ["a", "bb"]), ([13], ["ccc"])]
+
+        with patch.object(reembed_backfill, "write_embeddings"):
+            session, _, _, bump, _ = _run_backfill(state, chunks, read_model="model-a")
+
+        assert session.commit.call_count == 3
+        bump.assert_not_called()
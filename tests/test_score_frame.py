@@ -0,0 +1,94 @@
+"""Tests for the columnar per-domain score frame."""
+from statistics import mean, pstdev
+
+import numpy as np
+import pytest
+
+from app.services.score_frame import SCORE_COLUMNS, ScoreFrame
+
+
+def _frame(ids: list[int], **columns) -> ScoreFrame:
+    return ScoreFrame("quantum", ids, columns)
+
+
+class TestScoreFrame:
+    """Tests for ScoreFrame."""
+
+    def test_missing_columns_default_to_zero(self):
+        """Test every score column exists and is aligned with the ids."""
+        frame = _frame([1, 2, 3], novelty=[0.1, 0.2, 0.3])
+
+        assert len(frame) == 3
+        assert set(frame.columns) == set(SCORE_COLUMNS)
+        assert frame["moat"].tolist() == [0.0, 0.0, 0.0]
+
+    def test_rejects_unsorted_ids(self):
+        """Test ids must be strictly increasing so lookups can bisect."""
+        with pytest.raises(ValueError):
+            _frame([3, 1])
+
+    def test_get_and_assign_by_paper_id(self):
+        """Test columns are read and written by paper id."""
+        frame = _frame([10, 20, 30], moat=[0.1, 0.2, 0.3])
+
+        frame.assign([30, 10], moat=[0.9, 0.5], composite=[1.0, 2.0])
+
+        assert frame.get("moat", [10, 20, 30]).tolist() == [0.5, 0.2, 0.9]
+        assert frame["composite"].tolist() == [2.0, 0.0, 1.0]
+
+    def test_unknown_paper_id_raises(self):
+        """Test lookups of ids outside the frame fail loudly."""
+        frame = _frame([10, 20])
+
+        with pytest.raises(KeyError):
+            frame.get("moat", [15])
+        with pytest.raises(KeyError):
+            frame.get("moat", [25])
+
+    def test_contains_marks_held_ids(self):
+        """Test membership is reported per id without raising."""
+        frame = _frame([10, 20])
+
+        assert frame.contains([20, 15, 10, 25]).tolist() == [True, False, True, False]
+        assert _frame([]).contains([1]).tolist() == [False]
+
+    def test_concat_preserves_order(self):
+        """Test shard frames join in id order and empty frames are skipped."""
+        joined = ScoreFrame.concat(
+            "quantum",
+            [_frame([1, 2], novelty=[0.1, 0.2]), _frame([]), _frame([5], novelty=[0.5])],
+        )
+
+        assert joined.ids.tolist() == [1, 2, 5]
+        assert joined["novelty"].tolist() == [0.1, 0.2, 0.5]
+        assert len(ScoreFrame.concat("quantum", [])) == 0
+
+    def test_stats_match_population_statistics(self):
+        """Test stats agree with statistics.mean/pstdev under DomainMetric names."""
+        rng = np.random.default_rng(7)
+        novelty = rng.random(50).tolist()
+        attention = rng.integers(0, 500, 50).tolist()
+        frame = _frame(list(range(50)), novelty=novelty, attention_raw=attention)
+
+        summary = frame.stats().summary()
+
+        assert summary["novelty_mu"] == pytest.approx(mean(novelty))
+        assert summary["novelty_sigma"] == pytest.approx(pstdev(novelty))
+        assert summary["attention_mu"] == pytest.approx(mean(attention))
+        assert summary["attention_sigma"] == pytest.approx(pstdev(attention))
+
+    def test_stats_of_small_frames(self):
+        """Test empty and single-paper frames report zeros rather than NaN."""
+        assert all(value == 0.0 for value in _frame([]).stats().summary().values())
+        single = _frame([1], moat=[0.4]).stats().summary()
+        assert single["moat_mu"] == 0.4
+        assert single["moat_sigma"] == 0.0
+
+    def test_stat_columns_by_paper_id(self):
+        """Test aggregated columns are returned under their statistic names."""
+        frame = _frame([1, 2], attention_raw=[10.0, 30.0], moat=[0.1, 0.2])
+
+        columns = frame.stat_columns([2])
+
+        assert columns["attention"].tolist() == [30.0]
+        assert columns["moat"].tolist() == [0.2]
@@ -3,6 +3,7 @@
 from app.services.scoring import (
     calculate_moat_score,
     calculate_scalability_score,
+    content_hash,
     normalize_score_zscore,
 )
 
@@ -172,3 +173,25 @@ class TestZScoreNormalization:
         for raw_score, mean, std in test_cases:
             normalized = normalize_score_zscore(raw_score, mean, std)
             assert 0.0 <= normalized <= 1.0, f"Score {normalized} out of range for inputs ({raw_score}, {mean}, {std})"
+
+
+class TestContentHash:
+    """Tests for the scoring content hash."""
+
+    def test_stable_for_same_content(self):
+        """Test identical inputs hash identically."""
+        first = content_hash("Title", "Abstract", ["a", "b"])
+        assert first == content_hash("Title", "Abstract", ["a", "b"])
+        assert len(first) == 64
+
+    def test_changes_with_any_field(self):
+        """Test title, abstract and keyword edits all change the hash."""
+        base = content_hash("Title", "Abstract", ["a", "b"])
+        assert content_hash("Title!", "Abstract", ["a", "b"]) != base
+        assert content_hash("Title", "Abstract.", ["a", "b"]) != base
+        assert content_hash("Title", "Abstract", ["a"]) != base
+        assert content_hash("Title", "Abstract", ["ab"]) != content_hash("Title", "Abstract", ["a", "b"])
+
+    def test_missing_fields(self):
+        """Test None abstract and keywords are treated as empty."""
+        assert content_hash("Title", None, None) == content_hash("Title", "", [])
@@ -0,0 +1,178 @@
+"""Tests for batch scoring over arrays of papers."""
+import random
+
+from app.services.domain_stats import RunningStats
+from app.services.scoring import (
+    calculate_attention_gap_score,
+    calculate_composite_score,
+    calculate_moat_score,
+    calculate_network_score,
+    calculate_scalability_score,
+    normalize_score_zscore,
+    normalize_scores_zscore,
+    score_batch,
+)
+
+PAPERS = [
+    {
+        "title": "Cryogenic qubits in a dilution refrigerator",
+        "abstract": "Cleanroom fabrication under ultra-high vacuum.",
+        "keywords": ["quantum"],
+        "authors": [f"Author {i}" for i in range(7)],
+        "novelty": 0.82,
+        "momentum": 0.9,
+        "repo_stars": 12,
+        "link_count": 1,
+    },
+    {
+        "title": "CMOS compatible photonics",
+        "abstract": "Wafer scale, low cost, room temperature, commercial foundry pilot line.",
+        "keywords": ["silicon"],
+        "authors": ["A", "B"],
+        "novelty": 0.4,
+        "momentum": 0.75,
+        "repo_stars": 900,
+        "link_count": 3,
+    },
+    {
+        "title": "Open source toolkit",
+        "abstract": "Code available on GitHub; reproducible results.",
+        "keywords": None,
+        "authors": None,
+        "novelty": 0.1,
+        "momentum": 0.2,
+        "repo_stars": 0,
+        "link_count": 0,
+    },
+]
+
+
+# Scores of PAPERS under the original per-paper formulas, for domain attention
+# mean 120 and std 300: (moat, scalability, network, attention gap, composite)
+BASELINE_SCORES = [
+    (0.8, 0.0, 0.7999999999999999, 0.22177777777777782, 0.6643555555555556),
+    (0.0, 1.0, 0.2, 0.024999999999999967, 0.4175),
+    (0.0, 0.0, 0.0, 0.0, 0.055),
+]
+# (attention normalized, weighted sum, synergy bonus) under the same statistics
+BASELINE_DETAILS = [
+    (0.44555555555555554, 0.5843555555555556, 0.08),
+    (0.9500000000000001, 0.3775, 0.04),
+    (0.43333333333333335, 0.055, 0.0),
+]
+# (attention gap, composite) when the domain has no attention variance
+BASELINE_ZERO_STD = [(0.2, 0.66), (0.25, 0.46249999999999997), (0.0, 0.055)]
+
+
+def _scalar_scores(paper: dict, mean_stars: float, std_stars: float) -> dict:
+    moat, moat_evidence = calculate_moat_score(paper["title"], paper["abstract"], paper["keywords"])
+    scalability, scalability_evidence = calculate_scalability_score(
+        paper["title"], paper["abstract"], paper["keywords"]
+    )
+    network, network_evidence = calculate_network_score(paper["authors"])
+    gap, gap_evidence = calculate_attention_gap_score(
+        moat, scalability, paper["repo_stars"], paper["link_count"], mean_stars, std_stars
+    )
+    composite, metadata = calculate_composite_score(
+        paper["novelty"], paper["momentum"], gap, moat, scalability, network
+    )
+    return {
+        "moat": (moat, moat_evidence),
+        "scalability": (scalability, scalability_evidence),
+        "network": (network, network_evidence),
+        "attention_gap": (gap, gap_evidence),
+        "composite": (composite, metadata),
+    }
+
+
+class TestScoreBatch:
+    """Tests for score_batch."""
+
+    def test_matches_scalar_functions(self):
+        """Test every column equals the per-paper scalar result exactly."""
+        mean_stars, std_stars = 120.0, 300.0
+        batch = score_batch(PAPERS, domain_mean_stars=mean_stars, domain_std_stars=std_stars)
+
+        assert len(batch) == len(PAPERS)
+        for idx, paper in enumerate(PAPERS):
+            expected = _scalar_scores(paper, mean_stars, std_stars)
+            assert (batch.moat[idx], batch.moat_evidence[idx]) == expected["moat"]
+            assert (
+                batch.scalability[idx],
+                batch.scalability_evidence[idx],
+            ) == expected["scalability"]
+            assert (batch.network[idx], batch.network_evidence[idx]) == expected["network"]
+            assert (
+                batch.attention_gap[idx],
+                batch.attention_gap_evidence[idx],
+            ) == expected["attention_gap"]
+            assert (batch.composite[idx], batch.scoring_metadata[idx]) == expected["composite"]
+
+    def test_matches_baseline_formulas(self):
+        """Test scores equal values pinned from the original scalar implementation."""
+        batch = score_batch(PAPERS, domain_mean_stars=120.0, domain_std_stars=300.0)
+
+        columns = (batch.moat, batch.scalability, batch.network, batch.attention_gap)
+        actual = [
+            tuple(float(column[idx]) for column in (*columns, batch.composite))
+            for idx in range(len(PAPERS))
+        ]
+        assert actual == BASELINE_SCORES
+        details = [
+            (
+                batch.attention_gap_evidence[idx]["attention_normalized"],
+                batch.scoring_metadata[idx]["weighted_sum"],
+                batch.scoring_metadata[idx]["synergy_bonus"],
+            )
+            for idx in range(len(PAPERS))
+        ]
+        assert details == BASELINE_DETAILS
+
+        flat = score_batch(PAPERS, domain_mean_stars=50.0, domain_std_stars=0.0)
+        assert list(zip(flat.attention_gap.tolist(), flat.composite.tolist(), strict=True)) == (
+            BASELINE_ZERO_STD
+        )
+
+    def test_domain_statistics_default_to_batch(self):
+        """Test attention statistics are derived from the batch when omitted."""
+        batch = score_batch(PAPERS)
+
+        assert batch.attention_raw.tolist() == [22, 930, 0]
+        assert batch.attention_gap_evidence[2]["attention_normalized"] < 0.5
+
+    def test_running_attention_statistics(self):
+        """Test live running statistics normalize attention like explicit mean and std."""
+        stats = RunningStats.from_values([0, 22, 930, 40, 5])
+        batch = score_batch(PAPERS, attention_stats=stats)
+        explicit = score_batch(PAPERS, domain_mean_stars=stats.mean, domain_std_stars=stats.std)
+
+        assert batch.attention_gap.tolist() == explicit.attention_gap.tolist()
+        assert calculate_attention_gap_score(0.6, 0.4, 10, 1, attention_stats=stats) == (
+            calculate_attention_gap_score(0.6, 0.4, 10, 1, stats.mean, stats.std)
+        )
+
+    def test_empty_batch(self):
+        """Test an empty batch yields empty columns."""
+        batch = score_batch([])
+
+        assert len(batch) == 0
+        assert batch.scoring_metadata == []
+
+
+def test_normalize_scores_matches_scalar():
+    """Test vectorized z-score normalization equals the scalar function."""
+    rng = random.Random(7)
+    values = [rng.uniform(-50, 500) for _ in range(200)]
+
+    normalized = normalize_scores_zscore(values, 100.0, 40.0)
+
+    assert normalized.tolist() == [normalize_score_zscore(v, 100.0, 40.0) for v in values]
+    assert normalize_scores_zscore(values, 100.0, 0.0).tolist() == [0.5] * len(values)
+    assert normalize_scores_zscore([100.0, 140.0, 60.0, 300.0, -100.0, 110.0], 100.0, 40.0).tolist() == [
+        0.5,
+        0.6666666666666666,
+        0.3333333333333333,
+        1.0,
+        0.0,
+        0.5416666666666666,
+    ]
@@ -0,0 +1,381 @@
+"""Tests for scoring job helpers that do not need a database."""
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.lib.job_metrics import JobRun
+from app.services.domain_stats import DomainStats, RunningStats
+from app.services.score_frame import ScoreFrame
+from app.services.scoring import content_hash
+from app.workers import scoring_daily
+from app.workers.scoring_daily import (
+    DomainPlan,
+    RunOptions,
+    ShardResult,
+    _rescore_remaining,
+    _run,
+    _save_watermark,
+    _score_papers,
+    _score_shard,
+    _shard_bounds,
+    _starmap,
+    _stat_moved,
+    _write_scores,
+)
+
+
+def _paper(paper_id: int, title: str, abstract: str) -> SimpleNamespace:
+    return SimpleNamespace(id=paper_id, title=title, abstract=abstract, keywords=["quantum"])
+
+
+def test_stat_moved_uses_relative_tolerance():
+    """Test statistics moves are relative for large values and absolute below 1."""
+    assert _stat_moved(None, 0.5, 0.05)
+    assert not _stat_moved(100.0, 104.0, 0.05)
+    assert _stat_moved(100.0, 106.0, 0.05)
+    assert not _stat_moved(0.2, 0.24, 0.05)
+    assert _stat_moved(0.2, 0.26, 0.05)
+
+
+def test_score_papers_builds_update_rows():
+    """Test scored papers become primary-key keyed UPDATE parameter sets."""
+    scored_at = datetime(2025, 11, 20, tzinfo=UTC)
+    papers = [
+        _paper(1, "Cryogenic qubits", "Dilution refrigerator in a cleanroom."),
+        _paper(2, "Open source toolkit", "Code available on GitHub."),
+    ]
+
+    rows = _score_papers(
+        papers,
+        novelty_scores=[0.8, 0.1],
+        momentum_scores=[0.9, 0.2],
+        attention={1: (40, 2)},
+        attention_stats=RunningStats(count=10, mean=30.0, m2=4000.0),
+        scored_at=scored_at,
+    )
+
+    assert [row["id"] for row in rows] == [1, 2]
+    assert rows[0]["attention_gap_evidence"]["attention_raw"] == 60
+    assert rows[1]["attention_gap_evidence"]["attention_raw"] == 0
+    assert rows[0]["scored_content_hash"] == content_hash(
+        papers[0].title, papers[0].abstract, papers[0].keywords
+    )
+    assert all(row["scored_at"] == scored_at for row in rows)
+    assert rows[0]["moat_score"] > rows[1]["moat_score"]
+
+
+def test_write_scores_issues_one_statement_per_chunk():
+    """Test a chunk of rows is written with one executemany and committed."""
+    session = MagicMock()
+    rows = [{"id": 1, "composite_score": 0.5}, {"id": 2, "composite_score": 0.7}]
+
+    _write_scores(session, rows)
+
+    session.execute.assert_called_once()
+    assert session.execute.call_args.args[1] == rows
+    session.commit.assert_called_once()
+
+
+def test_write_scores_skips_empty_chunks():
+    """Test nothing is executed when a chunk had no dirty papers."""
+    session = MagicMock()
+
+    _write_scores(session, [])
+
+    session.execute.assert_not_called()
+    session.commit.assert_not_called()
+
+
+class TestSharding:
+    """Tests for per-domain sharding helpers."""
+
+    def test_small_domain_is_one_unbounded_shard(self):
+        """Test domains within the shard size are not split."""
+        assert _shard_bounds(MagicMock(), "quantum", 10, shard_size=10) == [(None, None)]
+
+    def test_shard_bounds_cover_id_space(self):
+        """Test shard ranges are contiguous and open at both ends."""
+        session = MagicMock()
+        session.execute.return_value = [SimpleNamespace(id=1), SimpleNamespace(id=40)]
+
+        bounds = _shard_bounds(session, "quantum", 50, shard_size=25)
+
+        assert bounds == [(None, 40), (40, None)]
+
+    def test_starmap_runs_in_process_without_pool(self):
+        """Test the serial path preserves argument order."""
+        assert _starmap(None, pow, [(2, 3), (3, 2)]) == [8, 9]
+        assert _starmap(None, pow, []) == []
+
+
+def _plan() -> DomainPlan:
+    return DomainPlan(
+        domain="quantum",
+        paper_count=2,
+        centroid=None,
+        attention={},
+        link_dirty=set(),
+        attention_stats=RunningStats(),
+        shards=[(None, None)],
+    )
+
+
+def _options(**overrides) -> RunOptions:
+    scored_at = datetime(2025, 11, 20, tzinfo=UTC)
+    values = {
+        "full": False,
+        "since": datetime(2025, 11, 19, tzinfo=UTC),
+        "scored_at": scored_at,
+        "stale_before": datetime(2025, 10, 20, tzinfo=UTC),
+        "chunk_size": 100,
+        "shard_size": 1000,
+    }
+    values.update(overrides)
+    return RunOptions(**values)
+
+
+class TestRescoreRemaining:
+    """Tests for the second pass over domains whose statistics moved."""
+
+    def test_skips_papers_added_after_the_first_pass(self, monkeypatch):
+        """Test papers missing from the shard frame are left to the next run."""
+        write_session = MagicMock()
+        monkeypatch.setattr(
+            scoring_daily, "SessionLocal", MagicMock(side_effect=[MagicMock(), write_session])
+        )
+        query = MagicMock()
+        query.filter.return_value = query
+        monkeypatch.setattr(scoring_daily, "_shard_papers", lambda *args: query)
+        # Paper 2 was embedded and paper 5 ingested between the two passes
+        chunk = [_paper(3, "Known", "Held by the frame."), _paper(2, "New", "Embedded late.")]
+        chunk += [_paper(5, "New", "Ingested late.")]
+        monkeypatch.setattr(scoring_daily, "_stream_chunks", lambda *args: iter([chunk]))
+        frame = ScoreFrame("quantum", [1, 3], {"novelty": [0.2, 0.4]})
+        result = ShardResult("quantum", frame, frame.stats(), rescored=1)
+
+        remaining = _rescore_remaining(_plan(), 0, result, _options())
+
+        assert remaining.rescored == 2
+        rows = write_session.execute.call_args.args[1]
+        assert [row["id"] for row in rows] == [3]
+        assert remaining.stats.count == 2
+
+    def test_empty_frame_is_not_queried(self, monkeypatch):
+        """Test a shard with no papers in the first pass has nothing to rescore."""
+        session_factory = MagicMock()
+        monkeypatch.setattr(scoring_daily, "SessionLocal", session_factory)
+        result = ShardResult("quantum", ScoreFrame("quantum"), DomainStats())
+
+        assert _rescore_remaining(_plan(), 0, result, _options()) is result
+        session_factory.assert_not_called()
+
+
+def _stored_paper(paper_id: int, scored_at: datetime, **overrides) -> SimpleNamespace:
+    """A paper whose stored scores match its current content, as after a previous run."""
+    paper = SimpleNamespace(
+        id=paper_id,
+        title=f"Paper {paper_id}",
+        abstract="Dilution refrigerator in a cleanroom.",
+        keywords=["quantum"],
+        published_at=None,
+        read_embedding=None,
+        moat_score=0.5,
+        scalability_score=0.5,
+        network_score=0.0,
+        attention_gap_score=0.5,
+        composite_score=0.5,
+        scored_at=scored_at,
+    )
+    paper.scored_content_hash = content_hash(paper.title, paper.abstract, paper.keywords)
+    for name, value in overrides.items():
+        setattr(paper, name, value)
+    return paper
+
+
+class TestIncrementalSelection:
+    """Tests for which papers a shard rescores."""
+
+    def _score(self, monkeypatch, chunk, options, link_dirty=()):
+        write_session = MagicMock()
+        monkeypatch.setattr(
+            scoring_daily, "SessionLocal", MagicMock(side_effect=[MagicMock(), write_session])
+        )
+        monkeypatch.setattr(scoring_daily, "_shard_papers", lambda *args: MagicMock())
+        monkeypatch.setattr(scoring_daily, "_stream_chunks", lambda *args: iter([chunk]))
+        plan = _plan()
+        plan.link_dirty = set(link_dirty)
+        result = _score_shard(plan, 0, options)
+        written = [
+            row["id"] for call in write_session.execute.call_args_list for row in call.args[1]
+        ]
+        return result, written
+
+    def _chunk(self, options: RunOptions) -> list[SimpleNamespace]:
+        fresh = options.scored_at - timedelta(days=1)
+        return [
+            _stored_paper(1, fresh),
+            _stored_paper(2, fresh, abstract="Edited abstract."),
+            _stored_paper(3, fresh),
+            _stored_paper(4, options.stale_before - timedelta(days=1)),
+            _stored_paper(5, None, composite_score=None, scored_content_hash=None),
+            _stored_paper(6, fresh, keywords=["quantum", "cryogenics"]),
+        ]
+
+    def test_incremental_rescores_only_changed_papers(self, monkeypatch):
+        """Test edited content, new links, stale and never-scored papers are rescored."""
+        options = _options()
+
+        result, written = self._score(monkeypatch, self._chunk(options), options, link_dirty={3})
+
+        assert written == [2, 3, 4, 5, 6]
+        assert result.rescored == 5
+        # Unchanged papers keep their stored scores and still count towards the statistics
+        assert result.frame.ids.tolist() == [1, 2, 3, 4, 5, 6]
+        assert result.frame.get("composite", [1]).tolist() == [0.5]
+        assert result.stats.count == 6
+
+    def test_full_run_rescores_everything(self, monkeypatch):
+        """Test --full ignores content hashes and score ages."""
+        options = _options(full=True, since=None)
+
+        result, written = self._score(monkeypatch, self._chunk(options), options)
+
+        assert written == [1, 2, 3, 4, 5, 6]
+        assert result.rescored == 6
+
+    def test_unchanged_shard_writes_nothing(self, monkeypatch):
+        """Test a shard without changes issues no UPDATE."""
+        options = _options()
+        fresh = options.scored_at - timedelta(days=1)
+
+        result, written = self._score(
+            monkeypatch, [_stored_paper(1, fresh), _stored_paper(2, fresh)], options
+        )
+
+        assert written == []
+        assert result.rescored == 0
+
+
+class TestRun:
+    """Tests for the scoring run around the shards: watermark and moved domains."""
+
+    @pytest.fixture
+    def job(self, monkeypatch):
+        calls = SimpleNamespace(
+            options=[], remaining=[], saved=[], session=MagicMock(), watermark=None, moved=False
+        )
+        plan = _plan()
+        monkeypatch.setattr(scoring_daily, "SessionLocal", lambda: calls.session)
+        monkeypatch.setattr(scoring_daily, "_load_watermark", lambda session: calls.watermark)
+        monkeypatch.setattr(scoring_daily, "_domain_counts", lambda session: [("quantum", 2)])
+
+        def plan_domain(domain, count, options):
+            calls.options.append(options)
+            return plan
+
+        def score_shard(plan, shard, options):
+            frame = ScoreFrame("quantum", [1, 2], {"novelty": [0.2, 0.4]})
+            return ShardResult("quantum", frame, frame.stats(), rescored=1)
+
+        def rescore_remaining(plan, shard, result, options):
+            calls.remaining.append(shard)
+            return ShardResult("quantum", result.frame, result.stats, rescored=2)
+
+        monkeypatch.setattr(scoring_daily, "_plan_domain", plan_domain)
+        monkeypatch.setattr(scoring_daily, "_score_shard", score_shard)
+        monkeypatch.setattr(scoring_daily, "_rescore_remaining", rescore_remaining)
+        monkeypatch.setattr(scoring_daily, "_previous_metric", lambda session, domain: object())
+        monkeypatch.setattr(
+            scoring_daily, "_domain_stats_moved", lambda previous, current, tolerance: calls.moved
+        )
+        monkeypatch.setattr(scoring_daily, "_store_domain_metric", MagicMock())
+        monkeypatch.setattr(
+            scoring_daily,
+            "_save_watermark",
+            lambda session, watermark, state: calls.saved.append((watermark, state)),
+        )
+        monkeypatch.setattr(scoring_daily, "bump_corpus_version", MagicMock())
+        return calls
+
+    def test_first_run_is_full(self, job):
+        """Test a missing watermark forces a full run and persists the run start."""
+        _run(JobRun("test"), False, None, 1)
+
+        assert job.options[0].full and job.options[0].since is None
+        assert job.remaining == []
+        watermark, state = job.saved[0]
+        assert watermark == job.options[0].scored_at
+        assert state == {"full": True, "rescored": 1, "total": 2}
+        job.session.commit.assert_called_once()
+
+    def test_incremental_run_reads_the_watermark(self, job):
+        """Test a stored watermark selects incremental mode from that point."""
+        since = datetime(2025, 11, 19, tzinfo=UTC)
+        job.watermark = SimpleNamespace(watermark=since)
+
+        _run(JobRun("test"), False, None, 1)
+
+        assert not job.options[0].full
+        assert job.options[0].since == since
+        assert job.saved[0][1]["full"] is False
+
+    def test_full_flag_ignores_the_watermark(self, job):
+        """Test --full rescores everything even with a watermark, and skips the drift pass."""
+        job.watermark = SimpleNamespace(watermark=datetime(2025, 11, 19, tzinfo=UTC))
+        job.moved = True
+
+        _run(JobRun("test"), True, None, 1)
+
+        assert job.options[0].full and job.options[0].since is None
+        assert job.remaining == []
+
+    def test_moved_domain_rescores_the_rest(self, job):
+        """Test a domain whose statistics moved gets a second pass over every shard."""
+        job.watermark = SimpleNamespace(watermark=datetime(2025, 11, 19, tzinfo=UTC))
+        job.moved = True
+
+        _run(JobRun("test"), False, None, 1)
+
+        assert job.remaining == [0]
+        assert job.saved[0][1]["rescored"] == 2
+
+    def test_steady_domain_is_not_rescored(self, job):
+        """Test statistics within tolerance leave unchanged papers alone."""
+        job.watermark = SimpleNamespace(watermark=datetime(2025, 11, 19, tzinfo=UTC))
+
+        _run(JobRun("test"), False, None, 1)
+
+        assert job.remaining == []
+        assert job.saved[0][1]["rescored"] == 1
+
+
+class TestWatermark:
+    """Tests for persisting the scoring watermark."""
+
+    def test_first_save_adds_the_row(self):
+        """Test the first run creates the job's watermark row."""
+        session = MagicMock()
+        session.get.return_value = None
+        watermark = datetime(2025, 11, 20, tzinfo=UTC)
+
+        _save_watermark(session, watermark, {"full": True})
+
+        row = session.add.call_args.args[0]
+        assert row.job == scoring_daily.JOB_NAME
+        assert row.watermark == watermark
+        assert row.state == {"full": True}
+
+    def test_later_saves_update_it(self):
+        """Test later runs move the existing watermark forward."""
+        session = MagicMock()
+        row = SimpleNamespace(watermark=datetime(2025, 11, 19, tzinfo=UTC), state={})
+        session.get.return_value = row
+        watermark = datetime(2025, 11, 20, tzinfo=UTC)
+
+        _save_watermark(session, watermark, {"full": False, "rescored": 3})
+
+        session.add.assert_not_called()
+        assert row.watermark == watermark
+        assert row.state == {"full": False, "rescored": 3}
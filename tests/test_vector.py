@@ -0,0 +1,107 @@
+"""Tests for the NumPy vector helpers."""
+import math
+
+import numpy as np
+import pytest
+
+from app.utils.vector import (
+    CentroidAccumulator,
+    centroid,
+    cosine_similarities,
+    cosine_similarity,
+    novelty_scores,
+    stack_vectors,
+)
+
+
+def _python_cosine(first: list[float], second: list[float]) -> float:
+    dot = sum(a * b for a, b in zip(first, second, strict=True))
+    norm_a = math.sqrt(sum(a * a for a in first))
+    norm_b = math.sqrt(sum(b * b for b in second))
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return max(-1.0, min(1.0, dot / (norm_a * norm_b)))
+
+
+class TestStackVectors:
+    """Tests for stack_vectors."""
+
+    def test_stacks_float32_arrays(self):
+        """Test pgvector-style float32 arrays become one float32 matrix."""
+        vectors = [np.ones(4, dtype=np.float32), np.arange(4, dtype=np.float32)]
+
+        matrix, valid = stack_vectors(vectors)
+
+        assert matrix.dtype == np.float32
+        assert matrix.shape == (2, 4)
+        assert valid.all()
+        assert matrix[1].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+    def test_invalid_rows_are_zero(self):
+        """Test missing vectors and vectors of another dimension become zero rows."""
+        matrix, valid = stack_vectors([[1.0, 2.0], None, [1.0, 2.0, 3.0], []], dim=2)
+
+        assert valid.tolist() == [True, False, False, False]
+        assert matrix[1:].tolist() == [[0.0, 0.0]] * 3
+
+    def test_empty(self):
+        """Test an empty input gives an empty matrix."""
+        matrix, valid = stack_vectors([])
+        assert matrix.shape == (0, 0)
+        assert len(valid) == 0
+
+
+class TestCosine:
+    """Tests for batched and scalar cosine similarity."""
+
+    def test_matches_pure_python(self):
+        """Test batched similarities agree with the scalar definition."""
+        rng = np.random.default_rng(3)
+        matrix = rng.normal(size=(20, 384)).astype(np.float32)
+        vector = rng.normal(size=384).astype(np.float32)
+
+        similarities = cosine_similarities(matrix, vector)
+
+        for row, value in zip(matrix, similarities, strict=True):
+            expected = _python_cosine(row.tolist(), vector.tolist())
+            assert value == pytest.approx(expected, abs=1e-6)
+            assert cosine_similarity(row.tolist(), vector.tolist()) == pytest.approx(
+                expected, abs=1e-6
+            )
+
+    def test_degenerate_inputs(self):
+        """Test zero norms and mismatched dimensions give 0.0."""
+        assert cosine_similarity([0.0, 0.0], [1.0, 1.0]) == 0.0
+        assert cosine_similarity([1.0], [1.0, 1.0]) == 0.0
+        assert cosine_similarity([], []) == 0.0
+        assert cosine_similarities(np.ones((2, 3)), [1.0, 1.0]).tolist() == [0.0, 0.0]
+
+    def test_novelty_is_clipped_distance(self):
+        """Test novelty is 1 - cosine in [0, 1] and zero without a centroid."""
+        matrix = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]], dtype=np.float32)
+
+        assert novelty_scores(matrix, [1.0, 0.0]).tolist() == pytest.approx([0.0, 1.0, 1.0])
+        assert novelty_scores(matrix, None).tolist() == [0.0, 0.0, 0.0]
+
+
+class TestCentroid:
+    """Tests for centroid accumulation."""
+
+    def test_matrix_and_vector_paths_agree(self):
+        """Test adding a matrix equals adding its rows one by one."""
+        rng = np.random.default_rng(5)
+        vectors = rng.normal(size=(10, 8)).astype(np.float32)
+        accumulator = CentroidAccumulator()
+        accumulator.add_matrix(vectors[:6])
+        accumulator.add_matrix(vectors[6:])
+
+        expected = centroid(vectors.tolist())
+
+        assert accumulator.count == 10
+        assert accumulator.value() == pytest.approx(expected)
+        assert expected == pytest.approx(vectors.astype(np.float64).mean(axis=0).tolist())
+
+    def test_skips_invalid_rows(self):
+        """Test empty and mismatched vectors do not contribute."""
+        assert centroid([[1.0, 3.0], [], None, [1.0, 2.0, 3.0], [3.0, 5.0]]) == [2.0, 4.0]
+        assert centroid([]) is None
@@ -1,12 +1,14 @@
 """Integration tests for vector search endpoint."""
+import json
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 
 from app.db.session import get_db
 from app.main import app
-from app.services.embeddings import EmbeddingService
+from app.services.embedding_executor import EmbeddingExecutor, EmbeddingQueueFullError
 
 
 def mock_db_session():
@@ -44,7 +46,7 @@ def test_vector_search_with_text_query(client):
     app.dependency_overrides[get_db] = lambda: mock_db
     
     # Mock embedding service
-    with patch.object(EmbeddingService, 'get') as mock_get_service:
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_service:
         mock_service = MagicMock()
         mock_service.embed = MagicMock(return_value=[0.1] * 384)
         mock_get_service.return_value = mock_service
@@ -165,7 +167,7 @@ def test_vector_search_k_parameter_bounds(client):
     app.dependency_overrides[get_db] = lambda: mock_db
     
     # Mock embedding service
-    with patch.object(EmbeddingService, 'get') as mock_get_service:
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_service:
         mock_service = MagicMock()
         mock_service.embed = MagicMock(return_value=[0.1] * 384)
         mock_get_service.return_value = mock_service
@@ -182,3 +184,145 @@ def test_vector_search_k_parameter_bounds(client):
     
     # Clear overrides
     app.dependency_overrides.clear()
+
+
+def test_vector_search_sheds_load_when_embedding_queue_full(client):
+    """Test a full embedding queue returns 503 instead of queueing without bound."""
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_executor:
+        mock_get_executor.return_value.embed.side_effect = EmbeddingQueueFullError("full")
+        response = client.get("/v1/papers/near?text_query=test")
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.json()["detail"]["error"] == "embedding_unavailable"
+    assert response.headers["retry-after"] == "1"
+
+
+def test_vector_search_repeated_text_query_is_cached(client):
+    """Test an identical text query reuses the embedding and the result list."""
+    mock_db = MagicMock()
+    mock_db.execute().mappings().all.return_value = [
+        {"id": 1, "title": "Quantum Computing Advances", "similarity": 0.95},
+    ]
+    mock_db.execute.reset_mock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_executor, patch(
+        "app.services.query_cache.current_corpus_version", return_value=1
+    ):
+        mock_get_executor.return_value.embed.return_value = [0.1] * 384
+        first = client.get("/v1/papers/near?text_query=quantum computing&k=3")
+        second = client.get("/v1/papers/near?text_query=quantum  computing&k=3")
+
+    app.dependency_overrides.clear()
+
+    assert first.json() == second.json()
+    mock_get_executor.return_value.embed.assert_called_once()
+    assert mock_db.execute.call_count == 1
+
+
+def test_vector_search_filters_are_passed_to_index_scan(client):
+    """Test filter parameters reach the search SQL instead of being applied afterwards."""
+    mock_db = MagicMock()
+    mock_db.execute().mappings().all.return_value = [
+        {"id": 5, "title": "Grasping with Diffusion Policies", "similarity": 0.9},
+    ]
+    mock_db.execute.reset_mock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_executor:
+        mock_get_executor.return_value.embed.return_value = [0.1] * 384
+        response = client.get(
+            "/v1/papers/near?text_query=grasping&k=5&domain=cs.RO"
+            "&min_composite_score=0.6&published_after=2025-01-01T00:00:00Z"
+            "&exclude_ids=1&exclude_ids=2"
+        )
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()[0]["id"] == 5
+    sql, params = mock_db.execute.call_args.args
+    assert "p.domain = 'cs.RO'" in str(sql)
+    assert params["min_composite_score"] == 0.6
+    assert params["exclude_ids"] == [1, 2]
+    assert params["published_after"].year == 2025
+
+
+def test_vector_search_ef_search_per_request(client):
+    """Test ef_search is set for the request's transaction and keys the result cache."""
+    mock_db = MagicMock()
+    mock_db.execute().mappings().all.return_value = [
+        {"id": 5, "title": "Grasping with Diffusion Policies", "similarity": 0.9},
+    ]
+    mock_db.execute.reset_mock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch.object(EmbeddingExecutor, 'get') as mock_get_executor:
+        mock_get_executor.return_value.embed.return_value = [0.1] * 384
+        fast = client.get("/v1/papers/near?text_query=grasping&k=5")
+        accurate = client.get("/v1/papers/near?text_query=grasping&k=5&ef_search=200")
+        too_large = client.get("/v1/papers/near?text_query=grasping&k=5&ef_search=5000")
+
+    app.dependency_overrides.clear()
+
+    assert fast.status_code == 200 and accurate.status_code == 200
+    assert too_large.status_code == 422
+    set_sql, set_params = mock_db.execute.call_args_list[-2].args
+    assert "hnsw.ef_search" in str(set_sql)
+    assert set_params["ef_search"] == "200"
+
+
+def test_vector_search_batch_streams_ndjson(client):
+    """Test a batch of paper ids and texts streams one NDJSON line per query."""
+    mock_db = MagicMock()
+    backend = MagicMock()
+    backend.search_many.return_value = [
+        [{"id": 2, "title": "Neighbour of 1", "similarity": 0.9}],
+        [{"id": 3, "title": "About robots", "similarity": 0.8}],
+    ]
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch(
+        "app.api.routes.papers.load_embeddings", return_value={1: np.full(384, 0.5, np.float32)}
+    ), patch("app.api.routes.papers.get_search_backend", return_value=backend), patch(
+        "app.api.routes.papers.EmbeddingService.get"
+    ) as mock_get_service:
+        mock_get_service.return_value.embed_many.return_value = [[0.1] * 384]
+        response = client.post(
+            "/v1/papers/near/batch",
+            json={"paper_ids": [1, 404], "texts": ["robots"], "k": 1},
+        )
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"paper_id": 1, "results": [{"id": 2, "title": "Neighbour of 1", "similarity": 0.9}]},
+        {"paper_id": 404, "error": "not_found"},
+        {"text": "robots", "results": [{"id": 3, "title": "About robots", "similarity": 0.8}]},
+    ]
+    backend.search_many.assert_called_once()
+    assert backend.search_many.call_args.args[1] == [[0.5] * 384, [0.1] * 384]
+    assert backend.search_many.call_args.kwargs["exclude_ids"] == [1, None]
+    mock_get_service.return_value.embed_many.assert_called_once_with(["robots"])
+
+
+def test_vector_search_batch_limits_size(client):
+    """Test empty and oversized batches are rejected before any search."""
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    empty = client.post("/v1/papers/near/batch", json={})
+    with patch("app.api.routes.papers.settings.near_batch_max_items", 2):
+        too_large = client.post("/v1/papers/near/batch", json={"paper_ids": [1, 2, 3]})
+
+    app.dependency_overrides.clear()
+
+    assert empty.status_code == 400
+    assert too_large.status_code == 400
+    assert too_large.json()["detail"]["error"] == "batch_too_large"